@@ -1,14 +1,50 @@
 from __future__ import annotations
 
+import cProfile
+import io
+import json
+import logging
+import pstats
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Dict, Iterator, List, Optional
 
-from flask import Flask, abort, jsonify, redirect, render_template, request, url_for
+from flask import (
+    Flask,
+    Response,
+    abort,
+    g,
+    jsonify,
+    redirect,
+    render_template,
+    request,
+    stream_with_context,
+    url_for,
+)
 from pathlib import Path
 
-from .config import AppConfig, load_config
+from . import metrics
+from .api import snapshot_payload
+from .config import AppConfig, load_config, resolve_config_path
+from .events import SnapshotEvent
+from .fragments import RowRenderer
 from .github_client import GitHubClient
+from .jobs import Job
+from .mapping import build_matcher, install_matcher
+from .poller import BackgroundPoller
+from .query import PullRequestQuery
+from .ratelimit import RateLimitExceeded
+from .reload import ConfigReloader, restart_required
 from .service import PullRequestService
+from .store import create_store
+from .webhooks import WebhookHandler, verify_signature
+
+logger = logging.getLogger(__name__)
+
+# How often an idle event stream sends a keepalive and checks the shared store.
+EVENT_STREAM_POLL_SECONDS = 15
+
+# Functions listed in a ``?profile=1`` report, by cumulative time.
+PROFILE_MAX_LINES = 60
 
 
 def create_app(config_path: Optional[str] = None) -> Flask:
@@ -18,10 +54,44 @@ def create_app(config_path: Optional[str] = None) -> Flask:
         template_folder=str(base_dir / "templates"),
         static_folder=str(base_dir / "static"),
     )
-    app_config: AppConfig = load_config(config_path)
-    service = PullRequestService(app_config, GitHubClient(app_config.github))
+    config_file = resolve_config_path(config_path)
+    app_config: AppConfig = load_config(str(config_file))
+    install_matcher(build_matcher(app_config.commands))
+    service = PullRequestService(
+        app_config, GitHubClient(app_config.github), store=create_store(app_config.storage)
+    )
     app.config["APP_CONFIG"] = app_config
     app.config["PR_SERVICE"] = service
+    poller = BackgroundPoller(service)
+    app.config["PR_POLLER"] = poller
+    webhooks = WebhookHandler(service)
+    rows = RowRenderer(lambda **context: app.jinja_env.get_template("_pr_row.html").render(**context))
+    app.config["PR_ROWS"] = rows
+    if app_config.polling.background:
+        poller.start()
+
+    def apply_config(config: AppConfig) -> Dict[str, List[str]]:
+        previous = service.config
+        if config.commands != previous.commands:
+            install_matcher(build_matcher(config.commands))
+        changes = service.apply_config(config)
+        changes["restart_required"] = restart_required(previous, config)
+        if changes["restart_required"]:
+            logger.warning(
+                "Changes to %s take effect after a restart", ", ".join(changes["restart_required"])
+            )
+        app.config["APP_CONFIG"] = config
+        if config.polling.background:
+            poller.start()
+            poller.wake()
+        else:
+            poller.stop()
+        return changes
+
+    reloader = ConfigReloader(config_file, apply_config, app_config.reload.interval_seconds)
+    app.config["CONFIG_RELOADER"] = reloader
+    if app_config.reload.watch:
+        reloader.start()
 
     @app.template_filter("humantime")
     def humantime(value: datetime) -> str:
@@ -31,57 +101,242 @@ def create_app(config_path: Optional[str] = None) -> Flask:
 
     @app.before_request
     def enforce_api_key() -> None:
-        if request.method == "GET":
+        if request.method == "GET" or request.endpoint == "webhook":
             return None
-        api_key = app_config.auth.api_key
+        api_key = service.config.auth.api_key
         if not api_key:
             return None
-        provided = request.headers.get("X-API-Key") or request.form.get("api_key") or request.args.get("api_key")
-        if provided != api_key:
+        if provided_api_key() != api_key:
+            abort(401)
+        return None
+
+    def provided_api_key() -> Optional[str]:
+        return request.headers.get("X-API-Key") or request.form.get("api_key") or request.args.get("api_key")
+
+    @app.before_request
+    def start_profile() -> None:
+        if request.args.get("profile") != "1":
+            return None
+        # Profiles expose internals, so they need the key even on GET requests.
+        api_key = service.config.auth.api_key
+        if not api_key:
+            abort(404)
+        if provided_api_key() != api_key:
             abort(401)
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
         return None
 
+    @app.after_request
+    def finish_profile(response: Response) -> Response:
+        profiler = g.pop("profiler", None)
+        if profiler is None:
+            return response
+        profiler.disable()
+        if response.is_streamed:
+            return response
+        report = io.StringIO()
+        pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(PROFILE_MAX_LINES)
+        return Response(
+            report.getvalue(),
+            mimetype="text/plain",
+            headers={"X-Profiled-Status": str(response.status_code)},
+        )
+
+    def render_page(template: str, **context) -> str:
+        with metrics.RENDER_SECONDS.time(template=template):
+            return render_template(template, **context)
+
     @app.get("/")
     def index() -> str:
-        target_label = request.args.get("target") or app_config.targets[0].label
+        target_label = request.args.get("target") or service.config.targets[0].label
+        query = PullRequestQuery.from_args(request.args)
         try:
-            pull_requests = service.list_pull_requests(target_label)
+            snapshot = service.get_snapshot(target_label)
         except KeyError:
-            return redirect(url_for("index", target=app_config.targets[0].label))
-        return render_template(
+            return redirect(url_for("index", target=service.config.targets[0].label))
+        except RateLimitExceeded as exc:
+            return render_page(
+                "index.html",
+                targets=service.config.targets,
+                active_label=target_label,
+                pull_requests=[],
+                query=query,
+                command_choices=service.command_choices(),
+                refreshed_at=None,
+                stale=True,
+                error=str(exc),
+            ), 503
+        pr_index = service.pull_request_index(target_label, snapshot)
+        page = pr_index.query(query)
+        choices = service.command_choices()
+        return render_page(
             "index.html",
-            targets=app_config.targets,
+            targets=service.config.targets,
             active_label=target_label,
-            pull_requests=pull_requests,
-            command_choices=service.command_choices(),
-            refreshed_at=datetime.now(timezone.utc),
+            pull_requests=page.pull_requests,
+            rows=rows.render_rows(target_label, page.pull_requests, choices),
+            page=page,
+            query=query,
+            repos=pr_index.repos,
+            failing_pipelines=pr_index.failing_pipelines,
+            snapshot_size=len(snapshot.pull_requests),
+            command_choices=choices,
+            refreshed_at=datetime.fromtimestamp(snapshot.fetched_at, tz=timezone.utc),
+            stale=service.is_stale(snapshot),
+            version=snapshot.version,
         )
 
+    @app.get("/api/prs")
+    def api_pull_requests():
+        target_label = request.args.get("target") or service.config.targets[0].label
+        since = request.args.get("since", type=int)
+        # Without paging parameters the API keeps returning every PR.
+        query = PullRequestQuery.from_args(request.args, per_page=None)
+        try:
+            snapshot = service.get_snapshot(target_label)
+        except KeyError:
+            return jsonify({"status": "error", "message": f"Unknown target: {target_label}"}), 404
+        except RateLimitExceeded as exc:
+            return jsonify({"status": "error", "message": str(exc)}), 503
+        # The version changes with every refresh or webhook patch, so it is
+        # the whole representation for a given URL.
+        etag = str(snapshot.version)
+        if request.if_none_match.contains(etag):
+            response = app.response_class(status=304)
+        else:
+            page = service.pull_request_index(target_label, snapshot).query(query)
+            response = jsonify(snapshot_payload(target_label, snapshot, since, page))
+        response.set_etag(etag)
+        max_age = service.config.server.api_max_age_seconds
+        response.headers["Cache-Control"] = f"max-age={max_age}" if max_age else "no-cache"
+        return response
+
+    @app.get("/events")
+    def events() -> Response:
+        target_label = request.args.get("target") or service.config.targets[0].label
+        try:
+            snapshot = service.cached_snapshot(target_label) or service.get_snapshot(target_label)
+        except KeyError:
+            abort(404)
+        last_event_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+        try:
+            cursor = int(last_event_id)
+        except (TypeError, ValueError):
+            cursor = snapshot.version
+        service.events.mark_horizon(target_label, snapshot.version)
+
+        def stream() -> Iterator[str]:
+            last_id = cursor
+            yield "retry: 5000\n\n"
+            while True:
+                pending = service.events.events_since(target_label, last_id)
+                if pending is None:
+                    yield "event: reset\ndata: {}\n\n"
+                    return
+                for event in pending:
+                    yield encode_event(event)
+                    last_id = event.id
+                if not pending:
+                    yield ": keepalive\n\n"
+                service.events.wait(target_label, last_id, EVENT_STREAM_POLL_SECONDS)
+                # Adopts snapshots published by other workers, which emits their diff.
+                service.cached_snapshot(target_label)
+
+        return Response(
+            stream_with_context(stream()),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    def encode_event(event: SnapshotEvent) -> str:
+        if event.message is None:
+            # Rendered through the fragment cache, so reloads after the event reuse these rows.
+            rendered = rows.render_rows(event.label, event.pull_requests, service.command_choices())
+            markup = {
+                f"{pr.repo_full_name}#{pr.number}": str(row)
+                for pr, row in zip(event.pull_requests, rendered)
+            }
+            data = json.dumps({**event.data, "rows": markup})
+            event.message = f"id: {event.id}\nevent: diff\ndata: {data}\n\n"
+        return event.message
+
     @app.post("/rerun")
     def rerun() -> tuple:
         form = request.form
-        target_label = form.get("target") or app_config.targets[0].label
+        target_label = form.get("target") or service.config.targets[0].label
         repo_full_name = form.get("repo")
         pr_number = int(form.get("pr", 0))
         command = form.get("command", "")
         try:
-            result = service.rerun_pipeline(target_label, repo_full_name, pr_number, command)
-            return jsonify(result)
+            job = service.enqueue_rerun(target_label, repo_full_name, pr_number, command)
+            return job_accepted(job)
         except Exception as exc:  # pylint: disable=broad-except
             return jsonify({"status": "error", "message": str(exc)}), 400
 
     @app.post("/rebase-rerun")
     def rebase_rerun() -> tuple:
         form = request.form
-        target_label = form.get("target") or app_config.targets[0].label
+        target_label = form.get("target") or service.config.targets[0].label
         repo_full_name = form.get("repo")
         pr_number = int(form.get("pr", 0))
         try:
-            result = service.rebase_and_rerun(target_label, repo_full_name, pr_number)
-            return jsonify(result)
+            job = service.enqueue_rebase_and_rerun(target_label, repo_full_name, pr_number)
+            return job_accepted(job)
         except Exception as exc:  # pylint: disable=broad-except
             return jsonify({"status": "error", "message": str(exc)}), 400
 
+    @app.post("/rerun-failed")
+    def rerun_failed() -> tuple:
+        form = request.form
+        target_label = form.get("target") or service.config.targets[0].label
+        dry_run = form.get("dry_run", "").lower() in {"1", "true", "yes", "on"}
+        try:
+            return jsonify(service.rerun_failed(target_label, dry_run=dry_run))
+        except Exception as exc:  # pylint: disable=broad-except
+            return jsonify({"status": "error", "message": str(exc)}), 400
+
+    @app.get("/jobs/<job_id>")
+    def job_status(job_id: str) -> tuple:
+        job = service.jobs.get(job_id)
+        if job is None:
+            return jsonify({"status": "error", "message": "Unknown or expired job."}), 404
+        return jsonify(job.to_dict())
+
+    def job_accepted(job: Job) -> tuple:
+        payload = {
+            "status": "queued",
+            "job_id": job.id,
+            "job_url": url_for("job_status", job_id=job.id),
+            "merged": job.merged > 0,
+        }
+        return jsonify(payload), 202
+
+    @app.post("/webhook")
+    def webhook() -> tuple:
+        secret = service.config.webhook.secret
+        if not secret:
+            abort(404)
+        if not verify_signature(secret, request.get_data(), request.headers.get("X-Hub-Signature-256")):
+            abort(401)
+        event = request.headers.get("X-GitHub-Event", "")
+        if event == "ping":
+            return jsonify({"status": "ok", "event": event})
+        payload = request.get_json(silent=True)
+        if not isinstance(payload, dict):
+            return jsonify({"status": "error", "message": "Expected a JSON payload."}), 400
+        try:
+            return jsonify(webhooks.handle(event, payload))
+        except KeyError as exc:
+            return jsonify({"status": "error", "message": f"Missing field {exc}"}), 400
+
+    @app.get("/metrics")
+    def metrics_endpoint() -> Response:
+        body = metrics.REGISTRY.render() + metrics.render_service_metrics(
+            service, {"fragments": rows.stats()}
+        )
+        return Response(body, mimetype="text/plain; version=0.0.4")
+
     @app.get("/healthz")
     def health() -> dict:
         return {"status": "ok"}
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from typing import Dict, Optional
+
+from .models import TargetSnapshot
+from .query import PullRequestPage
+from .store import encode_pull_request
+
+
+def snapshot_payload(
+    label: str,
+    snapshot: TargetSnapshot,
+    since: Optional[int] = None,
+    page: Optional[PullRequestPage] = None,
+) -> Dict:
+    """Serialize a snapshot for ``GET /api/prs``.
+
+    With ``since`` only PRs whose version is newer are included; ``open``
+    always lists every PR still in the snapshot so clients can drop the rest.
+    A ``since`` that is not older than the snapshot (or from before a
+    restart of the version clock) simply yields no or all PRs respectively.
+    With a ``page`` from the PR index, both are limited to the PRs it
+    selected, and the match count and page bounds are included.
+    """
+    pull_requests = snapshot.pull_requests if page is None else page.pull_requests
+    delta = since is not None and since <= snapshot.version
+    if delta:
+        pull_requests = [pr for pr in pull_requests if pr.version > since]
+    payload = {
+        "target": label,
+        "version": snapshot.version,
+        "fetched_at": snapshot.fetched_at,
+        "delta": delta,
+        "pull_requests": [encode_pull_request(pr) for pr in pull_requests],
+    }
+    if page is not None:
+        payload.update(
+            {"total": page.total, "page": page.page, "per_page": page.per_page, "pages": page.pages}
+        )
+    if delta:
+        selection = snapshot.pull_requests if page is None else page.matched()
+        payload["open"] = [[pr.repo_full_name, pr.number] for pr in selection]
+    return payload
@@ -1,9 +1,11 @@
 from __future__ import annotations
 
+import heapq
 import time
+from collections import OrderedDict
 from dataclasses import dataclass
 from threading import RLock
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 
 @dataclass
@@ -13,28 +15,102 @@ class CacheEntry:
 
 
 class TTLCache:
-    """A minimal thread-safe TTL cache."""
+    """A thread-safe TTL cache with an optional LRU bound.
 
-    def __init__(self) -> None:
-        self._store: Dict[str, CacheEntry] = {}
+    Expired entries are dropped when read and by a sweep over a heap of expiry
+    times, which runs at most every ``sweep_interval_seconds`` on writes (or
+    on demand via ``sweep``), so keys that are never read again do not pile
+    up. When ``max_entries`` is set the least recently used entry is evicted
+    to make room.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        sweep_interval_seconds: float = 60.0,
+    ) -> None:
+        self.max_entries = max_entries
+        self.sweep_interval_seconds = sweep_interval_seconds
+        self._store: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._expiries: List[Tuple[float, str]] = []
+        self._next_sweep = time.time() + sweep_interval_seconds
         self._lock = RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
 
     def get(self, key: str) -> Optional[Any]:
         now = time.time()
         with self._lock:
             entry = self._store.get(key)
             if not entry:
+                self.misses += 1
                 return None
             if entry.expires_at < now:
                 self._store.pop(key, None)
+                self.expirations += 1
+                self.misses += 1
                 return None
+            self._store.move_to_end(key)
+            self.hits += 1
             return entry.value
 
     def set(self, key: str, value: Any, ttl_seconds: int) -> None:
-        expires_at = time.time() + ttl_seconds
+        now = time.time()
+        expires_at = now + ttl_seconds
         with self._lock:
             self._store[key] = CacheEntry(value=value, expires_at=expires_at)
+            self._store.move_to_end(key)
+            heapq.heappush(self._expiries, (expires_at, key))
+            if now >= self._next_sweep:
+                self._sweep(now)
+            if self.max_entries is not None:
+                while len(self._store) > self.max_entries:
+                    self._store.popitem(last=False)
+                    self.evictions += 1
+
+    def invalidate(self, key: str) -> bool:
+        """Drop ``key``; returns whether it was present."""
+        with self._lock:
+            return self._store.pop(key, None) is not None
+
+    def sweep(self) -> int:
+        """Drop every expired entry now and return how many were removed."""
+        with self._lock:
+            return self._sweep(time.time())
 
     def clear(self) -> None:
         with self._lock:
             self._store.clear()
+            self._expiries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._store),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._store)
+
+    def _sweep(self, now: float) -> int:
+        removed = 0
+        while self._expiries and self._expiries[0][0] < now:
+            expires_at, key = heapq.heappop(self._expiries)
+            entry = self._store.get(key)
+            # Overwritten or evicted keys leave stale heap items behind; skip them.
+            if entry is not None and entry.expires_at == expires_at:
+                del self._store[key]
+                removed += 1
+        if len(self._expiries) > 2 * len(self._store) + 64:
+            self._expiries = [(entry.expires_at, key) for key, entry in self._store.items()]
+            heapq.heapify(self._expiries)
+        self.expirations += removed
+        self._next_sweep = now + self.sweep_interval_seconds
+        return removed
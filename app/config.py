@@ -1,11 +1,13 @@
 from __future__ import annotations
 
 import os
+import re
+from fnmatch import fnmatchcase
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Literal, Optional
 
 import yaml
-from pydantic import BaseModel, ConfigDict, Field, ValidationError, field_validator
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, field_validator, model_validator
 
 DEFAULT_CONFIG_PATHS = (
     os.environ.get("PR_MONITOR_CONFIG"),
@@ -20,20 +22,63 @@ class GitHubConfig(BaseModel):
     token: str = Field(min_length=1)
     api_base: str = Field(default="https://api.github.com")
     web_base: str = Field(default="https://github.com")
+    # Rate-limit units (GraphQL points / REST requests) background polling
+    # leaves untouched so rerun and update-branch actions keep working.
+    rate_limit_reserve: int = Field(default=200, ge=0)
+    # Independent GraphQL batches (pipelines, PR lookups) sent at once.
+    max_concurrency: int = Field(default=4, ge=1, le=32)
 
 
 class TargetConfig(BaseModel):
     model_config = ConfigDict(extra="forbid")
 
     label: str
-    user: str
+    # One author, a roster of authors, or both; each author is searched separately.
+    user: Optional[str] = None
+    users: List[str] = Field(default_factory=list)
+    # "owner/name", or an owner-scoped glob such as "apache/doris*".
     repos: List[str] = Field(default_factory=list)
 
+    @field_validator("repos")
+    @classmethod
+    def validate_repos(cls, value: List[str]) -> List[str]:
+        for repo in value:
+            owner, _, name = repo.partition("/")
+            if not owner or not name or any(char in owner for char in "*?["):
+                raise ValueError(f"Repository {repo!r} must look like 'owner/name' or 'owner/pattern'.")
+        return value
+
+    @model_validator(mode="after")
+    def validate_authors(self) -> "TargetConfig":
+        if not self.authors:
+            raise ValueError(f"Target {self.label!r} needs a user or users.")
+        return self
+
+    @property
+    def authors(self) -> List[str]:
+        return list(dict.fromkeys(([self.user] if self.user else []) + self.users))
+
+    @property
+    def repo_patterns(self) -> List[str]:
+        return [repo for repo in self.repos if any(char in repo for char in "*?[")]
+
+    def matches(self, author: Optional[str], repo_full_name: str) -> bool:
+        return author in self.authors and self.matches_repo(repo_full_name)
+
+    def matches_repo(self, repo_full_name: str) -> bool:
+        if not self.repos or repo_full_name in self.repos:
+            return True
+        return any(fnmatchcase(repo_full_name, pattern) for pattern in self.repo_patterns)
+
 
 class PollingConfig(BaseModel):
     model_config = ConfigDict(extra="forbid")
 
     interval_seconds: int = Field(default=300, ge=15)
+    background: bool = True
+    max_stale_seconds: int = Field(default=3600, ge=0)
+    incremental: bool = True
+    reconcile_interval_seconds: int = Field(default=1800, ge=60)
 
 
 class ServerConfig(BaseModel):
@@ -41,6 +86,8 @@ class ServerConfig(BaseModel):
 
     host: str = "127.0.0.1"
     port: int = Field(default=8000, ge=1)
+    # max-age for /api/prs responses; 0 makes clients revalidate every time.
+    api_max_age_seconds: int = Field(default=0, ge=0)
 
 
 class AuthConfig(BaseModel):
@@ -49,6 +96,72 @@ class AuthConfig(BaseModel):
     api_key: Optional[str] = None
 
 
+class ActionsConfig(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    max_workers: int = Field(default=4, ge=1)
+    per_repo_per_minute: int = Field(default=20, ge=1)
+    per_repo_burst: int = Field(default=5, ge=1)
+    # How long Rebase & Rerun waits for update-branch to produce a new head.
+    rebase_timeout_seconds: int = Field(default=300, ge=30)
+
+
+class WebhookConfig(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    secret: Optional[str] = None
+    poll_interval_seconds: int = Field(default=1800, ge=60)
+
+
+class StorageConfig(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    backend: Literal["memory", "sqlite"] = "memory"
+    path: str = "data/pr-monitor.sqlite3"
+    lease_seconds: int = Field(default=60, ge=10)
+
+
+class ReloadConfig(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    # Re-read the config file when it changes; SIGHUP reloads it either way.
+    watch: bool = True
+    interval_seconds: int = Field(default=5, ge=1)
+
+
+class CommandRuleConfig(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    pattern: str = Field(min_length=1)
+    command: str
+    regex: bool = False
+    priority: int = 0
+
+    @field_validator("command")
+    @classmethod
+    def validate_command(cls, value: str) -> str:
+        if not value.startswith("run "):
+            raise ValueError("Command must start with 'run '.")
+        return value
+
+    @model_validator(mode="after")
+    def validate_pattern(self) -> "CommandRuleConfig":
+        if self.regex:
+            try:
+                re.compile(self.pattern)
+            except re.error as err:
+                raise ValueError(f"Invalid pattern {self.pattern!r}: {err}") from err
+        return self
+
+
+class CommandsConfig(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    # Checked before the built-in Doris rules at equal priority and length.
+    rules: List[CommandRuleConfig] = Field(default_factory=list)
+    include_defaults: bool = True
+
+
 class AppConfig(BaseModel):
     model_config = ConfigDict(extra="forbid")
 
@@ -57,6 +170,11 @@ class AppConfig(BaseModel):
     polling: PollingConfig = Field(default_factory=PollingConfig)
     server: ServerConfig = Field(default_factory=ServerConfig)
     auth: AuthConfig = Field(default_factory=AuthConfig)
+    storage: StorageConfig = Field(default_factory=StorageConfig)
+    webhook: WebhookConfig = Field(default_factory=WebhookConfig)
+    actions: ActionsConfig = Field(default_factory=ActionsConfig)
+    commands: CommandsConfig = Field(default_factory=CommandsConfig)
+    reload: ReloadConfig = Field(default_factory=ReloadConfig)
 
     @field_validator("targets")
     @classmethod
@@ -66,7 +184,7 @@ class AppConfig(BaseModel):
         return value
 
 
-def _resolve_config_path(path: Optional[str]) -> Path:
+def resolve_config_path(path: Optional[str]) -> Path:
     if path:
         resolved = Path(path)
         if not resolved.exists():
@@ -90,10 +208,14 @@ def _apply_env_overrides(data: dict) -> None:
     if api_key_override:
         data.setdefault("auth", {})
         data["auth"]["api_key"] = api_key_override
+    webhook_secret_override = os.environ.get("PR_MONITOR_WEBHOOK_SECRET")
+    if webhook_secret_override:
+        data.setdefault("webhook", {})
+        data["webhook"]["secret"] = webhook_secret_override
 
 
 def load_config(path: Optional[str] = None) -> AppConfig:
-    config_path = _resolve_config_path(path)
+    config_path = resolve_config_path(path)
     with config_path.open("r", encoding="utf-8") as handle:
         data = yaml.safe_load(handle) or {}
     _apply_env_overrides(data)
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Tuple
+
+from .github_client import PullRequestKey
+from .models import PullRequest, TargetSnapshot
+
+# Diff events kept per target for clients resuming with Last-Event-ID.
+EVENT_BUFFER_SIZE = 200
+
+# PR fields whose flips are reported individually in ``changed`` entries.
+WATCHED_FIELDS = (
+    "title",
+    "status_badge",
+    "mergeable_state",
+    "has_conflicts",
+    "update_branch_available",
+    "head_sha",
+)
+
+
+@dataclass
+class SnapshotEvent:
+    """The difference between two successive snapshots of one target."""
+
+    id: int
+    label: str
+    data: Dict
+    # Added and changed PRs, for rendering their table rows.
+    pull_requests: List[PullRequest]
+    # Encoded SSE message, filled in by the first client that sends the event.
+    message: Optional[str] = field(default=None, repr=False)
+
+
+class EventHub:
+    """Fans snapshot diffs out to every connected event stream.
+
+    The service publishes each new snapshot once; diffs are computed here a
+    single time and kept in a short per-target buffer that all subscribers
+    read, so the number of open dashboards never affects GitHub traffic.
+    """
+
+    def __init__(self, buffer_size: int = EVENT_BUFFER_SIZE) -> None:
+        self.buffer_size = buffer_size
+        self._events: Dict[str, Deque[SnapshotEvent]] = {}
+        # Oldest version each target's buffer can replay from.
+        self._horizon: Dict[str, int] = {}
+        self._changed = threading.Condition()
+
+    def publish(
+        self, label: str, previous: Optional[TargetSnapshot], snapshot: TargetSnapshot
+    ) -> Optional[SnapshotEvent]:
+        """Record the diff from ``previous`` to ``snapshot`` and wake subscribers."""
+        with self._changed:
+            if previous is None:
+                self._horizon.setdefault(label, snapshot.version)
+                return None
+            self._horizon.setdefault(label, previous.version)
+            data, pull_requests = diff_snapshots(previous, snapshot)
+            if not (data["added"] or data["removed"] or data["changed"]):
+                return None
+            events = self._events.setdefault(label, deque())
+            if len(events) >= self.buffer_size:
+                self._horizon[label] = events.popleft().id
+            event = SnapshotEvent(snapshot.version, label, data, pull_requests)
+            events.append(event)
+            self._changed.notify_all()
+            return event
+
+    def events_since(self, label: str, last_id: int) -> Optional[List[SnapshotEvent]]:
+        """Events newer than ``last_id``, or ``None`` if some have already been dropped."""
+        with self._changed:
+            horizon = self._horizon.get(label)
+            if horizon is None or last_id < horizon:
+                return None
+            return [event for event in self._events.get(label, ()) if event.id > last_id]
+
+    def mark_horizon(self, label: str, version: int) -> None:
+        """Let clients resume from ``version`` when nothing has been published yet."""
+        with self._changed:
+            self._horizon.setdefault(label, version)
+
+    def wait(self, label: str, last_id: int, timeout: float) -> None:
+        """Block until ``label`` has an event newer than ``last_id`` or ``timeout`` passes."""
+        with self._changed:
+            self._changed.wait_for(
+                lambda: any(event.id > last_id for event in self._events.get(label, ())),
+                timeout=timeout,
+            )
+
+
+def diff_snapshots(
+    previous: TargetSnapshot, snapshot: TargetSnapshot
+) -> Tuple[Dict, List[PullRequest]]:
+    """Describe added, removed and changed PRs between two snapshots."""
+    before: Dict[PullRequestKey, PullRequest] = {
+        (pr.repo_full_name, pr.number): pr for pr in previous.pull_requests
+    }
+    after: Dict[PullRequestKey, PullRequest] = {
+        (pr.repo_full_name, pr.number): pr for pr in snapshot.pull_requests
+    }
+    added: List[PullRequest] = []
+    changed: List[Dict] = []
+    touched: List[PullRequest] = []
+    for key, pr in after.items():
+        old = before.get(key)
+        if old is None:
+            added.append(pr)
+            continue
+        if old is pr or old == pr:
+            continue
+        fields = {
+            name: [getattr(old, name), getattr(pr, name)]
+            for name in WATCHED_FIELDS
+            if getattr(old, name) != getattr(pr, name)
+        }
+        changed.append(
+            {"key": list(key), "fields": fields, "pipelines": _pipeline_transitions(old, pr)}
+        )
+        touched.append(pr)
+    data = {
+        "version": snapshot.version,
+        "previous_version": previous.version,
+        "added": [[pr.repo_full_name, pr.number] for pr in added],
+        "removed": [list(key) for key in before if key not in after],
+        "changed": changed,
+    }
+    return data, added + touched
+
+
+def _pipeline_transitions(old: PullRequest, new: PullRequest) -> List[Dict]:
+    before = {p.name: p.conclusion or p.state for p in old.pipelines}
+    after = {p.name: p.conclusion or p.state for p in new.pipelines}
+    return [
+        {"name": name, "from": before.get(name), "to": after.get(name)}
+        for name in list(before) + [name for name in after if name not in before]
+        if before.get(name) != after.get(name)
+    ]
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from typing import Callable, Dict, List, Sequence
+
+from markupsafe import Markup
+
+from .cache import TTLCache
+from .models import PullRequest
+
+# Rendered rows kept across requests, across all targets.
+FRAGMENT_CACHE_MAX_ENTRIES = 5000
+FRAGMENT_TTL_SECONDS = 3600
+
+RenderRow = Callable[..., str]
+
+
+class RowRenderer:
+    """Renders PR table rows once per PR version and reuses the markup.
+
+    A row shows only the PR itself, the target label in its forms and the
+    command choices offered for unmapped pipelines. A PR's version changes
+    whenever any of its fields (``updated_at``, head SHA, pipeline states,
+    flags) does, so the label, the PR key, its version and the choices
+    identify the markup. PRs that were never published (version 0) are
+    rendered every time.
+    """
+
+    def __init__(self, render_row: RenderRow, max_entries: int = FRAGMENT_CACHE_MAX_ENTRIES) -> None:
+        self.render_row = render_row
+        self.cache = TTLCache(max_entries=max_entries)
+
+    def render(self, label: str, pr: PullRequest, command_choices: Sequence[str]) -> Markup:
+        return self.render_rows(label, [pr], command_choices)[0]
+
+    def render_rows(
+        self, label: str, pull_requests: Sequence[PullRequest], command_choices: Sequence[str]
+    ) -> List[Markup]:
+        choices = list(command_choices)
+        choices_key = hash(tuple(choices))
+        rows: List[Markup] = []
+        for pr in pull_requests:
+            if not pr.version:
+                rows.append(self._render(label, pr, choices))
+                continue
+            key = f"{label}\0{pr.repo_full_name}#{pr.number}@{pr.version}:{choices_key}"
+            row = self.cache.get(key)
+            if row is None:
+                row = self._render(label, pr, choices)
+                self.cache.set(key, row, ttl_seconds=FRAGMENT_TTL_SECONDS)
+            rows.append(row)
+        return rows
+
+    def stats(self) -> Dict[str, int]:
+        return self.cache.stats()
+
+    def _render(self, label: str, pr: PullRequest, choices: List[str]) -> Markup:
+        return Markup(self.render_row(pr=pr, active_label=label, command_choices=choices))
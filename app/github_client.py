@@ -1,19 +1,166 @@
 from __future__ import annotations
 
 import logging
-from datetime import datetime
-from typing import Dict, List, Optional
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from itertools import count
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, TypeVar
 
 import requests
+from requests.adapters import HTTPAdapter
 
+from . import metrics
+from .cache import TTLCache
 from .config import GitHubConfig, TargetConfig
 from .mapping import guess_command
-from .models import PipelineStatus, PullRequest
+from .models import PipelineStatus, PullRequest, parse_state
+from .ratelimit import RateBudget, RateLimitExceeded
 
 logger = logging.getLogger(__name__)
 
+_OPERATION_RE = re.compile(r"\s*query\s+(\w+)")
+_LOOKUP_ALIAS_RE = re.compile(r"pr\d+")
+
+# Selected on every query so the budget learns each query's exact cost.
+RATE_LIMIT_FIELDS = """
+  rateLimit {
+    limit
+    cost
+    remaining
+    resetAt
+  }"""
+
+PULL_REQUEST_FIELDS = """
+fragment PullRequestFields on PullRequest {
+  number
+  title
+  url
+  state
+  updatedAt
+  mergeable
+  mergeStateStatus
+  isDraft
+  author {
+    login
+  }
+  repository {
+    nameWithOwner
+  }
+  commits(last: 1) {
+    nodes {
+      commit {
+        id
+        oid
+      }
+    }
+  }
+}
+"""
+
+CHECK_RUN_FIELDS = """
+fragment CheckRunFields on CheckRun {
+  name
+  status
+  conclusion
+  detailsUrl
+}
+"""
+
+CHECK_SUITE_FIELDS = """
+fragment CheckSuiteFields on CheckSuite {
+  id
+  status
+  conclusion
+  checkRuns(first: 10) {
+    pageInfo {
+      hasNextPage
+      endCursor
+    }
+    nodes {
+      ...CheckRunFields
+    }
+  }
+}
+"""
+
+# ``Status.contexts`` is a plain list that GitHub returns in full; only the
+# check suite and check run connections need to be paged.
+COMMIT_PIPELINE_FIELDS = """
+fragment CommitPipelineFields on Commit {
+  status {
+    state
+    contexts {
+      context
+      state
+      targetUrl
+      description
+    }
+  }
+  checkSuites(first: 10) {
+    pageInfo {
+      hasNextPage
+      endCursor
+    }
+    nodes {
+      ...CheckSuiteFields
+    }
+  }
+}
+""" + CHECK_SUITE_FIELDS + CHECK_RUN_FIELDS
+
+# Follow-up pages for truncated suites/runs. Only overflowing connections are
+# requested, so these pages can be larger than the first ones.
+SUITE_PAGE_FIELD = """
+  {alias}: node(id: ${alias}_id) {{
+    ... on Commit {{
+      checkSuites(first: 25, after: ${alias}_after) {{
+        pageInfo {{
+          hasNextPage
+          endCursor
+        }}
+        nodes {{
+          ...CheckSuiteFields
+        }}
+      }}
+    }}
+  }}"""
+
+RUN_PAGE_FIELD = """
+  {alias}: node(id: ${alias}_id) {{
+    ... on CheckSuite {{
+      checkRuns(first: 100, after: ${alias}_after) {{
+        pageInfo {{
+          hasNextPage
+          endCursor
+        }}
+        nodes {{
+          ...CheckRunFields
+        }}
+      }}
+    }}
+  }}"""
+
+# Second phase of a fetch: pipelines for the head commits that are not cached.
+PIPELINE_QUERY = """
+query CommitPipelines($ids: [ID!]!) {""" + RATE_LIMIT_FIELDS + """
+  nodes(ids: $ids) {
+    ... on Commit {
+      id
+      oid
+      ...CommitPipelineFields
+    }
+  }
+}
+""" + COMMIT_PIPELINE_FIELDS
+
 SEARCH_PR_QUERY = """
-query ($query: String!, $cursor: String) {
+query SearchPullRequests($query: String!, $cursor: String) {""" + RATE_LIMIT_FIELDS + """
   search(query: $query, type: ISSUE, first: 20, after: $cursor) {
     issueCount
     pageInfo {
@@ -22,50 +169,44 @@ query ($query: String!, $cursor: String) {
     }
     edges {
       node {
-        ... on PullRequest {
-          number
-          title
-          url
-          updatedAt
-          mergeable
-          mergeStateStatus
-          isDraft
-          author {
-            login
-          }
-          repository {
-            nameWithOwner
-          }
-          commits(last: 1) {
-            nodes {
-              commit {
-                oid
-                status {
-                  state
-                  contexts {
-                    context
-                    state
-                    targetUrl
-                    description
-                  }
-                }
-                checkSuites(first: 10) {
-                  nodes {
-                    status
-                    conclusion
-                    checkRuns(first: 10) {
-                      nodes {
-                        name
-                        status
-                        conclusion
-                        detailsUrl
-                      }
-                    }
-                  }
-                }
-              }
-            }
-          }
+        ...PullRequestFields
+      }
+    }
+  }
+}
+""" + PULL_REQUEST_FIELDS
+
+# Selection shared by every aliased ``search`` field of a multi-target query.
+MULTI_SEARCH_FIELD = """
+  {alias}: search(query: ${alias}_query, type: ISSUE, first: 20, after: ${alias}_cursor) {{
+    issueCount
+    pageInfo {{
+      hasNextPage
+      endCursor
+    }}
+    edges {{
+      node {{
+        ...PullRequestFields
+      }}
+    }}
+  }}"""
+
+# Reconciliation only needs to know which PRs are still open and when they
+# last changed, so it skips the commit/status/check trees entirely.
+LIST_PR_QUERY = """
+query ListPullRequests($query: String!, $cursor: String) {""" + RATE_LIMIT_FIELDS + """
+  search(query: $query, type: ISSUE, first: 100, after: $cursor) {
+    issueCount
+    pageInfo {
+      hasNextPage
+      endCursor
+    }
+    nodes {
+      ... on PullRequest {
+        number
+        updatedAt
+        repository {
+          nameWithOwner
         }
       }
     }
@@ -73,6 +214,110 @@ query ($query: String!, $cursor: String) {
 }
 """
 
+HEAD_SHA_QUERY = """
+query HeadSha($owner: String!, $name: String!, $number: Int!) {""" + RATE_LIMIT_FIELDS + """
+  repository(owner: $owner, name: $name) {
+    pullRequest(number: $number) {
+      headRefOid
+    }
+  }
+}
+"""
+
+# GitHub search never returns more than this many results for one query
+# string, however far it is paged; larger shards are split further.
+SEARCH_RESULT_CAP = 1000
+
+# Upper bound on aliased ``search`` fields (one per shard) per request.
+SEARCH_SHARDS_PER_REQUEST = 10
+
+# Lower bound for ``created:`` ranges when a shard is split by date.
+SEARCH_EPOCH = datetime(2008, 1, 1, tzinfo=timezone.utc)
+
+# Upper bound on aliased ``repository.pullRequest`` lookups per request.
+PR_LOOKUP_BATCH_SIZE = 20
+
+# Upper bound on commits whose pipelines are requested in one ``nodes`` query.
+PIPELINE_BATCH_SIZE = 20
+
+# Upper bound on aliased suite/run follow-up pages per request.
+CHECK_PAGE_BATCH_SIZE = 20
+
+# Finished pipelines are reused until the PR is updated again (a ``run ...``
+# comment or a push bumps ``updatedAt``). Checks re-run from the CI UI and
+# contexts reported late do not bump it, so entries still expire after this
+# long; the service lowers it to the reconcile interval.
+FINISHED_PIPELINE_TTL_SECONDS = 3600
+PIPELINE_CACHE_MAX_ENTRIES = 5000
+
+# Kept-alive connections beyond max_concurrency, for the poller, request
+# threads and action workers that call the API outside the batch pool.
+EXTRA_POOL_CONNECTIONS = 8
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+PullRequestKey = Tuple[str, int]
+
+
+@dataclass(frozen=True, slots=True)
+class SearchShard:
+    """One search string's share of a target: an author, repo scopes and a ``created`` range.
+
+    A shard whose results would hit ``SEARCH_RESULT_CAP`` is split into one
+    shard per repo scope, and single-scope shards into two halves of their
+    ``created`` range (open-ended shards are bisected up to now).
+    """
+
+    author: str
+    # ``repo:owner/name`` or ``user:owner`` qualifiers; GitHub ORs them.
+    scopes: Tuple[str, ...] = ()
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+
+    def query(self, updated_since: Optional[datetime] = None) -> str:
+        parts = ["is:pr", "is:open", f"author:{self.author}", *self.scopes]
+        if self.created_to is not None:
+            start = self.created_from or SEARCH_EPOCH
+            parts.append(f"created:{_timestamp(start)}..{_timestamp(self.created_to)}")
+        elif self.created_from is not None:
+            parts.append(f"created:>={_timestamp(self.created_from)}")
+        if updated_since is not None:
+            parts.append(f"updated:>={_timestamp(updated_since)}")
+        parts.append("sort:updated-desc")
+        return " ".join(parts)
+
+    def split(self, now: datetime) -> List["SearchShard"]:
+        """Narrower shards covering this one, or none once a range is down to seconds."""
+        if len(self.scopes) > 1:
+            return [replace(self, scopes=(scope,)) for scope in self.scopes]
+        start = self.created_from or SEARCH_EPOCH
+        end = self.created_to or now
+        if end - start < timedelta(seconds=2):
+            return []
+        middle = (start + (end - start) / 2).replace(microsecond=0)
+        return [
+            replace(self, created_from=start, created_to=middle),
+            replace(self, created_from=middle + timedelta(seconds=1)),
+        ]
+
+
+def target_shards(target: TargetConfig) -> List[SearchShard]:
+    """The initial shards of a target: one per author, over all of its repos.
+
+    Repo globs are searched as their owner (``user:apache``) and filtered
+    client-side with ``TargetConfig.matches_repo``.
+    """
+    scopes = [f"repo:{repo}" for repo in target.repos if repo not in target.repo_patterns]
+    scopes.extend(f"user:{pattern.split('/', 1)[0]}" for pattern in target.repo_patterns)
+    return [SearchShard(author, tuple(dict.fromkeys(scopes))) for author in target.authors]
+
+
+@dataclass(slots=True)
+class CachedPipelines:
+    pipelines: List[PipelineStatus]
+    observed_updated_at: datetime
+
 
 class GitHubClient:
     def __init__(self, config: GitHubConfig) -> None:
@@ -90,36 +335,138 @@ class GitHubClient:
                 "User-Agent": "apache-doris-pr-monitor",
             }
         )
+        adapter = HTTPAdapter(pool_maxsize=config.max_concurrency + EXTRA_POOL_CONNECTIONS)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._batches = ThreadPoolExecutor(
+            max_workers=config.max_concurrency, thread_name_prefix="github-batch"
+        )
+        self._counter_lock = threading.Lock()
+        # Keyed by head commit SHA, so PRs shared between targets reuse entries.
+        self.pipeline_cache = TTLCache(max_entries=PIPELINE_CACHE_MAX_ENTRIES)
+        self.finished_pipeline_ttl_seconds = FINISHED_PIPELINE_TTL_SECONDS
+        self.graphql_requests = 0
+        self.budget = RateBudget(reserve=config.rate_limit_reserve)
 
-    def fetch_pull_requests(self, target: TargetConfig, limit: int = 50) -> List[PullRequest]:
-        search_query = self._build_search_query(target)
-        cursor: Optional[str] = None
-        collected: List[PullRequest] = []
-        while len(collected) < limit:
-            payload = self._graphql(SEARCH_PR_QUERY, {"query": search_query, "cursor": cursor})
-            search = payload["data"]["search"]
-            for edge in search["edges"]:
-                node = edge.get("node")
-                if not node:
-                    continue
-                collected.append(self._build_pull_request(node))
-                if len(collected) >= limit:
-                    break
-            if not search["pageInfo"]["hasNextPage"]:
-                break
-            cursor = search["pageInfo"]["endCursor"]
-        return collected
+    def fetch_pull_requests(
+        self,
+        target: TargetConfig,
+        limit: Optional[int] = None,
+        updated_since: Optional[datetime] = None,
+    ) -> List[PullRequest]:
+        """Fetch a target's open PRs, most recently updated first.
+
+        Each of the target's search shards is paged on its own, in parallel on
+        the batch pool; ``limit`` (all PRs by default) applies to the merged,
+        deduplicated result.
+        """
+        nodes = self._search_targets(
+            [target], SEARCH_PR_QUERY, limit, {target.label: updated_since} if updated_since else {}
+        )
+        return self._build_pull_requests(nodes[target.label])
+
+    def fetch_many(
+        self,
+        targets: List[TargetConfig],
+        limit: Optional[int] = None,
+        updated_since: Optional[Dict[str, datetime]] = None,
+    ) -> Dict[str, List[PullRequest]]:
+        """Fetch several targets at once, keyed by target label.
+
+        Every search shard of every target gets an aliased ``search`` field,
+        up to ``SEARCH_SHARDS_PER_REQUEST`` per request; each page round only
+        re-sends the aliases that still have pages left, with their own
+        cursors. Pipelines for all targets are then resolved in one shared
+        second phase, so PRs present in several targets cost nothing extra.
+        """
+        collected = self._search_targets(targets, None, limit, updated_since or {})
+        built = iter(self._build_pull_requests([node for nodes in collected.values() for node in nodes]))
+        return {label: [next(built) for _ in nodes] for label, nodes in collected.items()}
+
+    def list_open_pull_requests(
+        self, target: TargetConfig, limit: Optional[int] = None
+    ) -> Dict[PullRequestKey, datetime]:
+        """Return ``updatedAt`` for every open PR of ``target`` without pipeline data."""
+        nodes = self._search_targets([target], LIST_PR_QUERY, limit, {})[target.label]
+        return {
+            (node["repository"]["nameWithOwner"], node["number"]): self._parse_timestamp(node["updatedAt"])
+            for node in nodes
+        }
+
+    def fetch_pull_requests_by_number(
+        self, keys: Iterable[PullRequestKey]
+    ) -> Dict[PullRequestKey, Optional[PullRequest]]:
+        """Fetch specific PRs in batched, aliased lookups.
+
+        PRs that are no longer open (or no longer exist) map to ``None``.
+        GitHub reports a deleted PR or repository as a NOT_FOUND error next
+        to the data for the other aliases, so those errors are tolerated.
+        """
+        keys = list(dict.fromkeys(keys))
+        fetched: Dict[PullRequestKey, Optional[PullRequest]] = {key: None for key in keys}
+        nodes: List[Dict] = []
+        batches = _chunks(keys, PR_LOOKUP_BATCH_SIZE)
+        responses = self._run_batches(
+            lambda batch: self._graphql(
+                *self._build_lookup_query(batch), tolerate=_missing_lookup_alias
+            ),
+            batches,
+        )
+        for batch, payload in zip(batches, responses):
+            data = payload["data"]
+            for index in range(len(batch)):
+                repository = data.get(f"pr{index}") or {}
+                node = repository.get("pullRequest")
+                if node and node.get("state") == "OPEN":
+                    nodes.append(node)
+        for pr in self._build_pull_requests(nodes):
+            fetched[(pr.repo_full_name, pr.number)] = pr
+        return fetched
+
+    def fetch_head_sha(self, repo_full_name: str, pr_number: int) -> Optional[str]:
+        """Current head commit of a PR; counts against the write reserve like the action it serves."""
+        owner, name = repo_full_name.split("/", 1)
+        payload = self._graphql(
+            HEAD_SHA_QUERY,
+            {"owner": owner, "name": name, "number": pr_number},
+            user_triggered=True,
+        )
+        repository = payload["data"].get("repository") or {}
+        return (repository.get("pullRequest") or {}).get("headRefOid")
+
+    def fetch_pipelines(self, commits: Dict[str, str]) -> Dict[str, List[PipelineStatus]]:
+        """Fetch pipelines for ``{commit node id: oid}`` in batched ``nodes`` queries."""
+        ids = list(commits)
+        batches = _chunks(ids, PIPELINE_BATCH_SIZE)
+        fetched: List[Dict] = []
+        for payload in self._run_batches(
+            lambda batch: self._graphql(PIPELINE_QUERY, {"ids": batch}), batches
+        ):
+            fetched.extend(commit for commit in payload["data"]["nodes"] if commit)
+        self._complete_check_pages(fetched)
+        return {commit["oid"]: self._extract_commit_pipelines(commit) for commit in fetched}
+
+    def invalidate_pipelines(self, sha: Optional[str]) -> None:
+        if sha:
+            self.pipeline_cache.invalidate(f"pipelines:{sha}")
 
     def post_comment(self, repo_full_name: str, pr_number: int, body: str) -> Dict:
         owner, repo = repo_full_name.split("/", 1)
         url = f"{self.api_base}/repos/{owner}/{repo}/issues/{pr_number}/comments"
+        self.budget.check_write("core")
         response = self.session.post(url, json={"body": body}, timeout=15)
         self._raise_for_status(response, f"comment on PR #{pr_number}")
         return response.json()
 
+    def close(self) -> None:
+        """Stop the batch pool and drop pooled connections once the client is replaced."""
+        self._batches.shutdown(wait=False)
+        self.session.close()
+
     def update_branch(self, repo_full_name: str, pr_number: int) -> Dict:
         owner, repo = repo_full_name.split("/", 1)
         url = f"{self.api_base}/repos/{owner}/{repo}/pulls/{pr_number}/update-branch"
+        self.budget.check_write("core")
         response = self.session.put(url, timeout=15)
         if response.status_code == 422:
             logger.info("Update branch skipped for %s#%s", repo_full_name, pr_number)
@@ -129,24 +476,66 @@ class GitHubClient:
 
     # Internal helpers -----------------------------------------------------
 
-    def _graphql(self, query: str, variables: Dict) -> Dict:
+    def _graphql(
+        self,
+        query: str,
+        variables: Dict,
+        user_triggered: bool = False,
+        tolerate: Optional[Callable[[Dict], bool]] = None,
+    ) -> Dict:
+        """Run a GraphQL query; background reads stop short of the write reserve.
+
+        Any error in the response raises, except those ``tolerate`` accepts
+        as part of a partial result.
+        """
+        if not user_triggered:
+            self.budget.check_read("graphql")
+        with self._counter_lock:
+            self.graphql_requests += 1
+        operation = _operation_name(query)
+        started = time.perf_counter()
         response = self.session.post(
             self.graphql_url,
             json={"query": query, "variables": variables},
             timeout=20,
         )
+        metrics.GRAPHQL_SECONDS.observe(time.perf_counter() - started, operation=operation)
+        metrics.GRAPHQL_RESPONSE_BYTES.observe(len(response.content), operation=operation)
         self._raise_for_status(response, "GraphQL query")
         payload = response.json()
-        if "errors" in payload:
-            raise RuntimeError(f"GitHub GraphQL errors: {payload['errors']}")
+        errors = [
+            error for error in payload.get("errors") or () if not (tolerate and tolerate(error))
+        ]
+        if errors:
+            raise RuntimeError(f"GitHub GraphQL errors: {errors}")
+        self.budget.record_graphql((payload.get("data") or {}).get("rateLimit"))
         return payload
 
+    def _run_batches(self, run: Callable[[T], R], batches: Sequence[T]) -> List[R]:
+        """Run independent requests on the batch pool, in order; inline when there is only one.
+
+        Callers must not already be on the pool, or nested batches could wait
+        on each other for a free worker.
+        """
+        if len(batches) <= 1 or self.config.max_concurrency == 1:
+            return [run(batch) for batch in batches]
+        return list(self._batches.map(run, batches))
+
     def _raise_for_status(self, response: requests.Response, action: str) -> None:
+        self.budget.record_headers(response.headers)
         if response.status_code == 304:
             return
         if response.ok:
             return
         reset_at = response.headers.get("X-RateLimit-Reset")
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        if response.status_code in (403, 429) and reset_at and remaining == "0":
+            resource = response.headers.get("X-RateLimit-Resource", "core")
+            self.budget.record_exhausted(resource, float(reset_at))
+            raise RateLimitExceeded(
+                f"GitHub rate limit exceeded for {action}; resets at {reset_at}.",
+                reset_at=float(reset_at),
+            )
         if response.status_code == 403 and reset_at:
             raise RuntimeError(
                 f"GitHub rate limit exceeded for {action}; resets at {reset_at}."
@@ -154,68 +543,358 @@ class GitHubClient:
         detail = response.text[:500]
         raise RuntimeError(f"GitHub API error while {action}: {response.status_code} {detail}")
 
+    def _search_targets(
+        self,
+        targets: List[TargetConfig],
+        query: Optional[str],
+        limit: Optional[int],
+        updated_since: Dict[str, datetime],
+    ) -> Dict[str, List[Dict]]:
+        """Page through every search shard of ``targets``; PR nodes by label.
+
+        With a ``query`` each shard is its own request stream, run on the
+        batch pool; without one, shards are aliased into multi-search
+        requests whose batches run on the pool. A shard whose first page
+        reports more than ``SEARCH_RESULT_CAP`` matches is replaced by its
+        splits. Nodes are deduplicated by ``(repo, number)`` per target,
+        filtered by the target's repo globs and ordered by ``updatedAt``.
+        """
+        now = datetime.now(timezone.utc)
+        labels = {target.label: target for target in targets}
+        aliases = count()
+        # (alias, label, shard, cursor) for every shard that still has pages.
+        active = [
+            (f"t{next(aliases)}", target.label, shard, None)
+            for target in targets
+            for shard in target_shards(target)
+        ]
+        found: Dict[str, Dict[PullRequestKey, Dict]] = {label: {} for label in labels}
+        taken: Dict[str, int] = {}
+        pages = 0
+        while active:
+            pages += 1
+            batches = _chunks(active, 1 if query else SEARCH_SHARDS_PER_REQUEST)
+            responses = self._run_batches(
+                lambda batch: self._search_page(batch, query, updated_since), batches
+            )
+            still_active = []
+            for batch, searches in zip(batches, responses):
+                for (alias, label, shard, cursor), search in zip(batch, searches):
+                    if cursor is None and search.get("issueCount", 0) > SEARCH_RESULT_CAP:
+                        splits = shard.split(now)
+                        if splits:
+                            still_active.extend(
+                                (f"t{next(aliases)}", label, split, None) for split in splits
+                            )
+                            continue
+                        logger.warning(
+                            "Search %r matches %s PRs; only %s are reachable",
+                            shard.query(),
+                            search["issueCount"],
+                            SEARCH_RESULT_CAP,
+                        )
+                    nodes = (
+                        [edge.get("node") for edge in search["edges"]]
+                        if "edges" in search
+                        else search["nodes"]
+                    )
+                    for node in nodes:
+                        if not node or (limit is not None and taken.get(alias, 0) >= limit):
+                            continue
+                        taken[alias] = taken.get(alias, 0) + 1
+                        key = (node["repository"]["nameWithOwner"], node["number"])
+                        found[label].setdefault(key, node)
+                    if search["pageInfo"]["hasNextPage"] and (limit is None or taken.get(alias, 0) < limit):
+                        still_active.append((alias, label, shard, search["pageInfo"]["endCursor"]))
+            active = still_active
+        metrics.PAGES_PER_FETCH.observe(
+            pages, operation=_operation_name(query) if query else "MultiSearchPullRequests"
+        )
+        collected: Dict[str, List[Dict]] = {}
+        for label, nodes in found.items():
+            target = labels[label]
+            kept = [
+                node
+                for node in nodes.values()
+                if target.matches_repo(node["repository"]["nameWithOwner"])
+            ]
+            # Shards are each sorted by update time; ISO timestamps sort as strings.
+            kept.sort(key=lambda node: node["updatedAt"], reverse=True)
+            collected[label] = kept if limit is None else kept[:limit]
+        return collected
+
+    def _search_page(
+        self,
+        batch: List[Tuple[str, str, SearchShard, Optional[str]]],
+        query: Optional[str],
+        updated_since: Dict[str, datetime],
+    ) -> List[Dict]:
+        """One page of each shard in ``batch``, in order."""
+        if query:
+            _, label, shard, cursor = batch[0]
+            variables = {"query": shard.query(updated_since.get(label)), "cursor": cursor}
+            return [self._graphql(query, variables)["data"]["search"]]
+        multi_query, variables = self._build_multi_search_query(
+            {
+                alias: (shard.query(updated_since.get(label)), cursor)
+                for alias, label, shard, cursor in batch
+            }
+        )
+        data = self._graphql(multi_query, variables)["data"]
+        return [data[alias] for alias, _, _, _ in batch]
+
     @staticmethod
-    def _build_search_query(target: TargetConfig) -> str:
-        parts = ["is:pr", "is:open", f"author:{target.user}"]
-        if target.repos:
-            parts.extend([f"repo:{repo}" for repo in target.repos])
-        return " ".join(parts)
+    def _build_multi_search_query(
+        searches: Dict[str, Tuple[str, Optional[str]]]
+    ) -> Tuple[str, Dict]:
+        declarations: List[str] = []
+        fields: List[str] = []
+        variables: Dict = {}
+        for alias, (search_query, cursor) in searches.items():
+            declarations.append(f"${alias}_query: String!, ${alias}_cursor: String")
+            fields.append(MULTI_SEARCH_FIELD.format(alias=alias))
+            variables.update({f"{alias}_query": search_query, f"{alias}_cursor": cursor})
+        query = (
+            f"query MultiSearchPullRequests({', '.join(declarations)}) {{"
+            + RATE_LIMIT_FIELDS
+            + "".join(fields)
+            + "\n}\n"
+        )
+        return query + PULL_REQUEST_FIELDS, variables
 
-    def _build_pull_request(self, node: Dict) -> PullRequest:
-        updated_at = datetime.fromisoformat(node["updatedAt"].replace("Z", "+00:00"))
+    def _complete_check_pages(self, commits: List[Dict]) -> None:
+        """Follow truncated ``checkSuites``/``checkRuns`` connections in place.
+
+        Each round requests the next page of every connection that reported
+        ``hasNextPage``, across all commits, as aliases of one query; suites
+        arriving on a follow-up page join the next round if their runs are
+        truncated too. Untruncated commits cost nothing extra.
+        """
+        suites_pending: List[Tuple[Dict, str, str]] = []
+        runs_pending: List[Tuple[Dict, str, str]] = []
+        for commit in commits:
+            connection = commit.get("checkSuites") or {}
+            cursor = self._next_cursor(connection)
+            if cursor and commit.get("id"):
+                suites_pending.append((connection, commit["id"], cursor))
+            for suite in connection.get("nodes") or []:
+                self._queue_run_page(suite, runs_pending)
+        while suites_pending or runs_pending:
+            round_suites = suites_pending[:CHECK_PAGE_BATCH_SIZE]
+            round_runs = runs_pending[: CHECK_PAGE_BATCH_SIZE - len(round_suites)]
+            suites_pending = suites_pending[len(round_suites) :]
+            runs_pending = runs_pending[len(round_runs) :]
+            query, variables = self._build_check_page_query(
+                [(node_id, after) for _, node_id, after in round_suites],
+                [(node_id, after) for _, node_id, after in round_runs],
+            )
+            data = self._graphql(query, variables)["data"]
+            for index, (connection, node_id, _) in enumerate(round_suites):
+                page = (data.get(f"s{index}") or {}).get("checkSuites") or {}
+                connection.setdefault("nodes", []).extend(page.get("nodes") or [])
+                for suite in page.get("nodes") or []:
+                    self._queue_run_page(suite, runs_pending)
+                cursor = self._next_cursor(page)
+                if cursor:
+                    suites_pending.append((connection, node_id, cursor))
+            for index, (connection, node_id, _) in enumerate(round_runs):
+                page = (data.get(f"r{index}") or {}).get("checkRuns") or {}
+                connection.setdefault("nodes", []).extend(page.get("nodes") or [])
+                cursor = self._next_cursor(page)
+                if cursor:
+                    runs_pending.append((connection, node_id, cursor))
+
+    @classmethod
+    def _queue_run_page(cls, suite: Dict, pending: List[Tuple[Dict, str, str]]) -> None:
+        if not suite:
+            return
+        connection = suite.get("checkRuns") or {}
+        cursor = cls._next_cursor(connection)
+        if cursor and suite.get("id"):
+            pending.append((connection, suite["id"], cursor))
+
+    @staticmethod
+    def _next_cursor(connection: Dict) -> Optional[str]:
+        page_info = connection.get("pageInfo") or {}
+        if page_info.get("hasNextPage"):
+            return page_info.get("endCursor")
+        return None
+
+    @staticmethod
+    def _build_check_page_query(
+        suites: List[Tuple[str, str]], runs: List[Tuple[str, str]]
+    ) -> Tuple[str, Dict]:
+        declarations: List[str] = []
+        fields: List[str] = []
+        variables: Dict = {}
+        for prefix, pages, template in (("s", suites, SUITE_PAGE_FIELD), ("r", runs, RUN_PAGE_FIELD)):
+            for index, (node_id, after) in enumerate(pages):
+                alias = f"{prefix}{index}"
+                declarations.append(f"${alias}_id: ID!, ${alias}_after: String")
+                fields.append(template.format(alias=alias))
+                variables.update({f"{alias}_id": node_id, f"{alias}_after": after})
+        query = (
+            f"query CheckPages({', '.join(declarations)}) {{"
+            + RATE_LIMIT_FIELDS
+            + "".join(fields)
+            + "\n}\n"
+        )
+        # GraphQL rejects unused fragments, so only attach the ones referenced.
+        if suites:
+            query += CHECK_SUITE_FIELDS
+        return query + CHECK_RUN_FIELDS, variables
+
+    @staticmethod
+    def _build_lookup_query(keys: List[PullRequestKey]) -> Tuple[str, Dict]:
+        declarations: List[str] = []
+        fields: List[str] = []
+        variables: Dict = {}
+        for index, (repo_full_name, number) in enumerate(keys):
+            owner, name = repo_full_name.split("/", 1)
+            declarations.append(f"$owner{index}: String!, $name{index}: String!, $number{index}: Int!")
+            fields.append(
+                f"  pr{index}: repository(owner: $owner{index}, name: $name{index}) {{\n"
+                f"    pullRequest(number: $number{index}) {{ ...PullRequestFields }}\n"
+                "  }"
+            )
+            variables.update({f"owner{index}": owner, f"name{index}": name, f"number{index}": number})
+        query = (
+            f"query LookupPullRequests({', '.join(declarations)}) {{"
+            + RATE_LIMIT_FIELDS
+            + "\n"
+            + "\n".join(fields)
+            + "\n}\n"
+        )
+        return query + PULL_REQUEST_FIELDS, variables
+
+    @staticmethod
+    def _parse_timestamp(value: str) -> datetime:
+        return _parse_timestamp(value)
+
+    def _build_pull_requests(self, nodes: List[Dict]) -> List[PullRequest]:
+        """Attach pipelines to listed PR nodes, querying only uncached head commits."""
+        resolved: Dict[str, List[PipelineStatus]] = {}
+        missing: Dict[str, str] = {}
+        for node in nodes:
+            commit = self._head_commit(node)
+            sha = commit.get("oid")
+            if not sha or sha in resolved:
+                continue
+            cached = self.pipeline_cache.get(f"pipelines:{sha}")
+            updated_at = self._parse_timestamp(node["updatedAt"])
+            if cached is not None and cached.observed_updated_at >= updated_at:
+                resolved[sha] = cached.pipelines
+            elif commit.get("id"):
+                missing[commit["id"]] = sha
+        if missing:
+            fetched = self.fetch_pipelines(missing)
+            resolved.update(fetched)
+            for node in nodes:
+                sha = self._head_commit(node).get("oid")
+                if sha in fetched and self._pipelines_finished(fetched[sha]):
+                    self.pipeline_cache.set(
+                        f"pipelines:{sha}",
+                        CachedPipelines(
+                            pipelines=fetched[sha],
+                            observed_updated_at=self._parse_timestamp(node["updatedAt"]),
+                        ),
+                        ttl_seconds=self.finished_pipeline_ttl_seconds,
+                    )
+        return [
+            self._build_pull_request(node, resolved.get(self._head_commit(node).get("oid"), []))
+            for node in nodes
+        ]
+
+    @staticmethod
+    def _head_commit(node: Dict) -> Dict:
+        commit_nodes = (node.get("commits") or {}).get("nodes") or []
+        if not commit_nodes:
+            return {}
+        return commit_nodes[-1].get("commit") or {}
+
+    @staticmethod
+    def _pipelines_finished(pipelines: List[PipelineStatus]) -> bool:
+        # A commit without any pipelines yet will almost certainly get some.
+        if not pipelines:
+            return False
+        return not any(p.is_running for p in pipelines)
+
+    def _build_pull_request(
+        self, node: Dict, pipelines: Optional[List[PipelineStatus]] = None
+    ) -> PullRequest:
+        with metrics.BUILD_PULL_REQUEST_SECONDS.time():
+            return self._parse_pull_request(node, pipelines)
+
+    def _parse_pull_request(
+        self, node: Dict, pipelines: Optional[List[PipelineStatus]]
+    ) -> PullRequest:
+        updated_at = self._parse_timestamp(node["updatedAt"])
         merge_state_status = (node.get("mergeStateStatus") or "UNKNOWN").lower()
-        mergeable = (node.get("mergeable") or "UNKNOWN").upper() == "MERGEABLE"
-        repo_full_name = node["repository"]["nameWithOwner"]
-        pipelines = self._extract_pipelines(node)
+        mergeable_value = (node.get("mergeable") or "UNKNOWN").upper()
+        mergeable = mergeable_value == "MERGEABLE"
+        if pipelines is None:
+            pipelines = self._extract_pipelines(node)
         return PullRequest(
             number=node["number"],
             title=node["title"],
             url=node["url"],
-            repo_full_name=repo_full_name,
-            author=node.get("author", {}).get("login", "unknown"),
+            repo_full_name=sys.intern(node["repository"]["nameWithOwner"]),
+            author=sys.intern(node.get("author", {}).get("login", "unknown")),
             updated_at=updated_at,
-            mergeable_state=node.get("mergeStateStatus", "UNKNOWN"),
+            mergeable_state=sys.intern(node.get("mergeStateStatus", "UNKNOWN")),
             mergeable=mergeable,
-            has_conflicts=node.get("mergeable", "").upper() == "CONFLICTING",
+            has_conflicts=mergeable_value == "CONFLICTING",
             update_branch_available=mergeable and merge_state_status in {"behind", "unstable"},
             status_badge=self._status_badge(node),
             pipelines=pipelines,
+            head_sha=self._head_commit(node).get("oid"),
         )
 
     @staticmethod
     def _status_badge(node: Dict) -> str:
         if node.get("isDraft"):
             return "Draft"
-        merge_state_status = (node.get("mergeStateStatus") or "unknown").replace("_", " ")
-        return merge_state_status.title()
+        return _status_title(node.get("mergeStateStatus") or "unknown")
 
     def _extract_pipelines(self, node: Dict) -> List[PipelineStatus]:
-        pipelines: Dict[str, PipelineStatus] = {}
         commit_nodes = node.get("commits", {}).get("nodes", [])
         if not commit_nodes:
             return []
-        commit = commit_nodes[-1].get("commit", {})
+        return self._extract_commit_pipelines(commit_nodes[-1].get("commit", {}))
+
+    def _extract_commit_pipelines(self, commit: Dict) -> List[PipelineStatus]:
+        with metrics.EXTRACT_PIPELINES_SECONDS.time():
+            return self._parse_commit_pipelines(commit)
+
+    def _parse_commit_pipelines(self, commit: Dict) -> List[PipelineStatus]:
+        # Names, states and conclusions repeat across every commit, so they are
+        # interned (states become PipelineState members) instead of kept as
+        # fresh strings from each response.
+        pipelines: Dict[str, PipelineStatus] = {}
         status_contexts = commit.get("status", {}) or {}
         for context in status_contexts.get("contexts", []) or []:
+            name = sys.intern(context.get("context", "Unknown"))
+            state = context.get("state")
             pipeline = PipelineStatus(
-                name=context.get("context", "Unknown"),
-                state=context.get("state", "unknown").lower(),
-                conclusion=context.get("state"),
+                name=name,
+                state=parse_state(state or "unknown"),
+                conclusion=sys.intern(state) if state is not None else None,
                 target_url=context.get("targetUrl"),
                 description=context.get("description"),
-                suggested_command=guess_command(context.get("context")),
+                suggested_command=guess_command(name),
                 context_source="status",
             )
-            pipelines[pipeline.name] = pipeline
-        for suite in commit.get("checkSuites", {}).get("nodes", []) or []:
+            pipelines[name] = pipeline
+        for suite in (commit.get("checkSuites") or {}).get("nodes", []) or []:
             for run in suite.get("checkRuns", {}).get("nodes", []) or []:
-                name = run.get("name", "Unnamed Check")
+                name = sys.intern(run.get("name", "Unnamed Check"))
+                conclusion = run.get("conclusion")
                 pipeline = PipelineStatus(
                     name=name,
-                    state=(run.get("status") or "unknown").lower(),
-                    conclusion=(run.get("conclusion") or "").lower() or None,
+                    state=parse_state(run.get("status")),
+                    conclusion=parse_state(conclusion) if conclusion else None,
                     target_url=run.get("detailsUrl"),
-                    description=run.get("conclusion"),
+                    description=sys.intern(conclusion) if conclusion is not None else None,
                     suggested_command=guess_command(name),
                     context_source="check",
                 )
@@ -223,3 +902,32 @@ class GitHubClient:
                 if not existing or pipeline.is_problematic:
                     pipelines[name] = pipeline
         return list(pipelines.values())
+
+
+def _operation_name(query: str) -> str:
+    match = _OPERATION_RE.match(query)
+    return match.group(1) if match else "anonymous"
+
+
+def _missing_lookup_alias(error: Dict) -> bool:
+    path = error.get("path") or [None]
+    return error.get("type") == "NOT_FOUND" and bool(_LOOKUP_ALIAS_RE.fullmatch(str(path[0])))
+
+
+def _chunks(items: List[T], size: int) -> List[List[T]]:
+    return [items[start : start + size] for start in range(0, len(items), size)]
+
+
+@lru_cache(maxsize=8192)
+def _parse_timestamp(value: str) -> datetime:
+    # The same updatedAt strings come back on every poll of an unchanged PR.
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+@lru_cache(maxsize=256)
+def _status_title(merge_state: str) -> str:
+    return sys.intern(merge_state.replace("_", " ").title())
+
+
+def _timestamp(value: datetime) -> str:
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, List, Optional, Set, Tuple, Union
+
+from .config import ActionsConfig
+from .store import SnapshotStore
+
+logger = logging.getLogger(__name__)
+
+JOB_RETENTION_SECONDS = 3600
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    key: str
+    repo_full_name: str
+    pr_number: int
+    status: str = "queued"
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[Dict] = None
+    error: Optional[str] = None
+    # Human-readable stage of a running multi-step action.
+    progress: Optional[str] = None
+    # Requests merged into this job while it was queued or running.
+    merged: int = 0
+
+    @property
+    def done(self) -> bool:
+        return self.status in {"succeeded", "failed"}
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+@dataclass(slots=True)
+class Deferred:
+    """Returned by an action to give its worker back and continue later.
+
+    ``resume`` runs on the pool after ``delay`` seconds, or as soon as the
+    job is passed to ``JobQueue.wake``; it may return another ``Deferred``.
+    """
+
+    delay: float
+    resume: Callable[[Job], Union[Dict, "Deferred"]]
+    progress: Optional[str] = None
+
+
+Action = Callable[[Job], Union[Dict, Deferred]]
+
+
+class TokenBucket:
+    """Allows ``capacity`` immediate actions, refilled at ``rate_per_second``."""
+
+    def __init__(self, rate_per_second: float, capacity: int) -> None:
+        self.rate_per_second = rate_per_second
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token and return how long the caller must wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated_at) * self.rate_per_second
+            )
+            self._updated_at = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate_per_second
+
+
+class JobQueue:
+    """Runs rerun/rebase actions on a bounded worker pool.
+
+    Submitting returns a ``Job`` immediately; its progress is written to the
+    snapshot store so any worker can answer status polls. A job whose key
+    matches one that is still queued or running in this process is merged
+    into it rather than queued twice, and each repository draws from its own
+    token bucket so a burst of clicks is spread out instead of tripping
+    GitHub's secondary rate limits. A throttled job waits on a timer rather
+    than in a worker, so one busy repository never holds up the others, and
+    an action that has to wait for GitHub returns a ``Deferred`` so it is
+    parked in the same way (status ``waiting``) until it is due or woken.
+    """
+
+    def __init__(self, config: ActionsConfig, store: SnapshotStore) -> None:
+        self.config = config
+        self.store = store
+        self._executor = ThreadPoolExecutor(
+            max_workers=config.max_workers, thread_name_prefix="pr-action"
+        )
+        self._active: Dict[str, Job] = {}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._timers: Set[threading.Timer] = set()
+        self._waiting: Dict[str, Tuple[threading.Timer, Deferred]] = {}
+        self._woken: Set[str] = set()
+        self._lock = threading.Lock()
+        self._finished = threading.Condition(self._lock)
+
+    def submit(
+        self,
+        kind: str,
+        key: str,
+        repo_full_name: str,
+        pr_number: int,
+        action: Action,
+    ) -> Job:
+        with self._lock:
+            existing = self._active.get(key)
+            if existing is not None:
+                existing.merged += 1
+                self._save(existing)
+                return existing
+            job = Job(
+                id=uuid.uuid4().hex,
+                kind=kind,
+                key=key,
+                repo_full_name=repo_full_name,
+                pr_number=pr_number,
+            )
+            self._active[key] = job
+            self._save(job)
+        delay = self._bucket(repo_full_name).reserve()
+        if delay:
+            self.update(job, progress=f"throttled for {delay:.1f}s")
+        self._schedule(delay, self._run, job, action)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        data = self.store.load_job(job_id)
+        return Job(**data) if data else None
+
+    def wait(self, jobs: List[Job], timeout: float) -> List[Job]:
+        """Block until ``jobs`` finish or ``timeout`` passes; returns their latest state."""
+        deadline = time.monotonic() + timeout
+        with self._finished:
+            while not all(job.done for job in jobs):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._finished.wait(remaining)
+        return jobs
+
+    def wake(self, job: Job) -> None:
+        """Resume a waiting job now; a job still running resumes as soon as it defers."""
+        with self._lock:
+            entry = self._waiting.get(job.id)
+            if entry is None:
+                if not job.done:
+                    self._woken.add(job.id)
+                return
+        entry[0].cancel()
+        self._resume(job, entry)
+
+    def update(self, job: Job, **changes) -> None:
+        """Record intermediate progress of a running job."""
+        for name, value in changes.items():
+            setattr(job, name, value)
+        self._save(job)
+
+    def shutdown(self, wait: bool = True, cancel_pending: bool = False) -> None:
+        if cancel_pending:
+            with self._lock:
+                timers, self._timers = self._timers, set()
+                timers.update(timer for timer, _ in self._waiting.values())
+                self._waiting.clear()
+            for timer in timers:
+                timer.cancel()
+        self._executor.shutdown(wait=wait, cancel_futures=cancel_pending)
+
+    # Internal helpers -----------------------------------------------------
+
+    def _schedule(self, delay: float, run: Callable, *args) -> None:
+        """Hand ``run`` to the pool after ``delay`` seconds without occupying a worker meanwhile."""
+        if delay <= 0:
+            self._executor.submit(run, *args)
+            return
+
+        def fire() -> None:
+            with self._lock:
+                self._timers.discard(timer)
+            self._executor.submit(run, *args)
+
+        timer = threading.Timer(delay, fire)
+        timer.daemon = True
+        with self._lock:
+            self._timers.add(timer)
+        timer.start()
+
+    def _run(self, job: Job, action: Action) -> None:
+        self.update(job, status="running", started_at=time.time(), progress=None)
+        self._step(job, action)
+
+    def _step(self, job: Job, action: Action) -> None:
+        try:
+            result = action(job)
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.warning("Action %s for %s#%s failed: %s", job.kind, job.repo_full_name, job.pr_number, exc)
+            self._finish(job, status="failed", error=str(exc))
+            return
+        if not isinstance(result, Deferred):
+            self._finish(job, status="succeeded", result=result)
+            return
+        self.update(job, status="waiting", progress=result.progress or job.progress)
+        with self._lock:
+            delay = 0.0 if job.id in self._woken else result.delay
+            self._woken.discard(job.id)
+            timer = threading.Timer(delay, lambda: self._resume(job, entry))
+            timer.daemon = True
+            entry = (timer, result)
+            self._waiting[job.id] = entry
+        timer.start()
+
+    def _resume(self, job: Job, entry: Tuple[threading.Timer, Deferred]) -> None:
+        with self._lock:
+            # A wake and the timer may both fire; only the first resumes this wait.
+            if self._waiting.get(job.id) is not entry:
+                return
+            del self._waiting[job.id]
+        self.update(job, status="running")
+        self._executor.submit(self._step, job, entry[1].resume)
+
+    def _finish(self, job: Job, **changes) -> None:
+        self.update(job, finished_at=time.time(), **changes)
+        with self._finished:
+            self._active.pop(job.key, None)
+            self._woken.discard(job.id)
+            self._finished.notify_all()
+
+    def _bucket(self, repo_full_name: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._buckets.get(repo_full_name)
+            if bucket is None:
+                bucket = TokenBucket(
+                    rate_per_second=self.config.per_repo_per_minute / 60,
+                    capacity=self.config.per_repo_burst,
+                )
+                self._buckets[repo_full_name] = bucket
+            return bucket
+
+    def _save(self, job: Job) -> None:
+        self.store.save_job(job.id, job.to_dict(), ttl_seconds=JOB_RETENTION_SECONDS)
@@ -1,6 +1,10 @@
 from __future__ import annotations
 
-from typing import List, Optional
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Pattern, Tuple
+
+from .config import CommandsConfig
 
 PIPELINE_KEYWORDS = {
     "compile": "run compile",
@@ -35,12 +39,125 @@ COMMAND_CHOICES: List[str] = [
     "run buildall",
 ]
 
+# Distinct pipeline names remembered per matcher before the memo is reset.
+MATCH_CACHE_MAX_ENTRIES = 4096
 
-def guess_command(name: Optional[str]) -> Optional[str]:
-    if not name:
+
+@dataclass(frozen=True, slots=True)
+class CommandRule:
+    pattern: str
+    command: str
+    regex: bool = False
+    priority: int = 0
+
+
+DEFAULT_RULES: List[CommandRule] = [
+    CommandRule(keyword, command) for keyword, command in PIPELINE_KEYWORDS.items()
+]
+
+
+class CommandMatcher:
+    """Maps pipeline names to trigger commands using precompiled rules.
+
+    Plain rules match as case-insensitive substrings, regex rules with
+    ``re.search`` (anchor them with ``^``/``$`` as needed). Of the rules that
+    match, the highest priority wins, then the longest matched text, then
+    the earliest rule, so ``cloud_p0`` beats ``p0`` whatever the order.
+    """
+
+    def __init__(
+        self, rules: Iterable[CommandRule], max_cache_entries: int = MATCH_CACHE_MAX_ENTRIES
+    ) -> None:
+        self.rules = list(rules)
+        self.max_cache_entries = max_cache_entries
+        tiers: Dict[int, List[Tuple[int, CommandRule]]] = {}
+        for index, rule in enumerate(self.rules):
+            tiers.setdefault(rule.priority, []).append((index, rule))
+        self._tiers = [_Tier(tiers[priority]) for priority in sorted(tiers, reverse=True)]
+        self._memo: Dict[str, Optional[str]] = {}
+
+    def match(self, name: Optional[str]) -> Optional[str]:
+        if not name:
+            return None
+        try:
+            return self._memo[name]
+        except KeyError:
+            pass
+        command = self._resolve(name)
+        if len(self._memo) >= self.max_cache_entries:
+            self._memo.clear()
+        self._memo[name] = command
+        return command
+
+    def commands(self) -> List[str]:
+        return list(dict.fromkeys(rule.command for rule in self.rules))
+
+    def _resolve(self, name: str) -> Optional[str]:
+        for tier in self._tiers:
+            command = tier.best(name)
+            if command is not None:
+                return command
         return None
-    lowered = name.lower()
-    for keyword, command in PIPELINE_KEYWORDS.items():
-        if keyword in lowered:
-            return command
-    return None
+
+
+class _Tier:
+    """The rules of one priority, with plain keywords pre-sorted longest first.
+
+    The first keyword found in the lowercased name is therefore the best
+    plain match, and only regex rules still have to be tried after it.
+    """
+
+    def __init__(self, rules: List[Tuple[int, CommandRule]]) -> None:
+        keywords: Dict[str, Tuple[int, str]] = {}
+        self._regexes: List[Tuple[int, Pattern[str], str]] = []
+        for index, rule in rules:
+            if rule.regex:
+                self._regexes.append((index, re.compile(rule.pattern, re.IGNORECASE), rule.command))
+            else:
+                keywords.setdefault(rule.pattern.lower(), (index, rule.command))
+        self._keywords = sorted(
+            ((keyword, index, command) for keyword, (index, command) in keywords.items()),
+            key=lambda item: (-len(item[0]), item[1]),
+        )
+
+    def best(self, name: str) -> Optional[str]:
+        # Ranked by matched length, then by the earlier rule.
+        best: Tuple[int, int] = (-1, 0)
+        command: Optional[str] = None
+        lowered = name.lower()
+        for keyword, index, candidate in self._keywords:
+            if keyword in lowered:
+                best, command = (len(keyword), -index), candidate
+                break
+        for index, pattern, candidate in self._regexes:
+            found = pattern.search(name)
+            if found is not None and (len(found.group(0)), -index) > best:
+                best, command = (len(found.group(0)), -index), candidate
+        return command
+
+
+def build_matcher(config: CommandsConfig) -> CommandMatcher:
+    rules = [
+        CommandRule(rule.pattern, rule.command, rule.regex, rule.priority) for rule in config.rules
+    ]
+    if config.include_defaults:
+        rules.extend(DEFAULT_RULES)
+    return CommandMatcher(rules)
+
+
+_matcher = CommandMatcher(DEFAULT_RULES)
+
+
+def install_matcher(matcher: CommandMatcher) -> None:
+    """Make ``guess_command`` use ``matcher``; called once the config is loaded."""
+    global _matcher  # pylint: disable=global-statement
+    _matcher = matcher
+
+
+def command_choices() -> List[str]:
+    """The built-in commands followed by any the configured rules add."""
+    return list(dict.fromkeys(COMMAND_CHOICES + _matcher.commands()))
+
+
+def guess_command(name: Optional[str]) -> Optional[str]:
+    return _matcher.match(name)
@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from .service import PullRequestService
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+BYTE_BUCKETS: Tuple[float, ...] = tuple(float(1024 * 4**power) for power in range(8))
+PAGE_BUCKETS: Tuple[float, ...] = (1, 2, 3, 5, 8, 13, 21)
+
+LabelValues = Tuple[str, ...]
+
+
+class Histogram:
+    """A Prometheus histogram with optional labels, safe to observe from any thread."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        labelnames: Sequence[str] = (),
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self.labelnames = tuple(labelnames)
+        # Per label set: [count per bucket (+Inf last), sum].
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {key: (list(counts), total[0]) for key, (counts, total) in self._series.items()}
+        for key, (counts, total) in sorted(series.items()):
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': le})} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._histograms: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        labelnames: Sequence[str] = (),
+    ) -> Histogram:
+        with self._lock:
+            if name not in self._histograms:
+                self._histograms[name] = Histogram(name, documentation, buckets, labelnames)
+            return self._histograms[name]
+
+    def render(self) -> str:
+        with self._lock:
+            histograms = list(self._histograms.values())
+        return "\n".join(line for histogram in histograms for line in histogram.render()) + "\n"
+
+
+def render_samples(
+    name: str,
+    documentation: str,
+    metric_type: str,
+    samples: Mapping[Tuple[Tuple[str, str], ...], float],
+) -> str:
+    """Render counters or gauges read at scrape time, keyed by (label, value) pairs."""
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} {metric_type}"]
+    for labels, value in sorted(samples.items()):
+        lines.append(f"{name}{_format_labels(dict(labels))} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def render_service_metrics(
+    service: "PullRequestService", extra_caches: Optional[Mapping[str, Dict[str, int]]] = None
+) -> str:
+    """Counters and gauges the service already keeps, read at scrape time."""
+    caches = {**service.cache_stats(), **(extra_caches or {})}
+    fetches = service.fetch_stats()
+    budgets = service.client.budget.stats()
+    parts = [
+        render_samples(
+            f"pr_monitor_cache_{counter}_total",
+            f"Cache {counter} per in-process cache.",
+            "counter",
+            {(("cache", name),): stats[counter] for name, stats in caches.items()},
+        )
+        for counter in ("hits", "misses", "evictions", "expirations")
+    ]
+    parts.append(
+        render_samples(
+            "pr_monitor_cache_entries",
+            "Entries held per in-process cache.",
+            "gauge",
+            {(("cache", name),): stats["size"] for name, stats in caches.items()},
+        )
+    )
+    parts.append(
+        render_samples(
+            "pr_monitor_fetches_total",
+            "Snapshot fetches issued to GitHub versus callers coalesced onto one.",
+            "counter",
+            {(("result", result),): fetches[result] for result in ("issued", "coalesced")},
+        )
+    )
+    parts.append(
+        render_samples(
+            "pr_monitor_github_graphql_requests_total",
+            "GraphQL requests sent to GitHub.",
+            "counter",
+            {(): service.client.graphql_requests},
+        )
+    )
+    for field in ("remaining", "limit"):
+        parts.append(
+            render_samples(
+                f"pr_monitor_github_rate_limit_{field}",
+                f"Last reported GitHub rate limit {field} per resource.",
+                "gauge",
+                {(("resource", resource),): budget[field] for resource, budget in budgets.items()},
+            )
+        )
+    return "".join(parts)
+
+
+def _format_labels(labels: Mapping[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = (f'{name}="{_escape_label(str(value))}"' for name, value in labels.items())
+    return "{" + ",".join(pairs) + "}"
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+REGISTRY = MetricsRegistry()
+
+GRAPHQL_SECONDS = REGISTRY.histogram(
+    "pr_monitor_github_graphql_seconds",
+    "Round-trip time of GitHub GraphQL requests.",
+    labelnames=("operation",),
+)
+GRAPHQL_RESPONSE_BYTES = REGISTRY.histogram(
+    "pr_monitor_github_graphql_response_bytes",
+    "Size of GitHub GraphQL response bodies.",
+    buckets=BYTE_BUCKETS,
+    labelnames=("operation",),
+)
+PAGES_PER_FETCH = REGISTRY.histogram(
+    "pr_monitor_github_pages_per_fetch",
+    "GraphQL pages requested by one paginated fetch.",
+    buckets=PAGE_BUCKETS,
+    labelnames=("operation",),
+)
+BUILD_PULL_REQUEST_SECONDS = REGISTRY.histogram(
+    "pr_monitor_build_pull_request_seconds",
+    "Time to turn one PR node into a PullRequest.",
+)
+EXTRACT_PIPELINES_SECONDS = REGISTRY.histogram(
+    "pr_monitor_extract_pipelines_seconds",
+    "Time to parse the statuses and check runs of one commit.",
+)
+RENDER_SECONDS = REGISTRY.histogram(
+    "pr_monitor_template_render_seconds",
+    "Time to render a page template.",
+    labelnames=("template",),
+)
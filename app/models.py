@@ -1,8 +1,60 @@
 from __future__ import annotations
 
+import sys
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import List, Optional
+from enum import StrEnum
+from typing import Dict, List, Optional
+
+
+class PipelineState(StrEnum):
+    """States GitHub reports for commit statuses and check runs.
+
+    Members compare, hash and serialize as their lowercase value, so they
+    can stand in anywhere a state string is expected.
+    """
+
+    PENDING = "pending"
+    QUEUED = "queued"
+    IN_PROGRESS = "in_progress"
+    WAITING = "waiting"
+    REQUESTED = "requested"
+    EXPECTED = "expected"
+    COMPLETED = "completed"
+    SUCCESS = "success"
+    FAILURE = "failure"
+    ERROR = "error"
+    UNKNOWN = "unknown"
+
+
+# Pipeline states that mean a run has not finished yet.
+RUNNING_STATES = frozenset(
+    {
+        PipelineState.PENDING,
+        PipelineState.QUEUED,
+        PipelineState.IN_PROGRESS,
+        PipelineState.EXPECTED,
+        PipelineState.WAITING,
+        PipelineState.REQUESTED,
+    }
+)
+
+_STATES: Dict[str, str] = {
+    spelling: state for state in PipelineState for spelling in (state.value, state.value.upper())
+}
+
+
+def parse_state(value: Optional[str]) -> str:
+    """The ``PipelineState`` for a raw GitHub state in either case.
+
+    States GitHub adds later are kept as interned lowercase strings.
+    """
+    if not value:
+        return PipelineState.UNKNOWN
+    state = _STATES.get(value)
+    if state is None:
+        state = _STATES.setdefault(value, sys.intern(value.lower()))
+    return state
 
 
 @dataclass(slots=True)
@@ -14,15 +66,18 @@ class PipelineStatus:
     description: Optional[str]
     suggested_command: Optional[str] = None
     context_source: str = "status"
+    # True when the pipeline is pending or failing; derived once on creation.
+    is_problematic: bool = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        if self.state.lower() in {"pending", "queued", "in_progress"} or self.conclusion is None:
+            self.is_problematic = True
+        else:
+            self.is_problematic = self.conclusion.lower() not in {"success", "neutral", "skipped"}
 
     @property
-    def is_problematic(self) -> bool:
-        """Return True when the pipeline is pending or failing."""
-        if self.state.lower() in {"pending", "queued", "in_progress"}:
-            return True
-        if self.conclusion is None:
-            return True
-        return self.conclusion.lower() not in {"success", "neutral", "skipped"}
+    def is_running(self) -> bool:
+        return self.state in RUNNING_STATES
 
 
 @dataclass(slots=True)
@@ -39,7 +94,24 @@ class PullRequest:
     update_branch_available: bool
     status_badge: str
     pipelines: List[PipelineStatus] = field(default_factory=list)
+    head_sha: Optional[str] = None
+    # Snapshot version in which this PR last changed; stamped on publish.
+    version: int = 0
 
     @property
     def problematic_pipelines(self) -> List[PipelineStatus]:
         return [p for p in self.pipelines if p.is_problematic]
+
+
+@dataclass(slots=True)
+class TargetSnapshot:
+    """The last successfully fetched PR list for a target."""
+
+    pull_requests: List[PullRequest]
+    fetched_at: float
+    expired: bool = False
+    # Bumped on every refresh or webhook update; fetched_at only moves on refreshes.
+    version: int = 0
+
+    def age(self, now: float) -> float:
+        return max(0.0, now - self.fetched_at)
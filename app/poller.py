@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+from .ratelimit import RateLimitExceeded
+from .service import PullRequestService
+
+logger = logging.getLogger(__name__)
+
+# Refresh a target this long before its snapshot turns stale so readers never
+# see it expire while the poller is healthy.
+MAX_REFRESH_LEAD_SECONDS = 30
+
+
+class BackgroundPoller:
+    """Keeps every configured target's snapshot fresh on a daemon thread."""
+
+    def __init__(self, service: PullRequestService) -> None:
+        self.service = service
+        self._retry_at: Dict[str, float] = {}
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="pr-poller", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def wake(self) -> None:
+        """Re-evaluate the schedule immediately, e.g. after a snapshot was expired."""
+        self._wakeup.set()
+
+    def run_once(self) -> float:
+        """Refresh every due target and return the seconds until the next one is due.
+
+        Only the worker holding the poller lease refreshes; the others stand by
+        and re-check the lease, so one poller survives the leader exiting.
+        """
+        # Wake often enough to renew the lease before it lapses.
+        max_wait = self.service.config.storage.lease_seconds / 3
+        if not self.service.is_poller_leader():
+            return max_wait
+        interval = self.service.refresh_interval()
+        labels = [target.label for target in self.service.targets()]
+        due = [label for label in labels if self._due_in(label, interval) <= 0]
+        if due:
+            self._refresh(due)
+            interval = self.service.refresh_interval()
+        next_due = min([self._due_in(label, interval) for label in labels], default=interval)
+        return max(min(next_due, interval, max_wait), 1.0)
+
+    # Internal helpers -----------------------------------------------------
+
+    def _due_in(self, label: str, interval: float) -> float:
+        retry_at = self._retry_at.get(label)
+        if retry_at is not None:
+            return retry_at - time.time()
+        lead_seconds = min(MAX_REFRESH_LEAD_SECONDS, interval / 5)
+        return interval - lead_seconds - self.service.snapshot_age(label)
+
+    def _refresh(self, labels: List[str]) -> None:
+        """Refresh all due targets together so they share batched queries."""
+        try:
+            self.service.refresh_many(labels)
+            for label in labels:
+                self._retry_at.pop(label, None)
+        except RateLimitExceeded as exc:
+            # Keep serving the last snapshots and resume once the budget resets.
+            logger.warning("Background refresh paused: %s", exc)
+            retry_at = exc.reset_at or time.time() + self.service.refresh_interval()
+            for label in labels:
+                self._retry_at[label] = retry_at
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("Background refresh failed for %s", ", ".join(labels))
+            retry_at = time.time() + self.service.refresh_interval()
+            for label in labels:
+                self._retry_at[label] = retry_at
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            wait_seconds = self.run_once()
+            self._wakeup.wait(wait_seconds)
+            self._wakeup.clear()
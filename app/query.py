@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Mapping, Optional, Set, Tuple
+
+from .models import PipelineStatus, PullRequest, TargetSnapshot
+
+DEFAULT_PER_PAGE = 50
+MAX_PER_PAGE = 200
+
+# Sort keys and the direction each one defaults to.
+SORT_KEYS = {"updated": "desc", "number": "desc", "repo": "asc", "failing": "desc"}
+
+_TRUE_VALUES = {"1", "true", "yes", "on"}
+
+
+@dataclass(frozen=True, slots=True)
+class PullRequestQuery:
+    """Filters, sort and page for a target's PR list; filters combine with AND."""
+
+    repo: Optional[str] = None
+    failing: Optional[str] = None
+    conflicts: bool = False
+    update_branch: bool = False
+    problematic: bool = False
+    sort: str = "updated"
+    order: Optional[str] = None
+    page: int = 1
+    # ``None`` returns every match on one page.
+    per_page: Optional[int] = DEFAULT_PER_PAGE
+
+    @classmethod
+    def from_args(
+        cls, args: Mapping[str, str], per_page: Optional[int] = DEFAULT_PER_PAGE
+    ) -> "PullRequestQuery":
+        """Parse request arguments, clamping what is out of range instead of rejecting it."""
+        sort = args.get("sort") or "updated"
+        if sort not in SORT_KEYS:
+            sort = "updated"
+        order = args.get("order")
+        if order not in {"asc", "desc"}:
+            order = None
+        if args.get("per_page"):
+            per_page = min(max(_to_int(args.get("per_page"), DEFAULT_PER_PAGE), 1), MAX_PER_PAGE)
+        return cls(
+            repo=args.get("repo") or None,
+            failing=args.get("failing") or None,
+            conflicts=(args.get("conflicts") or "").lower() in _TRUE_VALUES,
+            update_branch=(args.get("update_branch") or "").lower() in _TRUE_VALUES,
+            problematic=(args.get("problematic") or "").lower() in _TRUE_VALUES,
+            sort=sort,
+            order=order,
+            page=max(_to_int(args.get("page"), 1), 1) if per_page else 1,
+            per_page=per_page,
+        )
+
+    @property
+    def filtered(self) -> bool:
+        return bool(self.repo or self.failing or self.conflicts or self.update_branch or self.problematic)
+
+    @property
+    def descending(self) -> bool:
+        return (self.order or SORT_KEYS[self.sort]) == "desc"
+
+    def to_args(self, **overrides) -> Dict[str, str]:
+        """The non-default parameters, for building links to other pages."""
+        values = {
+            "repo": self.repo,
+            "failing": self.failing,
+            "conflicts": "1" if self.conflicts else None,
+            "update_branch": "1" if self.update_branch else None,
+            "problematic": "1" if self.problematic else None,
+            "sort": self.sort if self.sort != "updated" else None,
+            "order": self.order,
+            "page": self.page if self.page != 1 else None,
+            "per_page": self.per_page if self.per_page != DEFAULT_PER_PAGE else None,
+        }
+        values.update(overrides)
+        return {name: str(value) for name, value in values.items() if value is not None}
+
+
+@dataclass(slots=True)
+class PullRequestPage:
+    pull_requests: List[PullRequest]
+    total: int
+    page: int
+    per_page: Optional[int]
+    # Produces every match across all pages; only built when asked for.
+    _matched: Callable[[], List[PullRequest]] = field(default=list, repr=False)
+
+    @property
+    def pages(self) -> int:
+        if not self.per_page:
+            return 1
+        return max(1, -(-self.total // self.per_page))
+
+    @property
+    def first_index(self) -> int:
+        """1-based position of the first PR on the page, 0 when empty."""
+        if not self.pull_requests:
+            return 0
+        return (self.page - 1) * (self.per_page or 0) + 1
+
+    def matched(self) -> List[PullRequest]:
+        return self._matched()
+
+
+class PullRequestIndex:
+    """Secondary indexes over one immutable snapshot.
+
+    Built once per snapshot version, so a query costs the intersection of the
+    matching index entries plus the page, not a scan and re-sort of every PR.
+    """
+
+    def __init__(self, snapshot: TargetSnapshot) -> None:
+        self.version = snapshot.version
+        self.pull_requests = snapshot.pull_requests
+        self.problematic: List[List[PipelineStatus]] = [
+            pr.problematic_pipelines for pr in self.pull_requests
+        ]
+        self.by_repo: Dict[str, List[int]] = {}
+        self.by_failing: Dict[str, List[int]] = {}
+        self.conflicts: List[int] = []
+        self.update_branch: List[int] = []
+        self.with_problems: List[int] = []
+        for position, pr in enumerate(self.pull_requests):
+            self.by_repo.setdefault(pr.repo_full_name, []).append(position)
+            for pipeline in self.problematic[position]:
+                self.by_failing.setdefault(pipeline.name, []).append(position)
+            if pr.has_conflicts:
+                self.conflicts.append(position)
+            if pr.update_branch_available:
+                self.update_branch.append(position)
+            if self.problematic[position]:
+                self.with_problems.append(position)
+        positions = range(len(self.pull_requests))
+        prs = self.pull_requests
+        # Ascending orders; ties fall back to the snapshot order.
+        self.orders: Dict[str, List[int]] = {
+            "updated": sorted(positions, key=lambda index: (prs[index].updated_at, -index)),
+            "number": sorted(positions, key=lambda index: (prs[index].number, -index)),
+            "repo": sorted(positions, key=lambda index: (prs[index].repo_full_name, -prs[index].number)),
+            "failing": sorted(positions, key=lambda index: (len(self.problematic[index]), -index)),
+        }
+        self.ranks: Dict[str, List[int]] = {}
+        for name, order in self.orders.items():
+            rank = [0] * len(order)
+            for place, position in enumerate(order):
+                rank[position] = place
+            self.ranks[name] = rank
+
+    @property
+    def repos(self) -> List[str]:
+        return sorted(self.by_repo)
+
+    @property
+    def failing_pipelines(self) -> List[str]:
+        return sorted(self.by_failing)
+
+    def query(self, query: PullRequestQuery) -> PullRequestPage:
+        candidates = self._candidates(query)
+        if candidates is None:
+            order = self.orders[query.sort]
+        else:
+            order = sorted(candidates, key=self.ranks[query.sort].__getitem__)
+        total = len(order)
+        start, stop = self._bounds(query, total)
+        descending = query.descending
+        if descending:
+            selected = order[total - stop : total - start][::-1]
+        else:
+            selected = order[start:stop]
+        prs = self.pull_requests
+        return PullRequestPage(
+            pull_requests=[prs[position] for position in selected],
+            total=total,
+            page=query.page,
+            per_page=query.per_page,
+            _matched=lambda: [prs[position] for position in (reversed(order) if descending else order)],
+        )
+
+    @staticmethod
+    def _bounds(query: PullRequestQuery, total: int) -> Tuple[int, int]:
+        if not query.per_page:
+            return 0, total
+        start = min((query.page - 1) * query.per_page, total)
+        return start, min(start + query.per_page, total)
+
+    def _candidates(self, query: PullRequestQuery) -> Optional[Set[int]]:
+        """Positions matching every filter, or ``None`` when nothing is filtered."""
+        postings: List[List[int]] = []
+        if query.repo is not None:
+            postings.append(self.by_repo.get(query.repo, []))
+        if query.failing is not None:
+            postings.append(self.by_failing.get(query.failing, []))
+        if query.conflicts:
+            postings.append(self.conflicts)
+        if query.update_branch:
+            postings.append(self.update_branch)
+        if query.problematic:
+            postings.append(self.with_problems)
+        if not postings:
+            return None
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                break
+        return candidates
+
+
+def _to_int(value: Optional[str], default: int) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Mapping, Optional
+
+
+class RateLimitExceeded(RuntimeError):
+    """Raised instead of calling GitHub when a request would dip into the reserve."""
+
+    def __init__(self, message: str, reset_at: Optional[float] = None) -> None:
+        super().__init__(message)
+        self.reset_at = reset_at
+
+
+@dataclass(slots=True)
+class ResourceBudget:
+    limit: int
+    remaining: int
+    reset_at: float
+
+
+class RateBudget:
+    """Tracks GitHub's remaining rate limit and paces background reads against it.
+
+    Budgets are kept per GitHub resource (``graphql`` points, ``core`` REST
+    requests) from the ``X-RateLimit-*`` headers and the GraphQL ``rateLimit``
+    object. Reads leave ``reserve`` units untouched so user-triggered writes
+    (``post_comment``/``update_branch``) still go through when polling has
+    used up the rest; writes may spend the budget down to zero.
+    """
+
+    def __init__(self, reserve: int) -> None:
+        self.reserve = reserve
+        self._resources: Dict[str, ResourceBudget] = {}
+        self._costs: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.spent = 0
+
+    # Recording --------------------------------------------------------------
+
+    def record_headers(self, headers: Mapping[str, str]) -> None:
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset_at = headers.get("X-RateLimit-Reset")
+        if remaining is None or reset_at is None:
+            return
+        resource = headers.get("X-RateLimit-Resource", "core")
+        limit = int(headers.get("X-RateLimit-Limit", 0) or 0)
+        self._update(resource, limit, int(remaining), float(reset_at))
+
+    def record_graphql(self, rate_limit: Optional[Mapping]) -> int:
+        """Record the GraphQL ``rateLimit`` object and return the query's cost."""
+        if not rate_limit:
+            return 1
+        cost = int(rate_limit.get("cost") or 1)
+        with self._lock:
+            self.spent += cost
+        if rate_limit.get("remaining") is not None and rate_limit.get("resetAt"):
+            reset_at = _parse_reset(rate_limit["resetAt"])
+            limit = int(rate_limit.get("limit") or 0)
+            self._update("graphql", limit, int(rate_limit["remaining"]), reset_at)
+        return cost
+
+    def record_exhausted(self, resource: str, reset_at: float) -> None:
+        self._update(resource, 0, 0, reset_at)
+
+    def record_refresh_cost(self, label: str, cost: float) -> None:
+        """Keep a moving average of what one refresh of ``label`` costs."""
+        with self._lock:
+            previous = self._costs.get(label)
+            self._costs[label] = cost if previous is None else 0.7 * previous + 0.3 * cost
+
+    # Decisions --------------------------------------------------------------
+
+    def check_read(self, resource: str = "graphql", cost: int = 1) -> None:
+        budget = self.snapshot(resource)
+        if budget is None:
+            return
+        if budget.remaining - cost < self.reserve:
+            raise RateLimitExceeded(
+                f"GitHub {resource} budget is down to {budget.remaining}; "
+                f"background reads paused until {_format_reset(budget.reset_at)}.",
+                reset_at=budget.reset_at,
+            )
+
+    def check_write(self, resource: str = "core") -> None:
+        budget = self.snapshot(resource)
+        if budget is not None and budget.remaining <= 0:
+            raise RateLimitExceeded(
+                f"GitHub {resource} rate limit exhausted; resets at {_format_reset(budget.reset_at)}.",
+                reset_at=budget.reset_at,
+            )
+
+    def interval_for(self, base_seconds: float, labels: List[str], resource: str = "graphql") -> float:
+        """Stretch ``base_seconds`` so refreshing ``labels`` lasts until the reset.
+
+        With ``R`` usable units left, ``T`` seconds to the reset and each
+        target costing ``C`` per refresh, refreshing every ``sum(C) * T / R``
+        seconds spreads the budget evenly across the window.
+        """
+        budget = self.snapshot(resource)
+        if budget is None or not labels:
+            return base_seconds
+        seconds_to_reset = budget.reset_at - time.time()
+        if seconds_to_reset <= 0:
+            return base_seconds
+        usable = budget.remaining - self.reserve
+        if usable <= 0:
+            return max(base_seconds, seconds_to_reset)
+        with self._lock:
+            cost_per_round = sum(self._costs.get(label, 1.0) for label in labels)
+        return max(base_seconds, cost_per_round * seconds_to_reset / usable)
+
+    def snapshot(self, resource: str) -> Optional[ResourceBudget]:
+        with self._lock:
+            budget = self._resources.get(resource)
+            if budget is None:
+                return None
+            if budget.reset_at <= time.time():
+                # The window rolled over; the next response will report the new one.
+                return None
+            return ResourceBudget(budget.limit, budget.remaining, budget.reset_at)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                resource: {
+                    "limit": budget.limit,
+                    "remaining": budget.remaining,
+                    "reset_at": budget.reset_at,
+                }
+                for resource, budget in self._resources.items()
+            }
+
+    def _update(self, resource: str, limit: int, remaining: int, reset_at: float) -> None:
+        with self._lock:
+            current = self._resources.get(resource)
+            if current is not None and current.reset_at == reset_at:
+                # Responses can arrive out of order; never move remaining back up
+                # within the same window.
+                remaining = min(remaining, current.remaining)
+                limit = limit or current.limit
+            self._resources[resource] = ResourceBudget(limit, remaining, reset_at)
+
+
+def _parse_reset(value: str) -> float:
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+
+def _format_reset(reset_at: float) -> str:
+    return time.strftime("%H:%M:%S UTC", time.gmtime(reset_at))
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import logging
+import signal
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import yaml
+
+from .config import AppConfig, load_config
+
+logger = logging.getLogger(__name__)
+
+# Sections read once at startup; changing them still needs a restart.
+RESTART_REQUIRED_SECTIONS = ("server", "storage", "actions", "reload")
+
+ApplyConfig = Callable[[AppConfig], Dict[str, List[str]]]
+
+
+class ConfigReloader:
+    """Re-reads the config file when it changes, or on SIGHUP, and applies it.
+
+    The watcher compares the file's modification time every
+    ``interval_seconds``; a signal only wakes it, so the reload itself never
+    runs inside a signal handler. The new file goes through ``load_config``
+    like the first one, so an invalid edit is logged and the running
+    configuration stays in place.
+    """
+
+    def __init__(self, path: Path, apply: ApplyConfig, interval_seconds: float = 5) -> None:
+        self.path = path
+        self.apply = apply
+        self.interval_seconds = interval_seconds
+        self.reloads = 0
+        self.failures = 0
+        self._mtime = self._read_mtime()
+        self._requested = threading.Event()
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="config-reload", daemon=True)
+        self._thread.start()
+        if hasattr(signal, "SIGHUP") and threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGHUP, lambda signum, frame: self.request_reload())
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stopping.set()
+        self._requested.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def request_reload(self) -> None:
+        """Reload on the watcher thread as soon as possible; safe from signal handlers."""
+        self._requested.set()
+
+    def check(self) -> Optional[Dict[str, List[str]]]:
+        """Reload when the file changed since the last load; None when it did not."""
+        if self._read_mtime() == self._mtime:
+            return None
+        return self.reload()
+
+    def reload(self) -> Optional[Dict[str, List[str]]]:
+        """Load and apply the file now; None (and the old config kept) when it is invalid."""
+        with self._lock:
+            self._mtime = self._read_mtime()
+            try:
+                config = load_config(str(self.path))
+            except (OSError, RuntimeError, yaml.YAMLError) as exc:
+                self.failures += 1
+                logger.error("Keeping the running configuration; %s: %s", self.path, exc)
+                return None
+            changes = self.apply(config)
+            self.reloads += 1
+        logger.info("Reloaded %s: %s", self.path, {key: value for key, value in changes.items() if value})
+        return changes
+
+    # Internal helpers -----------------------------------------------------
+
+    def _read_mtime(self) -> Optional[int]:
+        try:
+            return self.path.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            requested = self._requested.wait(self.interval_seconds)
+            self._requested.clear()
+            if self._stopping.is_set():
+                return
+            try:
+                if requested:
+                    self.reload()
+                else:
+                    self.check()
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("Applying %s failed", self.path)
+
+
+def restart_required(previous: AppConfig, config: AppConfig) -> List[str]:
+    """Sections that changed but only take effect after a restart."""
+    return [
+        section
+        for section in RESTART_REQUIRED_SECTIONS
+        if getattr(previous, section) != getattr(config, section)
+    ]
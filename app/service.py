@@ -1,21 +1,82 @@
 from __future__ import annotations
 
+import logging
+import os
+import socket
+import threading
 import time
-from typing import Dict, List
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from typing import Callable, Dict, Iterator, List, Optional, Set, Union
 
 from .cache import TTLCache
 from .config import AppConfig, TargetConfig
-from .github_client import GitHubClient
-from .mapping import COMMAND_CHOICES
-from .models import PullRequest
+from .events import EventHub
+from .github_client import FINISHED_PIPELINE_TTL_SECONDS, GitHubClient, PullRequestKey
+from .jobs import Deferred, Job, JobQueue
+from .mapping import command_choices
+from .models import PullRequest, TargetSnapshot
+from .query import PullRequestIndex
+from .ratelimit import RateLimitExceeded
+from .singleflight import SingleFlight
+from .store import MemorySnapshotStore, SnapshotStore
+from .sync import IncrementalSyncer, SyncState
+
+logger = logging.getLogger(__name__)
+
+RERUN_DEDUP_SECONDS = 120
+BUILDALL_COMMAND = "run buildall"
+# Backoff between head checks while update-branch is being applied.
+HEAD_POLL_INITIAL_SECONDS = 2.0
+HEAD_POLL_MAX_SECONDS = 15.0
+
+
+@dataclass(slots=True)
+class _Rebase:
+    """What a Rebase & Rerun carries from the branch update to the buildall comment."""
+
+    label: str
+    repo_full_name: str
+    pr_number: int
+    previous_sha: str
+    update_result: Dict
+    deadline: float = 0.0
 
 
 class PullRequestService:
-    def __init__(self, config: AppConfig, client: GitHubClient) -> None:
+    POLLER_LEASE = "poller"
+
+    def __init__(
+        self,
+        config: AppConfig,
+        client: GitHubClient,
+        store: Optional[SnapshotStore] = None,
+    ) -> None:
         self.config = config
         self.client = client
         self.cache = TTLCache()
-        self.recent_actions = TTLCache()
+        self.store = store or MemorySnapshotStore()
+        self.instance_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.jobs = JobQueue(config.actions, self.store)
+        self.flights = SingleFlight()
+        self.events = EventHub()
+        self.syncer = IncrementalSyncer(client, config.polling.reconcile_interval_seconds)
+        self._cap_pipeline_ttl()
+        self._sync_states: Dict[str, SyncState] = {}
+        self._indexes: Dict[str, PullRequestIndex] = {}
+        self._revalidating: Set[str] = set()
+        self._revalidating_lock = threading.Lock()
+        self._update_lock = threading.Lock()
+        self._version_lock = threading.Lock()
+        self._last_version = 0
+        self._head_waiters: Dict[PullRequestKey, List[Job]] = {}
+        self._head_waiters_lock = threading.Lock()
+        # In-flight calls per client, so a client replaced by a reload is
+        # closed only once the work that started on it has finished.
+        self._client_users: Dict[GitHubClient, int] = {}
+        self._retired_clients: Set[GitHubClient] = set()
+        self._clients_lock = threading.Lock()
 
     # Public API -----------------------------------------------------------
 
@@ -28,15 +89,172 @@ class PullRequestService:
                 return target
         raise KeyError(f"Unknown target: {label}")
 
+    def apply_config(self, config: AppConfig) -> Dict[str, List[str]]:
+        """Switch to a reloaded ``config``, keeping the state it does not affect.
+
+        Targets are matched by label. Removed targets are dropped. Targets
+        whose authors or repos changed are expired and fully re-fetched, and
+        their old PRs are served as stale until the new ones arrive. Other
+        targets keep their snapshots and sync state, and rerun dedup keys
+        stay in the store. The GitHub client is replaced only when the
+        ``github`` settings changed. Suggested commands are derived when
+        pipelines are parsed, so a change to ``commands`` (whose matcher the
+        caller installs first) drops every cached pipeline and re-fetches
+        every target.
+        """
+        previous = {target.label: target for target in self.config.targets}
+        current = {target.label: target for target in config.targets}
+        removed = [label for label in previous if label not in current]
+        added = [label for label in current if label not in previous]
+        changed = [
+            label
+            for label, target in current.items()
+            if label in previous and _search_scope(previous[label]) != _search_scope(target)
+        ]
+        with self._update_lock:
+            github_changed = config.github != self.config.github
+            commands_changed = config.commands != self.config.commands
+            self.config = config
+            if github_changed:
+                self._replace_client(GitHubClient(config.github))
+            else:
+                self.syncer = IncrementalSyncer(self.client, config.polling.reconcile_interval_seconds)
+            self._cap_pipeline_ttl()
+            for label in removed:
+                self.cache.invalidate(self._cache_key(label))
+                self.store.delete_snapshot(label)
+                self._sync_states.pop(label, None)
+                self._indexes.pop(label, None)
+            if commands_changed:
+                self.client.pipeline_cache.clear()
+            for label in current if commands_changed else changed:
+                # An empty state makes the next sync a full fetch instead of a
+                # merge into PRs found with the old authors, repos or rules.
+                self._sync_states[label] = SyncState()
+                self._indexes.pop(label, None)
+                self.expire_snapshot(label)
+        return {
+            "added": added,
+            "removed": removed,
+            "changed": changed,
+            "github": ["client replaced"] if github_changed else [],
+            "commands": ["rules changed"] if commands_changed else [],
+        }
+
+    def get_snapshot(self, label: str) -> TargetSnapshot:
+        """Return the last good snapshot, revalidating in the background when stale.
+
+        Only a target that has never been fetched (or whose snapshot outlived
+        ``polling.max_stale_seconds``) is fetched inline.
+        """
+        self.get_target(label)
+        snapshot = self._load_snapshot(label)
+        if snapshot is None:
+            return self.refresh(label)
+        if self.is_stale(snapshot):
+            self.revalidate_async(label)
+        return snapshot
+
     def list_pull_requests(self, label: str) -> List[PullRequest]:
-        cache_key = f"prs:{label}"
-        cached = self.cache.get(cache_key)
-        if cached is not None:
-            return cached
+        return self.get_snapshot(label).pull_requests
+
+    def list_cached_pull_requests(self, label: str) -> List[PullRequest]:
+        """The PRs currently held for ``label``; never fetches or revalidates."""
+        snapshot = self.cached_snapshot(label)
+        return snapshot.pull_requests if snapshot else []
+
+    def cached_snapshot(self, label: str) -> Optional[TargetSnapshot]:
+        """The snapshot currently held for ``label``, picking up ones other workers stored."""
+        return self._load_snapshot(label)
+
+    def pull_request_index(self, label: str, snapshot: TargetSnapshot) -> PullRequestIndex:
+        """Secondary indexes over ``snapshot``, built once per published snapshot."""
+        index = self._indexes.get(label)
+        if index is None or index.pull_requests is not snapshot.pull_requests:
+            index = PullRequestIndex(snapshot)
+            self._indexes[label] = index
+        return index
+
+    def refresh(self, label: str) -> TargetSnapshot:
+        """Fetch ``label`` from GitHub; concurrent refreshes share one fetch."""
         target = self.get_target(label)
-        prs = self.client.fetch_pull_requests(target)
-        self.cache.set(cache_key, prs, ttl_seconds=self.config.polling.interval_seconds)
-        return prs
+        return self.flights.do(
+            self._cache_key(label), lambda: self._fetch_snapshots([target])[label]
+        )
+
+    def refresh_many(self, labels: List[str]) -> Dict[str, TargetSnapshot]:
+        """Refresh several targets with batched multi-target GitHub queries.
+
+        Targets already being refreshed (by ``refresh`` or another batch)
+        join that fetch; only the rest go into the batch.
+        """
+        targets = {self._cache_key(label): self.get_target(label) for label in labels}
+
+        def fetch(keys: List[str]) -> Dict[str, TargetSnapshot]:
+            fetched = self._fetch_snapshots([targets[key] for key in keys])
+            return {self._cache_key(label): snapshot for label, snapshot in fetched.items()}
+
+        snapshots = self.flights.do_many(list(targets), fetch)
+        return {target.label: snapshots[key] for key, target in targets.items()}
+
+    def revalidate_async(self, label: str) -> bool:
+        """Refresh ``label`` on a daemon thread unless a revalidation is already running.
+
+        Workers that do not hold the poller lease leave revalidation to the
+        worker that does and pick its result up from the shared store.
+        """
+        if not self.is_poller_leader():
+            return False
+        with self._revalidating_lock:
+            if label in self._revalidating:
+                return False
+            self._revalidating.add(label)
+        thread = threading.Thread(
+            target=self._revalidate,
+            args=(label,),
+            name=f"revalidate:{label}",
+            daemon=True,
+        )
+        thread.start()
+        return True
+
+    def is_poller_leader(self) -> bool:
+        """Take or renew the poller lease; only the holder fetches in the background."""
+        return self.store.acquire_lease(
+            self.POLLER_LEASE, self.instance_id, self.config.storage.lease_seconds
+        )
+
+    def is_stale(self, snapshot: TargetSnapshot) -> bool:
+        if snapshot.expired:
+            return True
+        return snapshot.age(time.time()) >= self.refresh_interval()
+
+    def refresh_interval(self) -> float:
+        """The poll interval, stretched when the GitHub budget would not last until reset."""
+        labels = [target.label for target in self.config.targets]
+        base_seconds = self.config.polling.interval_seconds
+        if self.config.webhook.secret:
+            # Webhooks deliver changes; polling only reconciles what they missed.
+            base_seconds = max(base_seconds, self.config.webhook.poll_interval_seconds)
+        return self.client.budget.interval_for(base_seconds, labels)
+
+    def fetch_stats(self) -> Dict[str, int]:
+        """Counters of GitHub fetches issued versus callers coalesced onto them."""
+        return self.flights.stats()
+
+    def cache_stats(self) -> Dict[str, Dict[str, int]]:
+        """Hit/miss/eviction/expiry counters for each in-process cache."""
+        return {
+            "snapshots": self.cache.stats(),
+            "pipelines": self.client.pipeline_cache.stats(),
+        }
+
+    def snapshot_age(self, label: str) -> float:
+        """Seconds since ``label`` was last refreshed; infinite when never fetched."""
+        snapshot = self._load_snapshot(label)
+        if snapshot is None or snapshot.expired:
+            return float("inf")
+        return snapshot.age(time.time())
 
     def rerun_pipeline(
         self,
@@ -45,25 +263,484 @@ class PullRequestService:
         pr_number: int,
         command: str,
     ) -> Dict:
-        command = command.strip()
-        if not command.startswith("run "):
-            raise ValueError("Command must start with 'run '.")
-        action_key = f"rerun:{repo_full_name}#{pr_number}:{command}"
-        if self.recent_actions.get(action_key):
-            return {"status": "skipped", "message": "Command already triggered recently."}
-        self.client.post_comment(repo_full_name, pr_number, command)
-        self.recent_actions.set(action_key, True, ttl_seconds=120)
-        self.cache.set(f"prs:{label}", None, ttl_seconds=0)
-        return {"status": "ok", "message": f"Triggered '{command}'"}
-
-    def rebase_and_rerun(self, label: str, repo_full_name: str, pr_number: int) -> Dict:
-        update_result = self.client.update_branch(repo_full_name, pr_number)
-        buildall_result = self.rerun_pipeline(label, repo_full_name, pr_number, "run buildall")
+        command = self._normalize_command(command)
+        return self.rerun_commands(label, repo_full_name, pr_number, [command])
+
+    def rerun_commands(
+        self,
+        label: str,
+        repo_full_name: str,
+        pr_number: int,
+        commands: List[str],
+    ) -> Dict:
+        """Post ``commands`` as one comment, leaving out any triggered in the dedup window."""
+        claimed = [
+            command
+            for command in commands
+            if self.store.claim_action(
+                self._action_key(repo_full_name, pr_number, command), RERUN_DEDUP_SECONDS
+            )
+        ]
+        skipped = [command for command in commands if command not in claimed]
+        if not claimed:
+            return {
+                "status": "skipped",
+                "message": "Command already triggered recently.",
+                "skipped": skipped,
+            }
+        with self._github() as client:
+            try:
+                client.post_comment(repo_full_name, pr_number, "\n".join(claimed))
+            except Exception:
+                for command in claimed:
+                    self.store.release_action(self._action_key(repo_full_name, pr_number, command))
+                raise
+            pull_request = self.find_pull_request(label, repo_full_name, pr_number)
+            if pull_request is not None:
+                client.invalidate_pipelines(pull_request.head_sha)
+        self.expire_snapshot(label)
+        triggered = ", ".join(f"'{command}'" for command in claimed)
         return {
             "status": "ok",
-            "update": update_result,
-            "rerun": buildall_result,
+            "message": f"Triggered {triggered}",
+            "triggered": claimed,
+            "skipped": skipped,
         }
 
+    def plan_failed_reruns(self, label: str) -> List[Dict]:
+        """For each PR of ``label``, the rerun commands its failed pipelines map to.
+
+        Pipelines that are still running are left alone, pipelines without a
+        known command are reported as unmapped, and commands triggered within
+        the dedup window are reported as recent instead of planned.
+        """
+        plans: List[Dict] = []
+        for pr in self.get_snapshot(label).pull_requests:
+            failed = [p for p in pr.problematic_pipelines if not p.is_running]
+            if not failed:
+                continue
+            commands = list(dict.fromkeys(p.suggested_command for p in failed if p.suggested_command))
+            if BUILDALL_COMMAND in commands:
+                commands = [BUILDALL_COMMAND]
+            recent = [
+                command
+                for command in commands
+                if self.store.has_action(self._action_key(pr.repo_full_name, pr.number, command))
+            ]
+            plans.append(
+                {
+                    "repo": pr.repo_full_name,
+                    "pr": pr.number,
+                    "commands": [command for command in commands if command not in recent],
+                    "recent": recent,
+                    "unmapped": [p.name for p in failed if not p.suggested_command],
+                }
+            )
+        return plans
+
+    def rerun_failed(self, label: str, dry_run: bool = False, wait_seconds: float = 30) -> Dict:
+        """Rerun every failed pipeline of ``label`` with one comment per PR.
+
+        Comments go through the action queue, so they are dispatched
+        concurrently on its bounded pool and throttled per repository. Results
+        for jobs still queued after ``wait_seconds`` carry their job id.
+        """
+        plans = self.plan_failed_reruns(label)
+        if dry_run:
+            for plan in plans:
+                plan["status"] = "planned" if plan["commands"] else "nothing to trigger"
+            return {"status": "ok", "target": label, "dry_run": True, "results": plans}
+        dispatched = []
+        for plan in plans:
+            if not plan["commands"]:
+                plan["status"] = "skipped"
+                continue
+            repo_full_name, pr_number, commands = plan["repo"], plan["pr"], plan["commands"]
+            job = self.jobs.submit(
+                "rerun",
+                f"rerun:{repo_full_name}#{pr_number}:" + "|".join(commands),
+                repo_full_name,
+                pr_number,
+                lambda job, repo=repo_full_name, number=pr_number, run=commands: self.rerun_commands(
+                    label, repo, number, run
+                ),
+            )
+            plan["job_id"] = job.id
+            dispatched.append((plan, job))
+        self.jobs.wait([job for _, job in dispatched], timeout=wait_seconds)
+        for plan, job in dispatched:
+            if job.status == "succeeded":
+                plan["status"] = job.result["status"]
+                plan["message"] = job.result["message"]
+            elif job.status == "failed":
+                plan["status"] = "error"
+                plan["message"] = job.error
+            else:
+                plan["status"] = job.status
+        return {"status": "ok", "target": label, "dry_run": False, "results": plans}
+
+    def rebase_and_rerun(
+        self, label: str, repo_full_name: str, pr_number: int, job: Optional[Job] = None
+    ) -> Dict:
+        """Update the PR branch and post ``run buildall`` once the new head exists.
+
+        GitHub applies update-branch asynchronously, so commenting straight
+        away would build the old head. The PR head is re-read with backoff
+        until it moves. This runs the waits inline; the queued version
+        (``enqueue_rebase_and_rerun``) parks the job between head checks
+        instead and can be woken by a ``synchronize`` webhook.
+        """
+        result = self._start_rebase(label, repo_full_name, pr_number, job)
+        while isinstance(result, Deferred):
+            time.sleep(result.delay)
+            result = result.resume(job)
+        return result
+
+    def notify_head_changed(self, repo_full_name: str, pr_number: int) -> None:
+        """Wake Rebase & Rerun jobs waiting on this PR so they re-check its head now."""
+        with self._head_waiters_lock:
+            waiters = list(self._head_waiters.get((repo_full_name, pr_number), ()))
+        for job in waiters:
+            self.jobs.wake(job)
+
+    def enqueue_rerun(
+        self, label: str, repo_full_name: str, pr_number: int, command: str
+    ) -> Job:
+        """Queue ``rerun_pipeline``; invalid commands are rejected before queueing."""
+        command = self._normalize_command(command)
+        return self.jobs.submit(
+            "rerun",
+            self._action_key(repo_full_name, pr_number, command),
+            repo_full_name,
+            pr_number,
+            lambda job: self.rerun_pipeline(label, repo_full_name, pr_number, command),
+        )
+
+    def enqueue_rebase_and_rerun(self, label: str, repo_full_name: str, pr_number: int) -> Job:
+        return self.jobs.submit(
+            "rebase-rerun",
+            f"rebase-rerun:{repo_full_name}#{pr_number}",
+            repo_full_name,
+            pr_number,
+            lambda job: self._start_rebase(label, repo_full_name, pr_number, job),
+        )
+
+    def find_pull_request(
+        self, label: str, repo_full_name: str, pr_number: int
+    ) -> Optional[PullRequest]:
+        """Look a PR up in the cached snapshot without touching GitHub."""
+        snapshot = self._load_snapshot(label)
+        if snapshot is None:
+            return None
+        for pull_request in snapshot.pull_requests:
+            if pull_request.repo_full_name == repo_full_name and pull_request.number == pr_number:
+                return pull_request
+        return None
+
+    def update_pull_requests(
+        self, update: Callable[[PullRequest], Optional[PullRequest]]
+    ) -> List[str]:
+        """Patch cached PRs in every target without fetching from GitHub.
+
+        ``update`` sees each cached PR and returns it unchanged, a replacement,
+        or ``None`` to drop it. Targets with changes get a new snapshot version
+        (keeping ``fetched_at``) and their labels are returned.
+        """
+        changed_labels: List[str] = []
+        with self._update_lock:
+            for target in self.config.targets:
+                label = target.label
+                snapshot = self._load_snapshot(label)
+                if snapshot is None:
+                    continue
+                changes: Dict[PullRequestKey, Optional[PullRequest]] = {}
+                for pr in snapshot.pull_requests:
+                    updated = update(pr)
+                    if updated is not pr:
+                        changes[(pr.repo_full_name, pr.number)] = updated
+                if not changes:
+                    continue
+                prs = [
+                    changes.get((pr.repo_full_name, pr.number), pr)
+                    for pr in snapshot.pull_requests
+                ]
+                self._publish(
+                    label,
+                    TargetSnapshot(
+                        pull_requests=[pr for pr in prs if pr is not None],
+                        fetched_at=snapshot.fetched_at,
+                        expired=snapshot.expired,
+                        version=self._next_version(),
+                    ),
+                )
+                state = self._sync_states.get(label)
+                if state is not None:
+                    for key, pr in changes.items():
+                        if pr is None:
+                            state.pull_requests.pop(key, None)
+                        else:
+                            state.pull_requests[key] = pr
+                changed_labels.append(label)
+        return changed_labels
+
+    def expire_snapshot(self, label: str) -> None:
+        """Mark ``label`` stale so the next read triggers a revalidation."""
+        snapshot = self.cache.get(self._cache_key(label))
+        if snapshot is not None:
+            snapshot.expired = True
+        self.store.expire_snapshot(label)
+
     def command_choices(self) -> List[str]:
-        return COMMAND_CHOICES
+        return command_choices()
+
+    # Internal helpers -----------------------------------------------------
+
+    @staticmethod
+    def _cache_key(label: str) -> str:
+        return f"prs:{label}"
+
+    @contextmanager
+    def _github(self) -> Iterator[GitHubClient]:
+        """The current client, kept open until the caller is done even if a reload replaces it."""
+        with self._clients_lock:
+            client = self.client
+            self._client_users[client] = self._client_users.get(client, 0) + 1
+        try:
+            yield client
+        finally:
+            with self._clients_lock:
+                self._client_users[client] -= 1
+                idle = not self._client_users[client]
+                if idle:
+                    del self._client_users[client]
+                close = idle and client in self._retired_clients
+                if close:
+                    self._retired_clients.remove(client)
+            if close:
+                client.close()
+
+    def _replace_client(self, client: GitHubClient) -> None:
+        with self._clients_lock:
+            previous = self.client
+            if client.api_base == previous.api_base:
+                # Pipelines are keyed by head commit, so they hold across
+                # tokens; the budget keeps the spend and windows seen so far
+                # until GitHub reports the new token's.
+                client.pipeline_cache = previous.pipeline_cache
+                previous.budget.reserve = client.budget.reserve
+                client.budget = previous.budget
+            # The syncer goes first: a fetch that leased the old client may
+            # pick up the new syncer, but never the other way round.
+            self.syncer = IncrementalSyncer(client, self.config.polling.reconcile_interval_seconds)
+            self.client = client
+            in_use = previous in self._client_users
+            if in_use:
+                self._retired_clients.add(previous)
+        if not in_use:
+            previous.close()
+
+    def _cap_pipeline_ttl(self) -> None:
+        # Pipelines can change without bumping the PR's updatedAt, so cached
+        # finished ones are trusted for at most one reconcile interval.
+        self.client.finished_pipeline_ttl_seconds = min(
+            FINISHED_PIPELINE_TTL_SECONDS, self.config.polling.reconcile_interval_seconds
+        )
+
+    def _report(self, job: Optional[Job], progress: str) -> None:
+        if job is not None:
+            self.jobs.update(job, progress=progress)
+
+    def _start_rebase(
+        self, label: str, repo_full_name: str, pr_number: int, job: Optional[Job]
+    ) -> Union[Dict, Deferred]:
+        with self._github() as client:
+            previous_sha = client.fetch_head_sha(repo_full_name, pr_number)
+            if previous_sha is None:
+                raise RuntimeError(f"Pull request {repo_full_name}#{pr_number} not found")
+            self._report(job, "updating branch")
+            update_result = client.update_branch(repo_full_name, pr_number)
+        rebase = _Rebase(label, repo_full_name, pr_number, previous_sha, update_result)
+        if update_result.get("status") == 422:
+            return self._post_buildall(rebase, previous_sha, job)
+        rebase.deadline = time.monotonic() + self.config.actions.rebase_timeout_seconds
+        return self._await_new_head(rebase, HEAD_POLL_INITIAL_SECONDS, job)
+
+    def _await_new_head(self, rebase: "_Rebase", delay: float, job: Optional[Job]) -> Deferred:
+        """Check the head again after ``delay``, or when ``notify_head_changed`` wakes ``job``."""
+        key = (rebase.repo_full_name, rebase.pr_number)
+        if job is not None:
+            with self._head_waiters_lock:
+                self._head_waiters.setdefault(key, []).append(job)
+
+        def check(job: Optional[Job]) -> Union[Dict, Deferred]:
+            if job is not None:
+                with self._head_waiters_lock:
+                    waiters = self._head_waiters.get(key, [])
+                    if job in waiters:
+                        waiters.remove(job)
+                    if not waiters:
+                        self._head_waiters.pop(key, None)
+            with self._github() as client:
+                head_sha = client.fetch_head_sha(*key)
+            if head_sha and head_sha != rebase.previous_sha:
+                return self._post_buildall(rebase, head_sha, job)
+            if time.monotonic() >= rebase.deadline:
+                raise RuntimeError(
+                    f"Branch of {key[0]}#{key[1]} was not updated within "
+                    f"{self.config.actions.rebase_timeout_seconds}s; "
+                    f"'{BUILDALL_COMMAND}' was not posted"
+                )
+            return self._await_new_head(rebase, min(delay * 2, HEAD_POLL_MAX_SECONDS), job)
+
+        return Deferred(
+            delay=max(0.0, min(delay, rebase.deadline - time.monotonic())),
+            resume=check,
+            progress=f"waiting for new head (was {rebase.previous_sha[:7]})",
+        )
+
+    def _post_buildall(self, rebase: "_Rebase", head_sha: str, job: Optional[Job]) -> Dict:
+        self._report(job, f"posting {BUILDALL_COMMAND} on {head_sha[:7]}")
+        buildall_result = self.rerun_pipeline(
+            rebase.label, rebase.repo_full_name, rebase.pr_number, BUILDALL_COMMAND
+        )
+        return {
+            "status": "ok",
+            "update": rebase.update_result,
+            "head_sha": head_sha,
+            "rerun": buildall_result,
+        }
+
+    @staticmethod
+    def _action_key(repo_full_name: str, pr_number: int, command: str) -> str:
+        return f"rerun:{repo_full_name}#{pr_number}:{command}"
+
+    @staticmethod
+    def _normalize_command(command: str) -> str:
+        command = command.strip()
+        if not command.startswith("run "):
+            raise ValueError("Command must start with 'run '.")
+        return command
+
+    def _fetch_snapshots(self, targets: List[TargetConfig]) -> Dict[str, TargetSnapshot]:
+        with self._github() as client:
+            budget = client.budget
+            spent_before = budget.spent
+            fetched: Dict[str, List[PullRequest]]
+            if self.config.polling.incremental:
+                previous: Dict[str, Optional[SyncState]] = {
+                    target.label: self._sync_state(target.label) for target in targets
+                }
+                states = self.syncer.sync_many(targets, previous)
+                self._sync_states.update(
+                    {
+                        label: state
+                        for label, state in states.items()
+                        if self._still_configured(targets, label)
+                    }
+                )
+                fetched = {label: state.ordered() for label, state in states.items()}
+            elif len(targets) == 1:
+                fetched = {targets[0].label: client.fetch_pull_requests(targets[0])}
+            else:
+                fetched = client.fetch_many(targets)
+        cost_per_target = (budget.spent - spent_before) / len(targets)
+        snapshots: Dict[str, TargetSnapshot] = {}
+        for label, prs in fetched.items():
+            budget.record_refresh_cost(label, cost_per_target)
+            snapshot = TargetSnapshot(
+                pull_requests=prs, fetched_at=time.time(), version=self._next_version()
+            )
+            # A config reload during the fetch may have changed or removed the target.
+            if self._still_configured(targets, label):
+                self._publish(label, snapshot)
+            snapshots[label] = snapshot
+        return snapshots
+
+    def _still_configured(self, fetched: List[TargetConfig], label: str) -> bool:
+        target = next(target for target in fetched if target.label == label)
+        return any(
+            current.label == label and _search_scope(current) == _search_scope(target)
+            for current in self.config.targets
+        )
+
+    def _publish(self, label: str, snapshot: TargetSnapshot) -> None:
+        previous = self.cache.get(self._cache_key(label))
+        self._stamp_versions(previous, snapshot)
+        self.cache.set(self._cache_key(label), snapshot, ttl_seconds=self._retention_seconds())
+        self.store.save_snapshot(label, snapshot)
+        self.events.publish(label, previous, snapshot)
+
+    @staticmethod
+    def _stamp_versions(previous: Optional[TargetSnapshot], snapshot: TargetSnapshot) -> None:
+        """Carry PR versions over from ``previous`` unless the PR changed.
+
+        The fetched PRs may also sit in other targets' snapshots, so changed
+        ones are stamped on copies rather than in place.
+        """
+        known = {
+            (pr.repo_full_name, pr.number): pr for pr in (previous.pull_requests if previous else ())
+        }
+        stamped: List[PullRequest] = []
+        for pr in snapshot.pull_requests:
+            old = known.get((pr.repo_full_name, pr.number))
+            if old is not None and (old is pr or replace(pr, version=old.version) == old):
+                stamped.append(old)
+            else:
+                stamped.append(replace(pr, version=snapshot.version))
+        snapshot.pull_requests = stamped
+
+    def _next_version(self) -> int:
+        """Microsecond timestamps, so versions also increase across workers and restarts."""
+        with self._version_lock:
+            self._last_version = max(time.time_ns() // 1000, self._last_version + 1)
+            return self._last_version
+
+    def _retention_seconds(self) -> int:
+        polling = self.config.polling
+        return max(polling.interval_seconds, polling.max_stale_seconds)
+
+    def _load_snapshot(self, label: str) -> Optional[TargetSnapshot]:
+        """Return the cached snapshot, reloading it when the store holds a newer one."""
+        cache_key = self._cache_key(label)
+        snapshot = self.cache.get(cache_key)
+        stored = self.store.snapshot_state(label)
+        if stored is None:
+            return snapshot
+        stored_version, stored_expired = stored
+        if snapshot is not None and stored_version <= snapshot.version:
+            if stored_expired and stored_version == snapshot.version:
+                snapshot.expired = True
+            return snapshot
+        loaded = self.store.load_snapshot(label)
+        if loaded is None:
+            return snapshot
+        if time.time() - loaded.fetched_at > self._retention_seconds():
+            return None
+        self.cache.set(cache_key, loaded, ttl_seconds=self._retention_seconds())
+        self.events.publish(label, snapshot, loaded)
+        return loaded
+
+    def _sync_state(self, label: str) -> Optional[SyncState]:
+        """The incremental sync state, rebuilt from a stored snapshot after a restart."""
+        state = self._sync_states.get(label)
+        if state is not None:
+            return state
+        snapshot = self._load_snapshot(label)
+        if snapshot is None:
+            return None
+        return SyncState.from_snapshot(snapshot.pull_requests)
+
+    def _revalidate(self, label: str) -> None:
+        try:
+            self.refresh(label)
+        except RateLimitExceeded as exc:
+            logger.info("Serving stale %s: %s", label, exc)
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("Background revalidation failed for %s", label)
+        finally:
+            with self._revalidating_lock:
+                self._revalidating.discard(label)
+
+
+def _search_scope(target: TargetConfig) -> tuple:
+    return (tuple(target.authors), tuple(target.repos))
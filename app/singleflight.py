@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import threading
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Collapses concurrent calls for the same key into a single execution.
+
+    The first caller for a key runs ``fn``; callers arriving while it is in
+    flight block and receive the same result, or re-raise the same exception.
+    Nothing is cached once the call completes.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self.issued = 0
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.issued += 1
+                leader = True
+        if not leader:
+            call.done.wait()
+        else:
+            try:
+                call.result = fn()
+            except BaseException as exc:  # pylint: disable=broad-except
+                call.error = exc
+            finally:
+                with self._lock:
+                    self._calls.pop(key, None)
+                call.done.set()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def do_many(self, keys: List[str], fn: Callable[[List[str]], Dict[str, T]]) -> Dict[str, T]:
+        """``do`` for several keys at once.
+
+        Keys already in flight are joined; ``fn`` runs once for the rest and
+        must return a result for each key it is given. Each caller runs its
+        own share before waiting, so overlapping batches cannot deadlock.
+        """
+        joined: Dict[str, _Call] = {}
+        led: Dict[str, _Call] = {}
+        with self._lock:
+            for key in keys:
+                call = self._calls.get(key)
+                if call is not None:
+                    self.coalesced += 1
+                    joined[key] = call
+                else:
+                    led[key] = self._calls[key] = _Call()
+            if led:
+                self.issued += 1
+        if led:
+            try:
+                fetched = fn(list(led))
+                for key, call in led.items():
+                    call.result = fetched[key]
+            except BaseException as exc:  # pylint: disable=broad-except
+                for call in led.values():
+                    call.error = exc
+            finally:
+                with self._lock:
+                    for key in led:
+                        self._calls.pop(key, None)
+                for call in led.values():
+                    call.done.set()
+        results: Dict[str, T] = {}
+        for key in keys:
+            call = led.get(key) or joined[key]
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            results[key] = call.result
+        return results
+
+    def in_flight(self, key: str) -> bool:
+        with self._lock:
+            return key in self._calls
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "issued": self.issued,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls),
+            }
@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from .cache import TTLCache
+from .config import StorageConfig
+from .models import PipelineStatus, PullRequest, TargetSnapshot, parse_state
+
+
+# Dedup keys are one per (repo, PR, command) and only live for minutes.
+ACTION_KEYS_MAX_ENTRIES = 10000
+JOBS_MAX_ENTRIES = 5000
+
+
+class SnapshotStore(ABC):
+    """Where target snapshots, action dedup keys and the poller lease live.
+
+    The in-memory store keeps everything in the current process. Backends that
+    persist (SQLite) let a restarted process serve data immediately and let
+    several workers share one copy, with only the lease holder polling GitHub.
+    """
+
+    @abstractmethod
+    def snapshot_state(self, label: str) -> Optional[Tuple[int, bool]]:
+        """``(version, expired)`` for the stored snapshot, without decoding it."""
+
+    @abstractmethod
+    def load_snapshot(self, label: str) -> Optional[TargetSnapshot]:
+        ...
+
+    @abstractmethod
+    def save_snapshot(self, label: str, snapshot: TargetSnapshot) -> None:
+        ...
+
+    @abstractmethod
+    def expire_snapshot(self, label: str) -> None:
+        ...
+
+    @abstractmethod
+    def delete_snapshot(self, label: str) -> None:
+        ...
+
+    @abstractmethod
+    def claim_action(self, key: str, ttl_seconds: int) -> bool:
+        """Record ``key`` unless it is already recorded; True when this call recorded it."""
+
+    @abstractmethod
+    def release_action(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def has_action(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def acquire_lease(self, name: str, owner: str, ttl_seconds: int) -> bool:
+        """Take or renew lease ``name`` for ``owner``; False while someone else holds it."""
+
+    @abstractmethod
+    def save_job(self, job_id: str, data: Dict, ttl_seconds: int) -> None:
+        ...
+
+    @abstractmethod
+    def load_job(self, job_id: str) -> Optional[Dict]:
+        ...
+
+    def close(self) -> None:
+        return None
+
+
+class MemorySnapshotStore(SnapshotStore):
+    def __init__(self) -> None:
+        self._snapshots: Dict[str, TargetSnapshot] = {}
+        self._actions = TTLCache(max_entries=ACTION_KEYS_MAX_ENTRIES)
+        self._jobs = TTLCache(max_entries=JOBS_MAX_ENTRIES)
+        self._lock = threading.Lock()
+
+    def snapshot_state(self, label: str) -> Optional[Tuple[int, bool]]:
+        snapshot = self._snapshots.get(label)
+        return (snapshot.version, snapshot.expired) if snapshot else None
+
+    def load_snapshot(self, label: str) -> Optional[TargetSnapshot]:
+        return self._snapshots.get(label)
+
+    def save_snapshot(self, label: str, snapshot: TargetSnapshot) -> None:
+        self._snapshots[label] = snapshot
+
+    def expire_snapshot(self, label: str) -> None:
+        snapshot = self._snapshots.get(label)
+        if snapshot is not None:
+            snapshot.expired = True
+
+    def delete_snapshot(self, label: str) -> None:
+        self._snapshots.pop(label, None)
+
+    def claim_action(self, key: str, ttl_seconds: int) -> bool:
+        with self._lock:
+            if self._actions.get(key):
+                return False
+            self._actions.set(key, True, ttl_seconds=ttl_seconds)
+            return True
+
+    def release_action(self, key: str) -> None:
+        self._actions.invalidate(key)
+
+    def has_action(self, key: str) -> bool:
+        return bool(self._actions.get(key))
+
+    def acquire_lease(self, name: str, owner: str, ttl_seconds: int) -> bool:
+        return True
+
+    def save_job(self, job_id: str, data: Dict, ttl_seconds: int) -> None:
+        self._jobs.set(job_id, dict(data), ttl_seconds=ttl_seconds)
+
+    def load_job(self, job_id: str) -> Optional[Dict]:
+        data = self._jobs.get(job_id)
+        return dict(data) if data else None
+
+
+class SqliteSnapshotStore(SnapshotStore):
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS snapshots (
+        label TEXT PRIMARY KEY,
+        version INTEGER NOT NULL,
+        fetched_at REAL NOT NULL,
+        expired INTEGER NOT NULL DEFAULT 0,
+        payload TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS actions (
+        key TEXT PRIMARY KEY,
+        expires_at REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS leases (
+        name TEXT PRIMARY KEY,
+        owner TEXT NOT NULL,
+        expires_at REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS jobs (
+        id TEXT PRIMARY KEY,
+        expires_at REAL NOT NULL,
+        payload TEXT NOT NULL
+    );
+    """
+
+    def __init__(self, path: str) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+        self._lock = threading.Lock()
+
+    def snapshot_state(self, label: str) -> Optional[Tuple[int, bool]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version, expired FROM snapshots WHERE label = ?", (label,)
+            ).fetchone()
+        return (row[0], bool(row[1])) if row else None
+
+    def load_snapshot(self, label: str) -> Optional[TargetSnapshot]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version, fetched_at, expired, payload FROM snapshots WHERE label = ?",
+                (label,),
+            ).fetchone()
+        if row is None:
+            return None
+        return TargetSnapshot(
+            pull_requests=[decode_pull_request(item) for item in json.loads(row[3])],
+            fetched_at=row[1],
+            expired=bool(row[2]),
+            version=row[0],
+        )
+
+    def save_snapshot(self, label: str, snapshot: TargetSnapshot) -> None:
+        payload = json.dumps([encode_pull_request(pr) for pr in snapshot.pull_requests])
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO snapshots (label, version, fetched_at, expired, payload) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(label) DO UPDATE SET version = excluded.version, "
+                "fetched_at = excluded.fetched_at, expired = excluded.expired, "
+                "payload = excluded.payload WHERE excluded.version > snapshots.version",
+                (label, snapshot.version, snapshot.fetched_at, int(snapshot.expired), payload),
+            )
+
+    def expire_snapshot(self, label: str) -> None:
+        with self._lock:
+            self._conn.execute("UPDATE snapshots SET expired = 1 WHERE label = ?", (label,))
+
+    def delete_snapshot(self, label: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM snapshots WHERE label = ?", (label,))
+
+    def claim_action(self, key: str, ttl_seconds: int) -> bool:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("DELETE FROM actions WHERE expires_at < ?", (now,))
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO actions (key, expires_at) VALUES (?, ?)",
+                (key, now + ttl_seconds),
+            )
+            return cursor.rowcount == 1
+
+    def release_action(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM actions WHERE key = ?", (key,))
+
+    def has_action(self, key: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM actions WHERE key = ? AND expires_at >= ?", (key, time.time())
+            ).fetchone()
+        return row is not None
+
+    def acquire_lease(self, name: str, owner: str, ttl_seconds: int) -> bool:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE leases.owner = excluded.owner OR leases.expires_at < ?",
+                (name, owner, now + ttl_seconds, now),
+            )
+            row = self._conn.execute("SELECT owner FROM leases WHERE name = ?", (name,)).fetchone()
+        return row is not None and row[0] == owner
+
+    def save_job(self, job_id: str, data: Dict, ttl_seconds: int) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("DELETE FROM jobs WHERE expires_at < ?", (now,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO jobs (id, expires_at, payload) VALUES (?, ?, ?)",
+                (job_id, now + ttl_seconds, json.dumps(data)),
+            )
+
+    def load_job(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM jobs WHERE id = ? AND expires_at >= ?", (job_id, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def create_store(config: StorageConfig) -> SnapshotStore:
+    if config.backend == "sqlite":
+        return SqliteSnapshotStore(config.path)
+    return MemorySnapshotStore()
+
+
+def encode_pull_request(pr: PullRequest) -> Dict:
+    data = asdict(pr)
+    data["updated_at"] = pr.updated_at.isoformat()
+    return data
+
+
+def decode_pull_request(data: Dict) -> PullRequest:
+    fields = dict(data)
+    fields["updated_at"] = datetime.fromisoformat(fields["updated_at"])
+    fields["pipelines"] = [decode_pipeline(pipeline) for pipeline in fields.get("pipelines", [])]
+    return PullRequest(**fields)
+
+
+def decode_pipeline(data: Dict) -> PipelineStatus:
+    fields = dict(data)
+    # Derived on construction; older snapshots do not carry it at all.
+    fields.pop("is_problematic", None)
+    fields["state"] = parse_state(fields["state"])
+    return PipelineStatus(**fields)
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set
+
+from .config import TargetConfig
+from .github_client import GitHubClient, PullRequestKey
+from .models import PullRequest
+
+
+@dataclass
+class SyncState:
+    """The PR set held for one target between incremental syncs."""
+
+    pull_requests: Dict[PullRequestKey, PullRequest] = field(default_factory=dict)
+    high_water: Optional[datetime] = None
+    reconciled_at: float = 0.0
+
+    @classmethod
+    def from_snapshot(cls, pull_requests: List[PullRequest]) -> "SyncState":
+        """Resume from persisted PRs; a zero ``reconciled_at`` forces a reconcile pass."""
+        return cls(
+            pull_requests={(pr.repo_full_name, pr.number): pr for pr in pull_requests},
+            high_water=max((pr.updated_at for pr in pull_requests), default=None),
+        )
+
+    def ordered(self) -> List[PullRequest]:
+        return sorted(self.pull_requests.values(), key=lambda pr: pr.updated_at, reverse=True)
+
+
+class IncrementalSyncer:
+    """Keeps a target's PR set current by fetching only what changed.
+
+    Each sync searches for PRs updated since the high-water mark (minus a small
+    overlap, since search timestamps are second-granular and eventually
+    consistent) and merges them by ``(repo, number)``. Check/status updates do
+    not bump a PR's ``updatedAt``, so PRs with pipelines still running are
+    re-fetched by number. Every ``reconcile_interval_seconds`` a listing-only
+    search drops PRs that were closed or merged, and every other open PR is
+    looked up again so finished pipelines that changed later (a run
+    re-triggered from the CI UI, a late context) are picked up too.
+    """
+
+    def __init__(
+        self,
+        client: GitHubClient,
+        reconcile_interval_seconds: int,
+        limit: Optional[int] = None,
+        overlap_seconds: int = 60,
+    ) -> None:
+        self.client = client
+        self.reconcile_interval_seconds = reconcile_interval_seconds
+        self.limit = limit
+        self.overlap = timedelta(seconds=overlap_seconds)
+
+    def sync(self, target: TargetConfig, state: Optional[SyncState]) -> SyncState:
+        return self.sync_many([target], {target.label: state})[target.label]
+
+    def sync_many(
+        self, targets: List[TargetConfig], states: Dict[str, Optional[SyncState]]
+    ) -> Dict[str, SyncState]:
+        """Sync several targets, sharing one batched search and one lookup pass."""
+        now = time.time()
+        since = {
+            target.label: state.high_water - self.overlap
+            for target in targets
+            if (state := states.get(target.label)) is not None and state.high_water is not None
+        }
+        if len(targets) == 1:
+            target = targets[0]
+            searched = {
+                target.label: self.client.fetch_pull_requests(
+                    target, limit=self.limit, updated_since=since.get(target.label)
+                )
+            }
+        else:
+            searched = self.client.fetch_many(targets, limit=self.limit, updated_since=since)
+
+        held: Dict[str, Dict[PullRequestKey, PullRequest]] = {}
+        reconciled: Dict[str, float] = {}
+        refetch: Dict[str, Set[PullRequestKey]] = {}
+        for target in targets:
+            label = target.label
+            state = states.get(label)
+            changed = searched[label]
+            if label not in since or state is None:
+                held[label] = {self._key(pr): pr for pr in changed}
+                reconciled[label] = now
+                refetch[label] = set()
+                continue
+            prs = dict(state.pull_requests)
+            for pr in changed:
+                prs[self._key(pr)] = pr
+            pending = {key for key, pr in prs.items() if self._has_pending_pipelines(pr)}
+            refetch[label] = pending - {self._key(pr) for pr in changed}
+            reconciled[label] = state.reconciled_at
+            if now - state.reconciled_at >= self.reconcile_interval_seconds:
+                listed = self.client.list_open_pull_requests(target, limit=self.limit)
+                for key in set(prs) - set(listed):
+                    del prs[key]
+                # Cached pipelines older than this interval have expired by
+                # now, so the lookup re-reads them.
+                refetch[label] |= set(listed) - {self._key(pr) for pr in changed}
+                reconciled[label] = now
+            held[label] = prs
+
+        wanted = set().union(*refetch.values())
+        if wanted:
+            fetched = self.client.fetch_pull_requests_by_number(wanted)
+            for label, keys in refetch.items():
+                for key in keys:
+                    pr = fetched.get(key)
+                    if pr is None:
+                        held[label].pop(key, None)
+                    else:
+                        held[label][key] = pr
+        results: Dict[str, SyncState] = {}
+        for target in targets:
+            previous = states.get(target.label)
+            results[target.label] = self._build_state(
+                held[target.label],
+                reconciled[target.label],
+                previous=previous.high_water if previous else None,
+            )
+        return results
+
+    # Internal helpers -----------------------------------------------------
+
+    def _build_state(
+        self,
+        held: Dict[PullRequestKey, PullRequest],
+        reconciled_at: float,
+        previous: Optional[datetime],
+    ) -> SyncState:
+        ordered = sorted(held.values(), key=lambda pr: pr.updated_at, reverse=True)[: self.limit]
+        high_water = max((pr.updated_at for pr in ordered), default=previous)
+        if high_water is None:
+            # Nothing open yet: anchor the mark so the next sync stays incremental.
+            high_water = datetime.fromtimestamp(reconciled_at).astimezone()
+        return SyncState(
+            pull_requests={self._key(pr): pr for pr in ordered},
+            high_water=high_water,
+            reconciled_at=reconciled_at,
+        )
+
+    @staticmethod
+    def _key(pr: PullRequest) -> PullRequestKey:
+        return (pr.repo_full_name, pr.number)
+
+    @staticmethod
+    def _has_pending_pipelines(pr: PullRequest) -> bool:
+        return any(p.is_running for p in pr.pipelines)
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import hashlib
+import hmac
+from dataclasses import replace
+from typing import Callable, Dict, List, Optional
+
+from .github_client import _parse_timestamp
+from .mapping import guess_command
+from .models import PipelineState, PipelineStatus, PullRequest, parse_state
+from .service import PullRequestService
+
+
+def verify_signature(secret: str, body: bytes, signature: Optional[str]) -> bool:
+    """Check GitHub's ``X-Hub-Signature-256`` header against the raw request body."""
+    if not signature or not signature.startswith("sha256="):
+        return False
+    expected = hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature[len("sha256=") :])
+
+
+class WebhookHandler:
+    """Applies GitHub webhook events to the cached PR snapshots.
+
+    ``status`` and ``check_run`` events replace the single matching
+    ``PipelineStatus`` on PRs whose head is the event's commit; ``pull_request``
+    events drop closed PRs and mark pipelines pending on new pushes. Events that
+    cannot be applied precisely (new PRs, re-requested suites) expire the
+    affected targets so the next poll picks them up.
+    """
+
+    def __init__(self, service: PullRequestService) -> None:
+        self.service = service
+
+    def handle(self, event: str, payload: Dict) -> Dict:
+        handler: Optional[Callable[[Dict], Dict[str, List[str]]]] = getattr(
+            self, f"_on_{event}", None
+        )
+        if handler is None:
+            return {"status": "ignored", "event": event}
+        result = handler(payload)
+        return {"status": "ok", "event": event, **result}
+
+    # Event handlers -------------------------------------------------------
+
+    def _on_status(self, payload: Dict) -> Dict[str, List[str]]:
+        name = payload.get("context", "Unknown")
+        state = payload.get("state", "unknown")
+        pipeline = PipelineStatus(
+            name=name,
+            state=parse_state(state),
+            conclusion=state.upper(),
+            target_url=payload.get("target_url"),
+            description=payload.get("description"),
+            suggested_command=guess_command(name),
+            context_source="status",
+        )
+        return self._apply_pipeline(payload["sha"], pipeline)
+
+    def _on_check_run(self, payload: Dict) -> Dict[str, List[str]]:
+        run = payload["check_run"]
+        name = run.get("name", "Unnamed Check")
+        conclusion = run.get("conclusion")
+        pipeline = PipelineStatus(
+            name=name,
+            state=parse_state(run.get("status")),
+            conclusion=parse_state(conclusion) if conclusion else None,
+            target_url=run.get("details_url") or run.get("html_url"),
+            description=conclusion.upper() if conclusion else None,
+            suggested_command=guess_command(name),
+            context_source="check",
+        )
+        return self._apply_pipeline(run["head_sha"], pipeline)
+
+    def _on_check_suite(self, payload: Dict) -> Dict[str, List[str]]:
+        if payload.get("action") not in {"requested", "rerequested"}:
+            # Completion is already reported run by run through check_run events.
+            return {"updated": [], "expired": []}
+        sha = payload["check_suite"]["head_sha"]
+        self.service.client.invalidate_pipelines(sha)
+        return {"updated": [], "expired": self._expire(lambda pr: pr.head_sha == sha)}
+
+    def _on_pull_request(self, payload: Dict) -> Dict[str, List[str]]:
+        action = payload.get("action")
+        data = payload["pull_request"]
+        repo_full_name = payload["repository"]["full_name"]
+        number = data["number"]
+
+        def is_this(pr: PullRequest) -> bool:
+            return pr.repo_full_name == repo_full_name and pr.number == number
+
+        if action == "closed":
+            return {"updated": self.service.update_pull_requests(lambda pr: None if is_this(pr) else pr)}
+        if action == "synchronize":
+            head_sha = data["head"]["sha"]
+            updated_at = _parse_timestamp(data["updated_at"])
+            self.service.notify_head_changed(repo_full_name, number)
+            return {
+                "updated": self.service.update_pull_requests(
+                    lambda pr: replace(
+                        pr,
+                        head_sha=head_sha,
+                        pipelines=_pending_on_new_head(pr.pipelines),
+                        updated_at=updated_at,
+                    )
+                    if is_this(pr)
+                    else pr
+                )
+            }
+        if action == "edited":
+            title = data["title"]
+            return {
+                "updated": self.service.update_pull_requests(
+                    lambda pr: replace(pr, title=title) if is_this(pr) else pr
+                )
+            }
+        if action in {"opened", "reopened"}:
+            author = (data.get("user") or {}).get("login")
+            expired = [
+                target.label
+                for target in self.service.targets()
+                if target.matches(author, repo_full_name)
+            ]
+            for label in expired:
+                self.service.expire_snapshot(label)
+            return {"updated": [], "expired": expired}
+        return {"updated": [], "expired": self._expire(is_this)}
+
+    # Internal helpers -----------------------------------------------------
+
+    def _apply_pipeline(self, sha: str, pipeline: PipelineStatus) -> Dict[str, List[str]]:
+        self.service.client.invalidate_pipelines(sha)
+
+        def apply(pr: PullRequest) -> PullRequest:
+            if pr.head_sha != sha:
+                return pr
+            pipelines = [p for p in pr.pipelines if p.name != pipeline.name]
+            pipelines.append(pipeline)
+            return replace(pr, pipelines=pipelines)
+
+        return {"updated": self.service.update_pull_requests(apply)}
+
+    def _expire(self, predicate: Callable[[PullRequest], bool]) -> List[str]:
+        expired: List[str] = []
+        for target in self.service.targets():
+            pull_requests = self.service.list_cached_pull_requests(target.label)
+            if any(predicate(pr) for pr in pull_requests):
+                self.service.expire_snapshot(target.label)
+                expired.append(target.label)
+        return expired
+
+
+def _pending_on_new_head(pipelines: List[PipelineStatus]) -> List[PipelineStatus]:
+    # A push restarts CI; until the new head reports, an empty list would
+    # render as "All healthy", so the known pipelines are shown as pending.
+    return [
+        PipelineStatus(
+            name=pipeline.name,
+            state=PipelineState.PENDING,
+            conclusion=None,
+            target_url=None,
+            description="Waiting for the new head",
+            suggested_command=pipeline.suggested_command,
+            context_source=pipeline.context_source,
+        )
+        for pipeline in pipelines
+    ]
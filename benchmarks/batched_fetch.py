@@ -0,0 +1,71 @@
+"""Compare per-target PR fetches with one batched multi-target fetch.
+
+Runs both paths against the GitHub API configured in ``config.yaml`` and
+reports wall time, GraphQL round trips and GraphQL points consumed (read from
+``GET /rate_limit``, which is itself free). Points are only accurate when
+nothing else is using the same token while the comparison runs.
+
+    python benchmarks/batched_fetch.py --config config.yaml --rounds 3
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.config import load_config  # noqa: E402
+from app.github_client import GitHubClient  # noqa: E402
+
+
+def graphql_points_used(client: GitHubClient) -> int:
+    response = client.session.get(f"{client.api_base}/rate_limit", timeout=15)
+    client._raise_for_status(response, "read rate limit")  # pylint: disable=protected-access
+    return response.json()["resources"]["graphql"]["used"]
+
+
+def measure(client: GitHubClient, run: Callable[[], object]) -> Dict[str, float]:
+    client.pipeline_cache.clear()
+    points_before = graphql_points_used(client)
+    requests_before = client.graphql_requests
+    started = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - started
+    return {
+        "seconds": elapsed,
+        "requests": client.graphql_requests - requests_before,
+        "points": graphql_points_used(client) - points_before,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--config", default=None)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    client = GitHubClient(config.github)
+    targets = config.targets
+    paths = {
+        "per-target": lambda: [client.fetch_pull_requests(target) for target in targets],
+        "batched": lambda: client.fetch_many(targets),
+    }
+    print(f"{len(targets)} targets, {args.rounds} rounds")
+    print(f"{'path':<12}{'seconds':>10}{'requests':>10}{'points':>8}")
+    for name, run in paths.items():
+        totals = {"seconds": 0.0, "requests": 0.0, "points": 0.0}
+        for _ in range(args.rounds):
+            for key, value in measure(client, run).items():
+                totals[key] += value
+        print(
+            f"{name:<12}{totals['seconds'] / args.rounds:>10.2f}"
+            f"{totals['requests'] / args.rounds:>10.1f}{totals['points'] / args.rounds:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
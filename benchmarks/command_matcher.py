@@ -0,0 +1,88 @@
+"""Micro-benchmark pipeline-name to command matching.
+
+Compares the old linear substring scan with ``CommandMatcher`` on a
+synthetic set of Doris-style status contexts and check-run names, both on
+first sight (cold, every name distinct) and on repeated refreshes (warm,
+names served from the memo).
+
+    python benchmarks/command_matcher.py --names 5000 --refreshes 20
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.mapping import DEFAULT_RULES, PIPELINE_KEYWORDS, CommandMatcher  # noqa: E402
+
+SUITES = [
+    "COMPILE (DORIS_COMPILE)",
+    "FE UT (Doris FE UT)",
+    "BE UT (Doris BE UT)",
+    "P0 Regression (Doris Regression)",
+    "P1 Regression (Doris Regression)",
+    "cloud_p0 (Doris Cloud Regression)",
+    "vault_p0 (Doris Cloud Regression)",
+    "performance (Doris Performance)",
+    "External Regression (Doris External Regression)",
+    "NonConcurrent Regression (Doris Regression)",
+    "Coverage (Doris Coverage)",
+    "License Check",
+    "Build Broker",
+    "Code Style Checker",
+    "Clang Formatter",
+]
+
+
+def linear_scan(name: Optional[str]) -> Optional[str]:
+    if not name:
+        return None
+    lowered = name.lower()
+    for keyword, command in PIPELINE_KEYWORDS.items():
+        if keyword in lowered:
+            return command
+    return None
+
+
+def synthetic_names(count: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    return [f"{rng.choice(SUITES)} #{index} [{rng.choice(['x86', 'arm', 'asan'])}]" for index in range(count)]
+
+
+def timed(match: Callable[[str], Optional[str]], names: List[str], rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for name in names:
+            match(name)
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--names", type=int, default=5000, help="distinct pipeline names")
+    parser.add_argument("--refreshes", type=int, default=20, help="times each name is matched")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    names = synthetic_names(args.names, args.seed)
+    matcher = CommandMatcher(DEFAULT_RULES, max_cache_entries=len(names))
+    results = {
+        "linear scan": timed(linear_scan, names, args.refreshes),
+        "matcher (cold)": timed(matcher.match, names, 1) * args.refreshes,
+        "matcher (memoized)": timed(matcher.match, names, args.refreshes),
+    }
+    lookups = args.names * args.refreshes
+    print(f"{args.names} names x {args.refreshes} refreshes = {lookups} lookups")
+    for label, seconds in results.items():
+        print(f"{label:<20} {seconds * 1000:9.1f} ms  {seconds / lookups * 1e9:8.0f} ns/lookup")
+    changed = sum(linear_scan(name) != matcher.match(name) for name in names)
+    print(f"names resolved differently from the linear scan: {changed}")
+
+
+if __name__ == "__main__":
+    main()
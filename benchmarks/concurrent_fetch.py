@@ -0,0 +1,97 @@
+"""Compare GitHubClient refresh time at different ``github.max_concurrency``.
+
+Serves ``fake_github.py`` with per-request latency and times a cold
+multi-target fetch (search pages, then pipeline batches) and a batched PR
+lookup, as the incremental syncer issues them. ``--concurrency 1`` is the
+strictly sequential client this setting replaced.
+
+    python benchmarks/concurrent_fetch.py --prs 1000 --targets 6 --latency-ms 150
+    python benchmarks/concurrent_fetch.py --concurrency 1,4,8 --rounds 5
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import requests
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from app.config import GitHubConfig, TargetConfig  # noqa: E402
+from app.github_client import GitHubClient  # noqa: E402
+from fake_github import FakeSettings, create_fake_github, serve_in_thread  # noqa: E402
+from payloads import PayloadSpec  # noqa: E402
+
+
+def measure(client: GitHubClient, run: Callable[[], object], rounds: int) -> Dict[str, float]:
+    timings: List[float] = []
+    requests_before = client.graphql_requests
+    for _ in range(rounds):
+        client.pipeline_cache.clear()
+        started = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started)
+    return {
+        "median_s": statistics.median(timings),
+        "min_s": min(timings),
+        "requests": (client.graphql_requests - requests_before) / rounds,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--prs", type=int, default=600)
+    parser.add_argument("--targets", type=int, default=4, help="targets, one per synthetic author")
+    parser.add_argument("--concurrency", default="1,2,4,8")
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+
+    server = serve_in_thread(
+        create_fake_github(
+            PayloadSpec(pr_count=args.prs),
+            FakeSettings(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, graphql_limit=10**9),
+        )
+    )
+    api_base = f"http://127.0.0.1:{server.server_port}"
+    targets = [TargetConfig(label=f"dev{index}", user=f"dev{index}") for index in range(args.targets)]
+
+    print(f"{args.prs} PRs, {len(targets)} targets, {args.latency_ms:.0f} ms latency")
+    print(f"{'concurrency':<12}{'path':<10}{'median s':>10}{'min s':>8}{'requests':>10}")
+    baseline: Dict[str, float] = {}
+    try:
+        for concurrency in [int(value) for value in args.concurrency.split(",")]:
+            client = GitHubClient(
+                GitHubConfig(token="fake", api_base=api_base, max_concurrency=concurrency)
+            )
+            listed = client.fetch_many(targets, limit=args.prs)
+            keys = [(pr.repo_full_name, pr.number) for prs in listed.values() for pr in prs]
+            paths = {
+                "refresh": lambda: client.fetch_many(targets, limit=args.prs),
+                "lookup": lambda: client.fetch_pull_requests_by_number(keys),
+            }
+            for name, run in paths.items():
+                stats = measure(client, run, args.rounds)
+                baseline.setdefault(name, stats["median_s"])
+                speedup = baseline[name] / stats["median_s"]
+                print(
+                    f"{concurrency:<12}{name:<10}{stats['median_s']:>10.2f}{stats['min_s']:>8.2f}"
+                    f"{stats['requests']:>10.1f}  x{speedup:.1f}"
+                )
+            client.close()
+    finally:
+        requests.post(f"{api_base}/_reset", timeout=10)
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
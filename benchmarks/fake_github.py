@@ -0,0 +1,439 @@
+"""A local stand-in for the parts of the GitHub API this service uses.
+
+Serves every GraphQL query ``GitHubClient`` sends (search, multi-target
+search, listing, PR lookups, head SHA, pipelines and check page follow-ups)
+plus the ``issues/{n}/comments`` and ``pulls/{n}/update-branch`` REST
+endpoints, over PRs from ``payloads.PayloadGenerator``. Latency, error
+injection and rate limits are configurable; every response carries
+``X-RateLimit-*`` headers, and an exhausted budget answers 403 like GitHub.
+Check suites and runs are truncated to the page sizes our queries request,
+so pagination is exercised too.
+
+Point ``github.api_base`` at it:
+
+    python benchmarks/fake_github.py --port 9000 --prs 500 --latency-ms 150
+    # config.yaml: github: {api_base: "http://127.0.0.1:9000", token: "fake"}
+
+``GET /_stats`` returns call counts by kind, ``POST /_reset`` clears them.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from flask import Flask, jsonify, request
+from werkzeug.serving import make_server
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from payloads import PayloadGenerator, PayloadSpec  # noqa: E402
+
+FIRST_PR_NUMBER = 30000
+# Page sizes requested by the queries in app/github_client.py.
+SEARCH_PAGE = 20
+LIST_PAGE = 100
+# GitHub stops paging a search after this many results.
+SEARCH_RESULT_CAP = 1000
+SUITES_FIRST_PAGE = 10
+RUNS_FIRST_PAGE = 10
+SUITES_FOLLOW_UP_PAGE = 25
+RUNS_FOLLOW_UP_PAGE = 100
+
+
+@dataclass
+class FakeSettings:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    # Share of requests answered with a 502.
+    error_rate: float = 0.0
+    graphql_limit: int = 5000
+    core_limit: int = 5000
+    # How long update-branch takes to produce the new head commit.
+    update_delay_ms: float = 500.0
+    seed: int = 1
+    search_result_cap: int = SEARCH_RESULT_CAP
+
+
+class RateWindow:
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.used = 0
+        self.reset_at = time.time() + 3600
+
+    def spend(self, cost: int) -> bool:
+        if time.time() >= self.reset_at:
+            self.used, self.reset_at = 0, time.time() + 3600
+        if self.used + cost > self.limit:
+            return False
+        self.used += cost
+        return True
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.limit - self.used)
+
+    def headers(self, resource: str) -> Dict[str, str]:
+        return {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.remaining),
+            "X-RateLimit-Used": str(self.used),
+            "X-RateLimit-Reset": str(int(self.reset_at)),
+            "X-RateLimit-Resource": resource,
+        }
+
+
+class FakeGitHub:
+    """Mutable state behind the fake API: PR heads, update times and counters."""
+
+    def __init__(self, spec: PayloadSpec, settings: FakeSettings) -> None:
+        self.generator = PayloadGenerator(spec)
+        self.settings = settings
+        self.calls: Counter = Counter()
+        self.windows = {
+            "graphql": RateWindow(settings.graphql_limit),
+            "core": RateWindow(settings.core_limit),
+        }
+        # Authors and repositories never change, so search filters use these.
+        self._static = [
+            (node["author"]["login"], node["repository"]["nameWithOwner"])
+            for node in map(self.generator.pull_request_node, range(spec.pr_count))
+        ]
+        self._revisions: Dict[int, int] = {}
+        self._updated_at: Dict[int, datetime] = {}
+        self._lock = threading.Lock()
+        self._rng = random.Random(settings.seed)
+
+    # PR state -------------------------------------------------------------
+
+    def index_of(self, number: int) -> Optional[int]:
+        index = number - FIRST_PR_NUMBER
+        return index if 0 <= index < self.generator.spec.pr_count else None
+
+    def head_oid(self, index: int) -> str:
+        return self.generator.commit_oid(index, self._revisions.get(index, 0))
+
+    def updated_at(self, index: int) -> datetime:
+        return self._updated_at.get(index) or self.generator.updated_at(index)
+
+    def pull_request_node(self, index: int) -> Dict:
+        node = self.generator.pull_request_node(index, revision=self._revisions.get(index, 0))
+        node["updatedAt"] = _timestamp(self.updated_at(index))
+        if index in self._revisions:
+            node["mergeStateStatus"] = "CLEAN"
+        return node
+
+    def touch(self, index: int) -> None:
+        with self._lock:
+            self._updated_at[index] = datetime.now(timezone.utc)
+
+    def push_update(self, index: int) -> None:
+        with self._lock:
+            self._revisions[index] = self._revisions.get(index, 0) + 1
+            self._updated_at[index] = datetime.now(timezone.utc)
+
+    def search(self, query: str) -> List[int]:
+        """PR indexes matching a search string, most recently updated first."""
+        author = _qualifier(query, "author")
+        repos = set(re.findall(r"\brepo:(\S+)", query))
+        owners = set(re.findall(r"\buser:(\S+)", query))
+        since = _qualifier(query, "updated:>=") or _qualifier(query, "updated:>")
+        since_at = _parse_timestamp(since) if since else None
+        created = _qualifier(query, "created")
+        created_from, created_to = _created_range(created) if created else (None, None)
+        matches = []
+        for index, (login, repo) in enumerate(self._static):
+            if author and login != author:
+                continue
+            if (repos or owners) and repo not in repos and repo.split("/", 1)[0] not in owners:
+                continue
+            if since_at and self.updated_at(index) < since_at:
+                continue
+            created_at = self.generator.created_at(index)
+            if (created_from and created_at < created_from) or (created_to and created_at > created_to):
+                continue
+            matches.append(index)
+        return sorted(matches, key=self.updated_at, reverse=True)
+
+    # GraphQL resolvers ----------------------------------------------------
+
+    def search_page(self, query: str, cursor: Optional[str], first: int, edges: bool) -> Dict:
+        matches = self.search(query)
+        reachable = min(len(matches), self.settings.search_result_cap)
+        start = int(cursor) if cursor else 0
+        end = min(start + first, reachable)
+        page = [self.pull_request_node(index) for index in matches[start:end]]
+        result: Dict = {
+            "issueCount": len(matches),
+            "pageInfo": {"hasNextPage": end < reachable, "endCursor": str(end)},
+        }
+        if edges:
+            result["edges"] = [{"node": node} for node in page]
+        else:
+            result["nodes"] = page
+        return result
+
+    def commit_node(self, commit_id: str) -> Optional[Dict]:
+        index = self._node_index(commit_id)
+        if index is None:
+            return None
+        pipelines = self.generator.commit_pipelines(index)
+        suites = pipelines["checkSuites"]["nodes"]
+        return {
+            "id": commit_id,
+            "oid": self.head_oid(index),
+            "status": pipelines["status"],
+            "checkSuites": _page([_truncate_runs(s) for s in suites], 0, SUITES_FIRST_PAGE),
+        }
+
+    def suites_page(self, commit_id: str, after: Optional[str]) -> Optional[Dict]:
+        index = self._node_index(commit_id)
+        if index is None:
+            return None
+        suites = self.generator.commit_pipelines(index)["checkSuites"]["nodes"]
+        start = int(after) if after else 0
+        return {"checkSuites": _page([_truncate_runs(s) for s in suites], start, SUITES_FOLLOW_UP_PAGE)}
+
+    def runs_page(self, suite_id: str, after: Optional[str]) -> Optional[Dict]:
+        match = re.fullmatch(r"CS_(\d+)_(\d+)", suite_id)
+        if not match:
+            return None
+        suites = self.generator.commit_pipelines(int(match.group(1)))["checkSuites"]["nodes"]
+        suite_index = int(match.group(2))
+        if suite_index >= len(suites):
+            return None
+        runs = suites[suite_index]["checkRuns"]["nodes"]
+        start = int(after) if after else 0
+        return {"checkRuns": _page(runs, start, RUNS_FOLLOW_UP_PAGE)}
+
+    def resolve(self, query: str, variables: Dict) -> Tuple[str, Dict]:
+        """Answer a query from ``GitHubClient``, identified by its variables."""
+        if "ids" in variables:
+            return "pipelines", {"nodes": [self.commit_node(node_id) for node_id in variables["ids"]]}
+        if any(name.endswith("_query") for name in variables):
+            aliases = {name[: -len("_query")] for name in variables if name.endswith("_query")}
+            return "multi_search", {
+                alias: self.search_page(
+                    variables[f"{alias}_query"], variables.get(f"{alias}_cursor"), SEARCH_PAGE, True
+                )
+                for alias in aliases
+            }
+        if "query" in variables:
+            if "edges" in query:
+                return "search", {
+                    "search": self.search_page(variables["query"], variables.get("cursor"), SEARCH_PAGE, True)
+                }
+            return "list", {
+                "search": self.search_page(variables["query"], variables.get("cursor"), LIST_PAGE, False)
+            }
+        if "number" in variables:
+            index = self.index_of(variables["number"])
+            pull_request = {"headRefOid": self.head_oid(index)} if index is not None else None
+            return "head_sha", {"repository": {"pullRequest": pull_request}}
+        if "owner0" in variables:
+            data = {}
+            for name in variables:
+                if name.startswith("number"):
+                    alias = name[len("number") :]
+                    index = self.index_of(variables[name])
+                    node = self.pull_request_node(index) if index is not None else None
+                    data[f"pr{alias}"] = {"pullRequest": node}
+            return "lookup", data
+        data = {}
+        for name, node_id in variables.items():
+            if not name.endswith("_id"):
+                continue
+            alias = name[: -len("_id")]
+            after = variables.get(f"{alias}_after")
+            data[alias] = (
+                self.suites_page(node_id, after) if alias.startswith("s") else self.runs_page(node_id, after)
+            )
+        return "check_pages", data
+
+    # Faults ---------------------------------------------------------------
+
+    def delay(self) -> None:
+        settings = self.settings
+        if settings.latency_ms or settings.jitter_ms:
+            with self._lock:
+                delay = self._rng.gauss(settings.latency_ms, settings.jitter_ms)
+            time.sleep(max(0.0, delay) / 1000)
+
+    def should_fail(self) -> bool:
+        with self._lock:
+            return self._rng.random() < self.settings.error_rate
+
+    def _node_index(self, node_id: str) -> Optional[int]:
+        match = re.fullmatch(r"C_(\d+)", node_id)
+        if not match or int(match.group(1)) >= self.generator.spec.pr_count:
+            return None
+        return int(match.group(1))
+
+
+def create_fake_github(spec: PayloadSpec, settings: Optional[FakeSettings] = None) -> Flask:
+    fake = FakeGitHub(spec, settings or FakeSettings())
+    app = Flask(__name__)
+    app.config["FAKE_GITHUB"] = fake
+
+    def limited(resource: str, kind: str, cost: int = 1):
+        """Count the call, apply latency/errors and spend budget; returns an error response or None."""
+        fake.calls[kind] += 1
+        fake.delay()
+        window = fake.windows[resource]
+        if fake.should_fail():
+            fake.calls["injected_errors"] += 1
+            return jsonify({"message": "Server Error"}), 502, window.headers(resource)
+        if not window.spend(cost):
+            fake.calls["rate_limited"] += 1
+            body = {"message": f"API rate limit exceeded for {resource}."}
+            return jsonify(body), 403, window.headers(resource)
+        return None
+
+    @app.post("/graphql")
+    def graphql():
+        payload = request.get_json(force=True)
+        kind, data = fake.resolve(payload["query"], payload.get("variables") or {})
+        error = limited("graphql", f"graphql:{kind}")
+        if error:
+            return error
+        window = fake.windows["graphql"]
+        data["rateLimit"] = {
+            "limit": window.limit,
+            "cost": 1,
+            "remaining": window.remaining,
+            "resetAt": _timestamp(datetime.fromtimestamp(window.reset_at, tz=timezone.utc)),
+        }
+        return jsonify({"data": data}), 200, window.headers("graphql")
+
+    @app.post("/repos/<owner>/<repo>/issues/<int:number>/comments")
+    def comment(owner: str, repo: str, number: int):
+        error = limited("core", "rest:comment")
+        if error:
+            return error
+        index = fake.index_of(number)
+        if index is None:
+            return jsonify({"message": "Not Found"}), 404, fake.windows["core"].headers("core")
+        fake.touch(index)
+        body = {"id": fake.calls["rest:comment"], "body": (request.get_json(force=True) or {}).get("body")}
+        return jsonify(body), 201, fake.windows["core"].headers("core")
+
+    @app.put("/repos/<owner>/<repo>/pulls/<int:number>/update-branch")
+    def update_branch(owner: str, repo: str, number: int):
+        error = limited("core", "rest:update_branch")
+        headers = fake.windows["core"].headers("core")
+        if error:
+            return error
+        index = fake.index_of(number)
+        if index is None:
+            return jsonify({"message": "Not Found"}), 404, headers
+        if fake.pull_request_node(index)["mergeStateStatus"] not in {"BEHIND", "UNSTABLE"}:
+            return jsonify({"message": "There are no new commits on the base branch."}), 422, headers
+        timer = threading.Timer(fake.settings.update_delay_ms / 1000, fake.push_update, args=(index,))
+        timer.daemon = True
+        timer.start()
+        body = {"message": "Updating pull request branch.", "url": request.url}
+        return jsonify(body), 202, headers
+
+    @app.get("/_stats")
+    def stats():
+        return jsonify(
+            {
+                "calls": dict(fake.calls),
+                "remaining": {name: window.remaining for name, window in fake.windows.items()},
+            }
+        )
+
+    @app.post("/_reset")
+    def reset():
+        fake.calls.clear()
+        return jsonify({"status": "ok"})
+
+    return app
+
+
+def serve_in_thread(app: Flask, host: str = "127.0.0.1", port: int = 0):
+    """Start ``app`` on a background thread; returns the server (``server_port`` has the port)."""
+    server = make_server(host, port, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, name="fake-github", daemon=True)
+    thread.start()
+    return server
+
+
+def _page(nodes: List[Dict], start: int, size: int) -> Dict:
+    end = min(start + size, len(nodes))
+    return {
+        "pageInfo": {"hasNextPage": end < len(nodes), "endCursor": str(end) if end < len(nodes) else None},
+        "nodes": nodes[start:end],
+    }
+
+
+def _truncate_runs(suite: Dict) -> Dict:
+    return {**suite, "checkRuns": _page(suite["checkRuns"]["nodes"], 0, RUNS_FIRST_PAGE)}
+
+
+def _qualifier(query: str, name: str) -> Optional[str]:
+    match = re.search(rf"(?:^|\s){re.escape(name)}:?(\S+)", query)
+    return match.group(1) if match else None
+
+
+def _created_range(value: str) -> Tuple[Optional[datetime], Optional[datetime]]:
+    if value.startswith(">="):
+        return _parse_timestamp(value[2:]), None
+    start, _, end = value.partition("..")
+    return _parse_timestamp(start), _parse_timestamp(end)
+
+
+def _parse_timestamp(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def _timestamp(value: datetime) -> str:
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--prs", type=int, default=200)
+    parser.add_argument("--suites", type=int, default=PayloadSpec.suites_per_commit)
+    parser.add_argument("--runs", type=int, default=PayloadSpec.runs_per_suite)
+    parser.add_argument("--failure-ratio", type=float, default=PayloadSpec.failure_ratio)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--graphql-limit", type=int, default=5000)
+    parser.add_argument("--core-limit", type=int, default=5000)
+    parser.add_argument("--update-delay-ms", type=float, default=500.0)
+    parser.add_argument("--search-result-cap", type=int, default=SEARCH_RESULT_CAP)
+    args = parser.parse_args()
+    spec = PayloadSpec(
+        pr_count=args.prs,
+        suites_per_commit=args.suites,
+        runs_per_suite=args.runs,
+        failure_ratio=args.failure_ratio,
+    )
+    settings = FakeSettings(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        graphql_limit=args.graphql_limit,
+        core_limit=args.core_limit,
+        update_delay_ms=args.update_delay_ms,
+        search_result_cap=args.search_result_cap,
+    )
+    server = make_server(args.host, args.port, create_fake_github(spec, settings), threaded=True)
+    print(f"fake GitHub API on http://{args.host}:{server.server_port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
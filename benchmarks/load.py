@@ -0,0 +1,227 @@
+"""End-to-end load test of the service against the fake GitHub API.
+
+Starts ``fake_github.py`` and the Flask app (with its background poller) on
+local ports, then drives ``/``, ``/rerun`` and ``/rebase-rerun`` from
+concurrent clients. Reports p50/p99 latency per endpoint and the GitHub
+calls the service made per user request, broken down by kind.
+
+    python benchmarks/load.py --prs 500 --latency-ms 150 --requests 1000 --concurrency 32
+    python benchmarks/load.py --mix index=100 --error-rate 0.05 --output load.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import requests
+import yaml
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from app import create_app  # noqa: E402
+from fake_github import FakeSettings, create_fake_github, serve_in_thread  # noqa: E402
+from payloads import PayloadSpec  # noqa: E402
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in {"index", "rerun", "rebase"}:
+            raise argparse.ArgumentTypeError(f"unknown operation {name!r}")
+        mix[name] = int(weight or 1)
+    return mix
+
+
+def percentile(values: List[float], share: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(share * len(ordered)))]
+
+
+class LoadRun:
+    def __init__(self, base_url: str, labels: List[str], seed: int) -> None:
+        self.base_url = base_url
+        self.labels = labels
+        self.pull_requests: Dict[str, List[Tuple[str, int]]] = {}
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.job_ids: List[str] = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+
+    @property
+    def session(self) -> requests.Session:
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def discover(self) -> None:
+        """Warm every target and learn its PRs for the action requests."""
+        for label in self.labels:
+            self.session.get(f"{self.base_url}/", params={"target": label}, timeout=120)
+            payload = self.session.get(f"{self.base_url}/api/prs", params={"target": label}, timeout=30).json()
+            self.pull_requests[label] = [
+                (pr["repo_full_name"], pr["number"]) for pr in payload["pull_requests"]
+            ]
+
+    def request(self, operation: str) -> None:
+        with self._lock:
+            label = self._rng.choice(self.labels)
+            candidates = self.pull_requests.get(label) or [("apache/doris", 30000)]
+            repo, number = self._rng.choice(candidates)
+            command = self._rng.choice(["run p0", "run feut", "run buildall"])
+        started = time.perf_counter()
+        if operation == "index":
+            response = self.session.get(f"{self.base_url}/", params={"target": label}, timeout=120)
+        else:
+            form = {"target": label, "repo": repo, "pr": number}
+            if operation == "rerun":
+                form["command"] = command
+            path = "/rerun" if operation == "rerun" else "/rebase-rerun"
+            response = self.session.post(f"{self.base_url}{path}", data=form, timeout=120)
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.latencies.setdefault(operation, []).append(elapsed)
+            if response.status_code >= 400:
+                self.errors[operation] = self.errors.get(operation, 0) + 1
+            elif response.status_code == 202:
+                self.job_ids.append(response.json()["job_id"])
+
+    def drain_jobs(self, timeout: float) -> Dict[str, int]:
+        deadline = time.monotonic() + timeout
+        pending = list(dict.fromkeys(self.job_ids))
+        statuses: Dict[str, int] = {}
+        while pending and time.monotonic() < deadline:
+            still_pending = []
+            for job_id in pending:
+                job = self.session.get(f"{self.base_url}/jobs/{job_id}", timeout=30).json()
+                if job.get("status") in {"succeeded", "failed"}:
+                    statuses[job["status"]] = statuses.get(job["status"], 0) + 1
+                else:
+                    still_pending.append(job_id)
+            pending = still_pending
+            if pending:
+                time.sleep(0.5)
+        if pending:
+            statuses["unfinished"] = len(pending)
+        return statuses
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--prs", type=int, default=200)
+    parser.add_argument("--targets", type=int, default=3, help="targets, one per synthetic author")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("index=85,rerun=10,rebase=5"))
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    parser.add_argument("--jitter-ms", type=float, default=30.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--graphql-limit", type=int, default=5000)
+    parser.add_argument("--poll-seconds", type=int, default=15)
+    parser.add_argument("--drain-seconds", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", type=Path, help="also write the report as JSON")
+    args = parser.parse_args()
+
+    fake_app = create_fake_github(
+        PayloadSpec(pr_count=args.prs),
+        FakeSettings(
+            latency_ms=args.latency_ms,
+            jitter_ms=args.jitter_ms,
+            error_rate=args.error_rate,
+            graphql_limit=args.graphql_limit,
+            seed=args.seed,
+        ),
+    )
+    fake_server = serve_in_thread(fake_app)
+    fake_url = f"http://127.0.0.1:{fake_server.server_port}"
+    labels = [f"dev{index}" for index in range(args.targets)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        config_file = Path(directory) / "config.yaml"
+        config_file.write_text(
+            yaml.safe_dump(
+                {
+                    "github": {"token": "fake", "api_base": fake_url},
+                    "targets": [{"label": label, "user": label, "repos": []} for label in labels],
+                    "polling": {"interval_seconds": args.poll_seconds},
+                }
+            ),
+            encoding="utf-8",
+        )
+        service_app = create_app(str(config_file))
+    service_server = serve_in_thread(service_app)
+    run = LoadRun(f"http://127.0.0.1:{service_server.server_port}", labels, args.seed)
+
+    run.discover()
+    requests.post(f"{fake_url}/_reset", timeout=10)
+    operations = random.Random(args.seed).choices(
+        list(args.mix), weights=list(args.mix.values()), k=args.requests
+    )
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(run.request, operations))
+    wall = time.perf_counter() - started
+    jobs = run.drain_jobs(args.drain_seconds)
+    github = requests.get(f"{fake_url}/_stats", timeout=10).json()
+    # Jobs still waiting on the per-repo token buckets would only fail noisily from here on.
+    logging.getLogger("app").setLevel(logging.CRITICAL)
+    service_app.config["PR_SERVICE"].jobs.shutdown(wait=False, cancel_pending=True)
+    service_app.config["PR_POLLER"].stop()
+    service_server.shutdown()
+    fake_server.shutdown()
+
+    calls = {kind: count for kind, count in github["calls"].items() if kind.startswith(("graphql:", "rest:"))}
+    report = {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "wall_seconds": wall,
+        "throughput_rps": args.requests / wall,
+        "endpoints": {
+            operation: {
+                "count": len(latencies),
+                "errors": run.errors.get(operation, 0),
+                "p50_ms": statistics.median(latencies) * 1000,
+                "p99_ms": percentile(latencies, 0.99) * 1000,
+                "max_ms": max(latencies) * 1000,
+            }
+            for operation, latencies in sorted(run.latencies.items())
+        },
+        "jobs": jobs,
+        "github_calls": calls,
+        "github_calls_per_request": sum(calls.values()) / args.requests,
+        "github_faults": {
+            kind: github["calls"].get(kind, 0) for kind in ("injected_errors", "rate_limited")
+        },
+    }
+    print(f"{args.requests} requests at concurrency {args.concurrency} in {wall:.1f}s "
+          f"({report['throughput_rps']:.0f} req/s)")
+    for operation, stats in report["endpoints"].items():
+        print(
+            f"  {operation:<7} n={stats['count']:<5} p50 {stats['p50_ms']:8.1f} ms  "
+            f"p99 {stats['p99_ms']:8.1f} ms  errors {stats['errors']}"
+        )
+    print(f"jobs: {jobs}")
+    print(f"GitHub calls: {sum(calls.values())} ({report['github_calls_per_request']:.3f} per request)")
+    for kind, count in sorted(calls.items()):
+        print(f"  {kind:<24} {count}")
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
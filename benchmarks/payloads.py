@@ -0,0 +1,187 @@
+"""Deterministic generator of GitHub GraphQL payloads shaped like ours.
+
+``PayloadGenerator`` produces the ``data`` part of ``SEARCH_PR_QUERY`` and
+``PIPELINE_QUERY`` responses (and PR nodes with the pipeline tree inlined,
+as ``GitHubClient._extract_pipelines`` expects) for a synthetic set of PRs.
+The same spec and seed always produce the same payloads.
+"""
+from __future__ import annotations
+
+import hashlib
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+RUN_NAMES = [
+    "P0 Regression",
+    "P1 Regression",
+    "cloud_p0",
+    "vault_p0",
+    "FE UT",
+    "BE UT",
+    "performance",
+    "External Regression",
+    "NonConcurrent Regression",
+    "Coverage",
+    "COMPILE",
+    "License Check",
+    "Clang Formatter",
+    "Build Broker",
+]
+
+STATUS_CONTEXTS = [
+    "COMPILE (DORIS_COMPILE)",
+    "P0 Regression (Doris Regression)",
+    "cloud_p0 (Doris Cloud Regression)",
+    "FE UT (Doris FE UT)",
+    "BE UT (Doris BE UT)",
+    "performance (Doris Performance)",
+]
+
+MERGE_STATES = ["CLEAN", "CLEAN", "BEHIND", "BLOCKED", "UNSTABLE", "DIRTY"]
+
+BASE_TIME = datetime(2024, 6, 1, tzinfo=timezone.utc)
+
+
+@dataclass(frozen=True)
+class PayloadSpec:
+    pr_count: int = 100
+    suites_per_commit: int = 4
+    runs_per_suite: int = 5
+    status_contexts: int = 4
+    # Share of pipelines still queued or in progress, and share of the
+    # finished ones that failed.
+    running_ratio: float = 0.1
+    failure_ratio: float = 0.2
+    repos: int = 2
+    seed: int = 42
+
+
+class PayloadGenerator:
+    def __init__(self, spec: PayloadSpec) -> None:
+        self.spec = spec
+
+    # PR metadata ----------------------------------------------------------
+
+    def commit_id(self, index: int) -> str:
+        return f"C_{index}"
+
+    def commit_oid(self, index: int, revision: int = 0) -> str:
+        return hashlib.sha1(f"{self.spec.seed}:{index}:{revision}".encode()).hexdigest()
+
+    def updated_at(self, index: int) -> datetime:
+        return BASE_TIME - timedelta(minutes=index)
+
+    def created_at(self, index: int) -> datetime:
+        return BASE_TIME - timedelta(days=30, hours=index)
+
+    def pull_request_node(
+        self, index: int, with_pipelines: bool = False, revision: int = 0
+    ) -> Dict:
+        rng = self._rng("pr", index)
+        repo = f"apache/doris{'' if index % self.spec.repos == 0 else f'-{index % self.spec.repos}'}"
+        merge_state = rng.choice(MERGE_STATES)
+        commit: Dict = {"id": self.commit_id(index), "oid": self.commit_oid(index, revision)}
+        if with_pipelines:
+            commit.update(self.commit_pipelines(index))
+        return {
+            "number": 30000 + index,
+            "title": f"[fix](nereids) synthetic change {index}",
+            "url": f"https://github.com/{repo}/pull/{30000 + index}",
+            "state": "OPEN",
+            "updatedAt": self.updated_at(index).isoformat().replace("+00:00", "Z"),
+            "mergeable": "CONFLICTING" if merge_state == "DIRTY" else "MERGEABLE",
+            "mergeStateStatus": merge_state,
+            "isDraft": rng.random() < 0.05,
+            "author": {"login": f"dev{index % 17}"},
+            "repository": {"nameWithOwner": repo},
+            "commits": {"nodes": [{"commit": commit}]},
+        }
+
+    def search_page(self, first: int = 20, after: Optional[str] = None) -> Dict:
+        """``data`` of one ``SEARCH_PR_QUERY`` page; cursors are PR offsets."""
+        start = int(after) if after else 0
+        end = min(start + first, self.spec.pr_count)
+        return {
+            "search": {
+                "issueCount": self.spec.pr_count,
+                "pageInfo": {"hasNextPage": end < self.spec.pr_count, "endCursor": str(end)},
+                "edges": [{"node": self.pull_request_node(index)} for index in range(start, end)],
+            }
+        }
+
+    # Pipelines ------------------------------------------------------------
+
+    def commit_pipelines(self, index: int) -> Dict:
+        """The ``status`` and ``checkSuites`` trees of a PR's head commit, unpaged."""
+        rng = self._rng("pipelines", index)
+        contexts = [
+            {
+                "context": STATUS_CONTEXTS[position % len(STATUS_CONTEXTS)],
+                "state": self._status_state(rng),
+                "targetUrl": f"http://ci.example.org/build/{index}/{position}",
+                "description": "synthetic",
+            }
+            for position in range(self.spec.status_contexts)
+        ]
+        suites = []
+        for suite_index in range(self.spec.suites_per_commit):
+            runs = []
+            for run_index in range(self.spec.runs_per_suite):
+                status, conclusion = self._check_state(rng)
+                runs.append(
+                    {
+                        "name": f"{RUN_NAMES[(suite_index * 7 + run_index) % len(RUN_NAMES)]} #{run_index}",
+                        "status": status,
+                        "conclusion": conclusion,
+                        "detailsUrl": f"https://github.com/apache/doris/runs/{index}{suite_index}{run_index}",
+                    }
+                )
+            suites.append(
+                {
+                    "id": f"CS_{index}_{suite_index}",
+                    "status": "COMPLETED",
+                    "conclusion": "FAILURE" if any(run["conclusion"] == "FAILURE" for run in runs) else "SUCCESS",
+                    "checkRuns": {
+                        "pageInfo": {"hasNextPage": False, "endCursor": None},
+                        "nodes": runs,
+                    },
+                }
+            )
+        return {
+            "status": {"state": "FAILURE", "contexts": contexts},
+            "checkSuites": {"pageInfo": {"hasNextPage": False, "endCursor": None}, "nodes": suites},
+        }
+
+    def pipeline_nodes(self, ids: List[str]) -> Dict:
+        """``data`` of a ``PIPELINE_QUERY`` for commit node ids from ``commit_id``."""
+        nodes: List[Optional[Dict]] = []
+        for commit_id in ids:
+            index = int(commit_id.rsplit("_", 1)[-1])
+            if not 0 <= index < self.spec.pr_count:
+                nodes.append(None)
+                continue
+            nodes.append(
+                {"id": commit_id, "oid": self.commit_oid(index), **self.commit_pipelines(index)}
+            )
+        return {"nodes": nodes}
+
+    # Internal helpers -----------------------------------------------------
+
+    def _rng(self, kind: str, index: int) -> random.Random:
+        return random.Random(f"{self.spec.seed}:{kind}:{index}")
+
+    def _check_state(self, rng: random.Random) -> Tuple[str, Optional[str]]:
+        roll = rng.random()
+        if roll < self.spec.running_ratio:
+            return rng.choice(["QUEUED", "IN_PROGRESS"]), None
+        if rng.random() < self.spec.failure_ratio:
+            return "COMPLETED", "FAILURE"
+        return "COMPLETED", rng.choice(["SUCCESS", "SUCCESS", "SUCCESS", "SKIPPED", "NEUTRAL"])
+
+    def _status_state(self, rng: random.Random) -> str:
+        _, conclusion = self._check_state(rng)
+        if conclusion is None:
+            return "PENDING"
+        return "FAILURE" if conclusion == "FAILURE" else "SUCCESS"
@@ -0,0 +1,94 @@
+"""Measure what one parsed snapshot costs in memory and build time.
+
+Decodes synthetic GraphQL responses (``payloads.py``) for ``--prs`` PRs with
+their pipelines inlined, the way a cold refresh does, and reports the bytes
+the resulting ``PullRequest`` list retains (via ``tracemalloc``, with the raw
+response already released) plus the decode and build time.
+
+    python benchmarks/snapshot_memory.py --prs 1000
+    python benchmarks/snapshot_memory.py --prs 1000 --suites 8 --runs 10 --repeat 5
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from app.config import GitHubConfig  # noqa: E402
+from app.github_client import GitHubClient  # noqa: E402
+from app.models import PullRequest  # noqa: E402
+from payloads import PayloadGenerator, PayloadSpec  # noqa: E402
+
+
+def build(client: GitHubClient, body: bytes) -> List[PullRequest]:
+    nodes = [edge["node"] for edge in json.loads(body)["data"]["search"]["edges"]]
+    return [client._build_pull_request(node) for node in nodes]  # pylint: disable=protected-access
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--prs", type=int, default=1000)
+    parser.add_argument("--suites", type=int, default=4, help="check suites per commit")
+    parser.add_argument("--runs", type=int, default=5, help="check runs per suite")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    generator = PayloadGenerator(
+        PayloadSpec(pr_count=args.prs, suites_per_commit=args.suites, runs_per_suite=args.runs)
+    )
+    body = json.dumps(
+        {
+            "data": {
+                "search": {
+                    "edges": [
+                        {"node": generator.pull_request_node(index, with_pipelines=True)}
+                        for index in range(args.prs)
+                    ]
+                }
+            }
+        }
+    ).encode()
+    client = GitHubClient(GitHubConfig(token="benchmark"))
+    build(client, body)  # warm up (command memo, timestamp parsing)
+
+    timings: List[float] = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        build(client, body)
+        timings.append(time.perf_counter() - started)
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    snapshot = build(client, body)
+    gc.collect()
+    retained = sum(stat.size_diff for stat in tracemalloc.take_snapshot().compare_to(before, "filename"))
+    tracemalloc.stop()
+
+    pipelines = sum(len(pr.pipelines) for pr in snapshot)
+    report: Dict[str, float] = {
+        "prs": len(snapshot),
+        "pipelines": pipelines,
+        "response_bytes": len(body),
+        "retained_bytes": retained,
+        "bytes_per_pr": retained / len(snapshot),
+        "build_median_ms": statistics.median(timings) * 1000,
+        "build_min_ms": min(timings) * 1000,
+    }
+    print(f"{report['prs']} PRs, {pipelines} pipelines, {len(body) / 1e6:.1f} MB response")
+    print(f"retained  {retained / 1e6:8.2f} MB  ({report['bytes_per_pr']:.0f} B per PR)")
+    print(f"build     {report['build_median_ms']:8.1f} ms median  {report['build_min_ms']:.1f} ms min")
+
+
+if __name__ == "__main__":
+    main()
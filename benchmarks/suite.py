@@ -0,0 +1,263 @@
+"""Micro-benchmarks for parsing, pipeline evaluation, caching and rendering.
+
+Every case runs against synthetic payloads from ``payloads.py`` at each PR
+count given by ``--sizes``. One JSON line per run is appended to
+``--output`` (commit, Python version, payload spec, and min/median/mean per
+case), so results can be compared across commits:
+
+    python benchmarks/suite.py --sizes 10,100,1000 --repeat 5
+    python benchmarks/suite.py --case render_index --failure-ratio 0.5
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import asdict, replace
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import yaml  # noqa: E402
+from flask import render_template  # noqa: E402
+
+from app import create_app  # noqa: E402
+from app.cache import TTLCache  # noqa: E402
+from app.config import GitHubConfig  # noqa: E402
+from app.fragments import RowRenderer  # noqa: E402
+from app.github_client import GitHubClient  # noqa: E402
+from app.models import TargetSnapshot  # noqa: E402
+from app.query import DEFAULT_PER_PAGE, PullRequestIndex, PullRequestQuery  # noqa: E402
+from payloads import PayloadGenerator, PayloadSpec  # noqa: E402
+
+DEFAULT_OUTPUT = Path(__file__).resolve().parent / "results" / "history.jsonl"
+CACHE_THREADS = 8
+CACHE_OPS_PER_THREAD = 2000
+# Share of PRs that change between two renders in ``render_index_churn``.
+RENDER_CHURN = 0.01
+
+# A case prepares its inputs for one payload and returns the function to time.
+Case = Callable[[PayloadGenerator], Callable[[], object]]
+
+
+def build_pull_request(generator: PayloadGenerator) -> Callable[[], object]:
+    client = GitHubClient(GitHubConfig(token="benchmark"))
+    nodes = [generator.pull_request_node(i, with_pipelines=True) for i in range(generator.spec.pr_count)]
+    return lambda: [client._build_pull_request(node) for node in nodes]  # pylint: disable=protected-access
+
+
+def extract_pipelines(generator: PayloadGenerator) -> Callable[[], object]:
+    client = GitHubClient(GitHubConfig(token="benchmark"))
+    nodes = [generator.pull_request_node(i, with_pipelines=True) for i in range(generator.spec.pr_count)]
+    return lambda: [client._extract_pipelines(node) for node in nodes]  # pylint: disable=protected-access
+
+
+def problematic_pipelines(generator: PayloadGenerator) -> Callable[[], object]:
+    pull_requests = build_pull_request(generator)()
+    return lambda: [pr.problematic_pipelines for pr in pull_requests]
+
+
+def ttl_cache_contention(generator: PayloadGenerator) -> Callable[[], object]:
+    """``CACHE_THREADS`` threads hitting a cache half the size of the key space."""
+    keys = [f"pipelines:{generator.commit_oid(i)}" for i in range(generator.spec.pr_count)]
+
+    def run() -> None:
+        cache = TTLCache(max_entries=max(1, len(keys) // 2))
+        start = threading.Barrier(CACHE_THREADS)
+
+        def worker(offset: int) -> None:
+            start.wait()
+            for step in range(CACHE_OPS_PER_THREAD):
+                key = keys[(offset * 31 + step * 7) % len(keys)]
+                if cache.get(key) is None:
+                    cache.set(key, step, ttl_seconds=60)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(CACHE_THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    return run
+
+
+def render_index(
+    generator: PayloadGenerator, per_page: Optional[int] = None, churn: Optional[float] = None
+) -> Callable[[], object]:
+    """Render the index page; with ``churn``, rows come from a warm fragment cache.
+
+    Each churn run first replaces that share of PRs with a new version, as a
+    refresh in which only those PRs changed would.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        config_file = Path(directory) / "config.yaml"
+        config_file.write_text(
+            yaml.safe_dump(
+                {
+                    "github": {"token": "benchmark"},
+                    "targets": [{"label": "bench", "user": "dev", "repos": []}],
+                    "polling": {"background": False},
+                }
+            ),
+            encoding="utf-8",
+        )
+        app = create_app(str(config_file))
+    service = app.config["PR_SERVICE"]
+    render_row = app.config["PR_ROWS"].render_row
+    pull_requests = build_pull_request(generator)()
+    for pr in pull_requests:
+        pr.version = 1
+    query = PullRequestQuery(per_page=per_page)
+    warm_rows = RowRenderer(render_row)
+    version = 1
+
+    def run() -> str:
+        nonlocal pull_requests, version
+        if churn:
+            version += 1
+            changed = max(1, int(len(pull_requests) * churn))
+            start = (version * changed) % len(pull_requests)
+            pull_requests = list(pull_requests)
+            for position in range(start, min(start + changed, len(pull_requests))):
+                pull_requests[position] = replace(pull_requests[position], version=version)
+            rows = warm_rows
+        else:
+            rows = RowRenderer(render_row)
+        snapshot = TargetSnapshot(pull_requests=pull_requests, fetched_at=0.0, version=version)
+        # Fresh indexes each time, as after every refresh.
+        pr_index = PullRequestIndex(snapshot)
+        page = pr_index.query(query)
+        choices = service.command_choices()
+        with app.test_request_context("/"):
+            return render_template(
+                "index.html",
+                targets=service.targets(),
+                active_label="bench",
+                pull_requests=page.pull_requests,
+                rows=rows.render_rows("bench", page.pull_requests, choices),
+                page=page,
+                query=query,
+                repos=pr_index.repos,
+                failing_pipelines=pr_index.failing_pipelines,
+                snapshot_size=len(snapshot.pull_requests),
+                command_choices=choices,
+                refreshed_at=None,
+                stale=False,
+                version=snapshot.version,
+            )
+
+    return run
+
+
+def render_index_page(generator: PayloadGenerator) -> Callable[[], object]:
+    return render_index(generator, per_page=DEFAULT_PER_PAGE)
+
+
+def render_index_churn(generator: PayloadGenerator) -> Callable[[], object]:
+    return render_index(generator, churn=RENDER_CHURN)
+
+
+CASES: Dict[str, Case] = {
+    "build_pull_request": build_pull_request,
+    "extract_pipelines": extract_pipelines,
+    "problematic_pipelines": problematic_pipelines,
+    "ttl_cache_contention": ttl_cache_contention,
+    "render_index": render_index,
+    "render_index_page": render_index_page,
+    "render_index_churn": render_index_churn,
+}
+
+
+def measure(run: Callable[[], object], repeat: int) -> Dict[str, float]:
+    run()  # warm up (imports, template compilation, command memo)
+    timings: List[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started)
+    return {
+        "min_s": min(timings),
+        "median_s": statistics.median(timings),
+        "mean_s": statistics.fmean(timings),
+    }
+
+
+def run_suite(
+    spec: PayloadSpec,
+    sizes: List[int],
+    repeat: int,
+    cases: Optional[List[str]] = None,
+) -> List[Dict]:
+    results: List[Dict] = []
+    for size in sizes:
+        generator = PayloadGenerator(replace(spec, pr_count=size))
+        for name in cases or list(CASES):
+            stats = measure(CASES[name](generator), repeat)
+            results.append({"case": name, "prs": size, "repeat": repeat, **stats})
+    return results
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args() -> Tuple[argparse.Namespace, PayloadSpec]:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10,100,1000", help="comma-separated PR counts")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--case", action="append", choices=sorted(CASES), help="run only these cases")
+    parser.add_argument("--suites", type=int, default=PayloadSpec.suites_per_commit)
+    parser.add_argument("--runs", type=int, default=PayloadSpec.runs_per_suite)
+    parser.add_argument("--failure-ratio", type=float, default=PayloadSpec.failure_ratio)
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+    spec = PayloadSpec(
+        suites_per_commit=args.suites,
+        runs_per_suite=args.runs,
+        failure_ratio=args.failure_ratio,
+    )
+    return args, spec
+
+
+def main() -> None:
+    args, spec = parse_args()
+    sizes = [int(size) for size in args.sizes.split(",")]
+    results = run_suite(spec, sizes, args.repeat, args.case)
+    record = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "spec": asdict(spec),
+        "results": results,
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with args.output.open("a", encoding="utf-8") as handle:
+        handle.write(json.dumps(record) + "\n")
+    for result in results:
+        print(
+            f"{result['case']:<24} prs={result['prs']:<6} "
+            f"median {result['median_s'] * 1000:9.2f} ms  min {result['min_s'] * 1000:9.2f} ms"
+        )
+    print(f"appended to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
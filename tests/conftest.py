@@ -0,0 +1,43 @@
+"""Fixtures shared by the test modules; helpers live in helpers.py."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Callable, Optional
+
+import pytest
+import yaml
+from flask import Flask
+from flask.testing import FlaskClient
+
+from app import create_app
+
+from helpers import FakeClient, TwoPullRequestClient
+
+
+@pytest.fixture()
+def make_app(tmp_path: Path) -> Callable[..., Flask]:
+    """Build the app from a config.yaml in ``tmp_path``; ``sections`` replace the defaults."""
+
+    def build(client: Optional[FakeClient] = None, **sections) -> Flask:
+        config = {
+            "github": {"token": "dummy"},
+            "targets": [{"label": "demo", "user": "alice", "repos": ["org/repo"]}],
+            "polling": {"background": False, "incremental": False},
+            # No watcher thread or SIGHUP handler unless a test asks for one.
+            "reload": {"watch": False},
+            **sections,
+        }
+        config_file = tmp_path / "config.yaml"
+        config_file.write_text(yaml.safe_dump(config), encoding="utf-8")
+        app = create_app(str(config_file))
+        if client is not None:
+            app.config["PR_SERVICE"].client = client
+        return app
+
+    return build
+
+
+@pytest.fixture()
+def client(make_app: Callable[..., Flask]) -> FlaskClient:
+    return make_app(TwoPullRequestClient()).test_client()
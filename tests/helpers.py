@@ -0,0 +1,115 @@
+"""Fakes and payload builders shared by the test modules."""
+
+from __future__ import annotations
+
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from app.config import AppConfig, TargetConfig
+from app.models import PullRequest
+from app.ratelimit import RateBudget
+
+
+def make_config(**polling) -> AppConfig:
+    return AppConfig.model_validate(
+        {
+            "github": {"token": "dummy"},
+            "targets": [{"label": "demo", "user": "alice", "repos": ["org/repo"]}],
+            "polling": {"background": False, "incremental": False, **polling},
+            "reload": {"watch": False},
+        }
+    )
+
+
+def make_pr(number: int, repo: str = "org/repo") -> PullRequest:
+    return PullRequest(
+        number=number,
+        title=f"PR {number}",
+        url=f"https://github.com/{repo}/pull/{number}",
+        repo_full_name=repo,
+        author="alice",
+        updated_at=datetime(2024, 1, 1, tzinfo=timezone.utc),
+        mergeable_state="CLEAN",
+        mergeable=True,
+        has_conflicts=False,
+        update_branch_available=False,
+        status_badge="Clean",
+    )
+
+
+class FakeClient:
+    def __init__(self) -> None:
+        self.fetches = 0
+        self.budget = RateBudget(reserve=0)
+        self.comments: List[tuple] = []
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def fetch_pull_requests(
+        self,
+        target: TargetConfig,
+        limit: int = 50,
+        updated_since: Optional[datetime] = None,
+    ) -> List[PullRequest]:
+        self.gate.wait(5)
+        self.fetches += 1
+        return [make_pr(self.fetches)]
+
+    def post_comment(self, repo_full_name: str, pr_number: int, body: str) -> dict:
+        self.comments.append((repo_full_name, pr_number, body))
+        return {}
+
+    def invalidate_pipelines(self, sha: Optional[str]) -> None:
+        pass
+
+
+def wait_for(predicate, timeout: float = 5.0) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TwoPullRequestClient(FakeClient):
+    def fetch_pull_requests(self, target, limit=50, updated_since=None):
+        self.fetches += 1
+        return [make_pr(1), make_pr(2)]
+
+
+def pr_node(number: int, sha: str, updated_at: str = "2024-01-01T00:00:00Z") -> Dict:
+    return {
+        "number": number,
+        "title": f"PR {number}",
+        "url": f"https://github.com/apache/doris/pull/{number}",
+        "state": "OPEN",
+        "updatedAt": updated_at,
+        "mergeable": "MERGEABLE",
+        "mergeStateStatus": "BEHIND",
+        "isDraft": False,
+        "author": {"login": "alice"},
+        "repository": {"nameWithOwner": "apache/doris"},
+        "commits": {"nodes": [{"commit": {"id": f"C_{sha}", "oid": sha}}]},
+    }
+
+
+def commit_node(sha: str, p0_state: str) -> Dict:
+    return {
+        "id": f"C_{sha}",
+        "oid": sha,
+        "status": {
+            "state": p0_state.upper(),
+            "contexts": [
+                {
+                    "context": "P0 Regression (Doris Regression)",
+                    "state": p0_state.upper(),
+                    "targetUrl": "http://ci/p0",
+                    "description": None,
+                }
+            ],
+        },
+        "checkSuites": {"nodes": []},
+    }
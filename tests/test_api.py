@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from dataclasses import replace
+
+from flask.testing import FlaskClient
+
+
+def test_unchanged_snapshot_revalidates_with_304(client: FlaskClient) -> None:
+    first = client.get("/api/prs?target=demo")
+    assert first.status_code == 200
+    assert first.headers["Cache-Control"] == "no-cache"
+    assert [pr["number"] for pr in first.get_json()["pull_requests"]] == [1, 2]
+
+    again = client.get("/api/prs?target=demo", headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304
+    assert again.data == b""
+    assert again.headers["ETag"] == first.headers["ETag"]
+
+
+def test_since_returns_only_changed_pull_requests(client: FlaskClient) -> None:
+    service = client.application.config["PR_SERVICE"]
+    version = client.get("/api/prs").get_json()["version"]
+
+    service.update_pull_requests(lambda pr: replace(pr, title="Renamed") if pr.number == 2 else pr)
+
+    delta = client.get(f"/api/prs?since={version}").get_json()
+    assert delta["delta"] is True
+    assert [pr["title"] for pr in delta["pull_requests"]] == ["Renamed"]
+    assert delta["open"] == [["org/repo", 1], ["org/repo", 2]]
+    assert delta["version"] > version
+
+
+def test_unknown_target_is_404(client: FlaskClient) -> None:
+    assert client.get("/api/prs?target=missing").status_code == 404
+
+
+def test_refetched_identical_pull_requests_keep_their_version(client: FlaskClient) -> None:
+    service = client.application.config["PR_SERVICE"]
+    version = client.get("/api/prs").get_json()["version"]
+
+    service.refresh("demo")
+
+    delta = client.get(f"/api/prs?since={version}").get_json()
+    assert delta["version"] > version
+    assert delta["pull_requests"] == []
+
+
+def test_filters_and_pages_are_served_from_the_index(client: FlaskClient) -> None:
+    payload = client.get("/api/prs?per_page=1&page=2").get_json()
+    assert [pr["number"] for pr in payload["pull_requests"]] == [2]
+    assert (payload["total"], payload["pages"]) == (2, 2)
+
+    assert client.get("/api/prs?repo=other/repo").get_json()["total"] == 0
+    page = client.get("/?per_page=1")
+    assert page.status_code == 200
+    assert b"1\xe2\x80\x931 of 2" in page.data
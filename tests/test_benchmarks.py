@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "benchmarks"))
+
+from payloads import PayloadGenerator, PayloadSpec  # noqa: E402
+from suite import CASES, run_suite  # noqa: E402
+
+from app.config import GitHubConfig  # noqa: E402
+from app.github_client import GitHubClient  # noqa: E402
+
+
+def test_generated_pages_parse_like_github_responses() -> None:
+    generator = PayloadGenerator(PayloadSpec(pr_count=25, failure_ratio=1.0, running_ratio=0.0))
+    client = GitHubClient(GitHubConfig(token="dummy"))
+    client.fetch_pipelines = lambda commits: {  # type: ignore[method-assign]
+        node["oid"]: client._extract_commit_pipelines(node)  # pylint: disable=protected-access
+        for node in generator.pipeline_nodes(list(commits))["nodes"]
+    }
+    first = generator.search_page()["search"]
+    second = generator.search_page(after=first["pageInfo"]["endCursor"])["search"]
+    assert first["pageInfo"]["hasNextPage"] and not second["pageInfo"]["hasNextPage"]
+
+    nodes = [edge["node"] for edge in first["edges"] + second["edges"]]
+    pull_requests = client._build_pull_requests(nodes)  # pylint: disable=protected-access
+    assert len({pr.number for pr in pull_requests}) == 25
+    assert all(pr.problematic_pipelines for pr in pull_requests)
+
+
+def test_suite_runs_every_case() -> None:
+    results = run_suite(PayloadSpec(), sizes=[3], repeat=1)
+    assert [result["case"] for result in results] == list(CASES)
+    assert all(result["min_s"] >= 0 for result in results)
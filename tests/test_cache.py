@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from app.cache import TTLCache
+
+
+def test_lru_eviction_keeps_recently_read_entries() -> None:
+    cache = TTLCache(max_entries=2)
+    cache.set("a", 1, ttl_seconds=60)
+    cache.set("b", 2, ttl_seconds=60)
+    assert cache.get("a") == 1
+    cache.set("c", 3, ttl_seconds=60)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_sweep_drops_keys_that_are_never_read(monkeypatch: pytest.MonkeyPatch) -> None:
+    cache = TTLCache(sweep_interval_seconds=30)
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now)
+    for index in range(100):
+        cache.set(f"rerun:org/repo#{index}:run p0", True, ttl_seconds=120)
+    cache.set("long-lived", True, ttl_seconds=3600)
+    cache.set("long-lived", True, ttl_seconds=3600)
+
+    monkeypatch.setattr(time, "time", lambda: now + 121)
+    cache.set("fresh", True, ttl_seconds=120)
+
+    assert len(cache) == 2
+    assert cache.stats()["expirations"] == 100
+    assert cache.get("long-lived") is True
+
+
+def test_invalidate_and_counters() -> None:
+    cache = TTLCache()
+    cache.set("prs:demo", ["pr"], ttl_seconds=60)
+    assert cache.get("prs:demo") == ["pr"]
+    assert cache.invalidate("prs:demo")
+    assert not cache.invalidate("prs:demo")
+    assert cache.get("prs:demo") is None
+    assert cache.stats() == {"size": 0, "hits": 1, "misses": 1, "evictions": 0, "expirations": 0}
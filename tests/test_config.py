@@ -4,8 +4,9 @@ from pathlib import Path
 
 import pytest
 import yaml
+from pydantic import ValidationError
 
-from app.config import AppConfig, load_config
+from app.config import AppConfig, TargetConfig, load_config
 
 
 def write_config(tmp_path: Path) -> Path:
@@ -38,3 +39,14 @@ def test_env_override(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
     config = load_config(str(config_file))
     assert config.github.token == "override"
     assert config.auth.api_key == "secret"
+
+
+def test_targets_need_authors_and_owner_scoped_globs() -> None:
+    team = TargetConfig(label="team", user="alice", users=["bob", "alice"], repos=["apache/doris*"])
+    assert team.authors == ["alice", "bob"]
+    assert team.matches_repo("apache/doris-website") and not team.matches_repo("apache/arrow")
+
+    with pytest.raises(ValidationError):
+        TargetConfig(label="nobody", repos=["apache/doris"])
+    with pytest.raises(ValidationError):
+        TargetConfig(label="glob", user="alice", repos=["apache*/doris"])
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import json
+from dataclasses import replace
+
+import pytest
+from flask.testing import FlaskClient
+
+from app.events import EventHub, diff_snapshots
+from app.models import PipelineStatus, TargetSnapshot
+
+from helpers import make_pr
+
+
+def read_events(response, count: int) -> list:
+    events, buffer = [], ""
+    for chunk in response.response:
+        buffer += chunk.decode() if isinstance(chunk, bytes) else chunk
+        while "\n\n" in buffer:
+            message, buffer = buffer.split("\n\n", 1)
+            fields = dict(line.split(": ", 1) for line in message.splitlines() if ": " in line)
+            if "event" in fields:
+                events.append(fields)
+        if len(events) >= count:
+            response.close()
+            return events
+    return events
+
+
+def test_diff_reports_pipeline_transitions_and_flips() -> None:
+    before = make_pr(1)
+    before.pipelines = [PipelineStatus("P0", "completed", "failure", None, None)]
+    after = replace(
+        before,
+        has_conflicts=True,
+        pipelines=[PipelineStatus("P0", "in_progress", None, None, None)],
+    )
+    data, rows = diff_snapshots(
+        TargetSnapshot([before, make_pr(2)], 0, version=1),
+        TargetSnapshot([after, make_pr(3)], 0, version=2),
+    )
+    assert data["added"] == [["org/repo", 3]]
+    assert data["removed"] == [["org/repo", 2]]
+    assert data["changed"] == [
+        {
+            "key": ["org/repo", 1],
+            "fields": {"has_conflicts": [False, True]},
+            "pipelines": [{"name": "P0", "from": "failure", "to": "in_progress"}],
+        }
+    ]
+    assert [pr.number for pr in rows] == [3, 1]
+
+
+def test_hub_requests_reset_once_events_are_dropped() -> None:
+    hub = EventHub(buffer_size=1)
+    snapshots = [TargetSnapshot([make_pr(n)], 0, version=n) for n in range(1, 4)]
+    hub.publish("demo", None, snapshots[0])
+    hub.publish("demo", snapshots[0], snapshots[1])
+    assert [event.id for event in hub.events_since("demo", 1)] == [2]
+    hub.publish("demo", snapshots[1], snapshots[2])
+    assert hub.events_since("demo", 1) is None
+    assert [event.id for event in hub.events_since("demo", 2)] == [3]
+
+
+def test_stream_pushes_row_html_for_changed_pull_requests(
+    client: FlaskClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr("app.EVENT_STREAM_POLL_SECONDS", 0.05)
+    service = client.application.config["PR_SERVICE"]
+    version = service.get_snapshot("demo").version
+
+    response = client.get(f"/events?target=demo&last_event_id={version}", buffered=False)
+    service.update_pull_requests(lambda pr: None if pr.number == 1 else replace(pr, title="Renamed"))
+
+    (event,) = read_events(response, 1)
+    data = json.loads(event["data"])
+    assert event["event"] == "diff"
+    assert int(event["id"]) == data["version"] > version
+    assert data["removed"] == [["org/repo", 1]]
+    assert "Renamed" in data["rows"]["org/repo#2"]
+    assert 'data-key="org/repo#2"' in data["rows"]["org/repo#2"]
+
+
+def test_stream_asks_unknown_cursors_to_reload(client: FlaskClient) -> None:
+    client.application.config["PR_SERVICE"].get_snapshot("demo")
+    response = client.get("/events?target=demo", headers={"Last-Event-ID": "1"}, buffered=False)
+    (event,) = read_events(response, 1)
+    assert event["event"] == "reset"
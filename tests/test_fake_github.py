@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "benchmarks"))
+
+from fake_github import FakeSettings, create_fake_github, serve_in_thread  # noqa: E402
+from payloads import PayloadSpec  # noqa: E402
+
+from app.config import GitHubConfig, TargetConfig  # noqa: E402
+from app import github_client  # noqa: E402
+from app.github_client import GitHubClient  # noqa: E402
+from app.ratelimit import RateLimitExceeded  # noqa: E402
+
+from helpers import wait_for  # noqa: E402
+
+
+@pytest.fixture()
+def fake():
+    spec = PayloadSpec(pr_count=60, suites_per_commit=12, runs_per_suite=14, running_ratio=0.0)
+    app = create_fake_github(spec, FakeSettings(update_delay_ms=10, graphql_limit=40))
+    server = serve_in_thread(app)
+    yield app.config["FAKE_GITHUB"], f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+def test_client_pages_through_fake_search_and_checks(fake) -> None:
+    state, url = fake
+    client = GitHubClient(GitHubConfig(token="fake", api_base=url, rate_limit_reserve=0))
+    pull_requests = client.fetch_pull_requests(TargetConfig(label="dev1", user="dev1"), limit=50)
+
+    assert [pr.author for pr in pull_requests] == ["dev1"] * 4
+    # 12 suites x 14 runs with distinct names per suite offset need both follow-up kinds.
+    assert state.calls["graphql:check_pages"] >= 1
+    assert all(len(pr.pipelines) > 10 for pr in pull_requests)
+
+
+def test_update_branch_moves_head_and_exhaustion_raises(fake) -> None:
+    state, url = fake
+    client = GitHubClient(GitHubConfig(token="fake", api_base=url, rate_limit_reserve=0))
+    index = next(i for i in range(60) if state.pull_request_node(i)["mergeStateStatus"] == "BEHIND")
+    number = 30000 + index
+    repo = state.pull_request_node(index)["repository"]["nameWithOwner"]
+
+    before = client.fetch_head_sha(repo, number)
+    assert client.update_branch(repo, number)["message"].startswith("Updating")
+    assert wait_for(lambda: client.fetch_head_sha(repo, number) != before)
+    assert client.update_branch(repo, number)["status"] == 422
+
+    with pytest.raises(RateLimitExceeded):
+        for _ in range(50):
+            client.fetch_head_sha(repo, number)
+
+
+def test_team_search_is_sharded_past_the_result_cap(monkeypatch) -> None:
+    monkeypatch.setattr(github_client, "SEARCH_RESULT_CAP", 2)
+    app = create_fake_github(PayloadSpec(pr_count=60), FakeSettings(search_result_cap=2))
+    server = serve_in_thread(app)
+    try:
+        url = f"http://127.0.0.1:{server.server_port}"
+        client = GitHubClient(GitHubConfig(token="fake", api_base=url, rate_limit_reserve=0))
+        team = TargetConfig(label="team", users=[f"dev{i}" for i in range(17)], repos=["apache/doris*"])
+        solo = TargetConfig(label="solo", user="dev1", repos=["apache/doris"])
+
+        assert len(client.list_open_pull_requests(team)) == 60
+        fetched = client.fetch_many([team, solo])
+        assert sorted(pr.number for pr in fetched["team"]) == list(range(30000, 30060))
+        assert fetched["solo"] and all(pr.repo_full_name == "apache/doris" for pr in fetched["solo"])
+        assert app.config["FAKE_GITHUB"].calls["graphql:multi_search"] > 1
+    finally:
+        server.shutdown()
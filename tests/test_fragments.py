@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from typing import List
+
+from app.fragments import RowRenderer
+
+from helpers import make_pr
+
+
+def counting_renderer() -> tuple:
+    rendered: List[tuple] = []
+
+    def render_row(pr, active_label, command_choices) -> str:
+        rendered.append((active_label, pr.number, pr.version))
+        return f"<tr>{pr.number}@{pr.version}</tr>"
+
+    return RowRenderer(render_row), rendered
+
+
+def test_rows_are_rendered_once_per_version_label_and_choices() -> None:
+    rows, rendered = counting_renderer()
+    first, second = replace(make_pr(1), version=5), replace(make_pr(2), version=5)
+
+    assert rows.render_rows("demo", [first, second], ["run p0"]) == ["<tr>1@5</tr>", "<tr>2@5</tr>"]
+    rows.render_rows("demo", [first, second], ["run p0"])
+    assert len(rendered) == 2
+
+    rows.render_rows("demo", [replace(first, version=6), second], ["run p0"])
+    rows.render_rows("other", [second], ["run p0"])
+    rows.render_rows("demo", [second], ["run p0", "run p1"])
+    assert rendered[2:] == [("demo", 1, 6), ("other", 2, 5), ("demo", 2, 5)]
+
+
+def test_unpublished_pull_requests_are_not_cached() -> None:
+    rows, rendered = counting_renderer()
+    rows.render(label="demo", pr=make_pr(1), command_choices=[])
+    rows.render(label="demo", pr=make_pr(1), command_choices=[])
+    assert len(rendered) == 2
+
+
+def test_index_reuses_rows_until_a_pull_request_changes(client) -> None:
+    rows = client.application.config["PR_ROWS"]
+    service = client.application.config["PR_SERVICE"]
+    first = client.get("/").get_data(as_text=True)
+    assert rows.stats()["misses"] == 2
+
+    assert client.get("/").get_data(as_text=True) == first
+    assert rows.stats()["hits"] == 2
+
+    service.update_pull_requests(lambda pr: replace(pr, title="Renamed") if pr.number == 2 else pr)
+    assert "Renamed" in client.get("/").get_data(as_text=True)
+    assert (rows.stats()["hits"], rows.stats()["misses"]) == (3, 3)
@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List
+
+import pytest
+import requests
+
+from app.config import GitHubConfig, TargetConfig
+from app.github_client import PIPELINE_BATCH_SIZE, PIPELINE_QUERY, GitHubClient, target_shards
+from app.models import PipelineState, parse_state
+
+from helpers import commit_node, pr_node
+
+TARGET = TargetConfig(label="demo", user="alice", repos=["apache/doris"])
+
+
+class StubClient(GitHubClient):
+    def __init__(self, prs: List[Dict], commits: Dict[str, Dict]) -> None:
+        super().__init__(GitHubConfig(token="dummy"))
+        self.prs = prs
+        self.commits = commits
+        self.pipeline_requests: List[List[str]] = []
+
+    def _graphql(self, query: str, variables: Dict) -> Dict:
+        if query == PIPELINE_QUERY:
+            self.pipeline_requests.append(list(variables["ids"]))
+            nodes = [self.commits[node_id[2:]] for node_id in variables["ids"]]
+            return {"data": {"nodes": nodes}}
+        return {
+            "data": {
+                "search": {
+                    "issueCount": len(self.prs),
+                    "pageInfo": {"hasNextPage": False, "endCursor": None},
+                    "edges": [{"node": node} for node in self.prs],
+                }
+            }
+        }
+
+
+def test_finished_pipelines_are_reused_across_polls() -> None:
+    client = StubClient(
+        [pr_node(1, "aaa"), pr_node(2, "bbb")],
+        {"aaa": commit_node("aaa", "failure"), "bbb": commit_node("bbb", "pending")},
+    )
+    first = client.fetch_pull_requests(TARGET)
+    assert client.pipeline_requests == [["C_aaa", "C_bbb"]]
+    assert first[0].head_sha == "aaa"
+    assert first[0].pipelines[0].suggested_command == "run p0"
+    assert first[1].update_branch_available
+
+    client.fetch_pull_requests(TARGET)
+    assert client.pipeline_requests[-1] == ["C_bbb"]
+
+
+def test_newer_pr_update_bypasses_cached_pipelines() -> None:
+    client = StubClient([pr_node(1, "aaa")], {"aaa": commit_node("aaa", "failure")})
+    client.fetch_pull_requests(TARGET)
+    client.prs = [pr_node(1, "aaa", updated_at="2024-01-01T00:05:00Z")]
+    client.commits["aaa"] = commit_node("aaa", "pending")
+    prs = client.fetch_pull_requests(TARGET)
+    assert len(client.pipeline_requests) == 2
+    assert prs[0].pipelines[0].state == "pending"
+
+
+def test_finished_pipelines_expire_without_a_pr_update(monkeypatch: pytest.MonkeyPatch) -> None:
+    client = StubClient([pr_node(1, "aaa")], {"aaa": commit_node("aaa", "success")})
+    client.finished_pipeline_ttl_seconds = 60
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now)
+    client.fetch_pull_requests(TARGET)
+
+    # Re-run from the CI UI: the status flips but the PR's updatedAt does not move.
+    client.commits["aaa"] = commit_node("aaa", "failure")
+    assert client.fetch_pull_requests(TARGET)[0].pipelines[0].state == "success"
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    assert client.fetch_pull_requests(TARGET)[0].pipelines[0].state == "failure"
+    assert len(client.pipeline_requests) == 2
+
+
+class MultiSearchStub(StubClient):
+    """Serves aliased searches one PR per page to exercise per-alias cursors."""
+
+    def __init__(self, pages: Dict[str, List[Dict]], commits: Dict[str, Dict]) -> None:
+        super().__init__([], commits)
+        self.pages = pages
+        self.search_requests: List[Dict] = []
+
+    def _graphql(self, query: str, variables: Dict) -> Dict:
+        if query == PIPELINE_QUERY:
+            return super()._graphql(query, variables)
+        self.search_requests.append(variables)
+        data = {}
+        for name, value in variables.items():
+            if not name.endswith("_query"):
+                continue
+            alias = name[: -len("_query")]
+            page = int(variables[f"{alias}_cursor"] or 0)
+            nodes = self.pages[value]
+            data[alias] = {
+                "pageInfo": {"hasNextPage": page + 1 < len(nodes), "endCursor": str(page + 1)},
+                "edges": [{"node": nodes[page]}],
+            }
+        return {"data": data}
+
+
+def test_fetch_many_batches_targets_and_tracks_cursors_per_alias() -> None:
+    team = TargetConfig(label="team", user="bob", repos=["apache/doris"])
+    pages = {
+        target_shards(TARGET)[0].query(): [pr_node(1, "aaa")],
+        target_shards(team)[0].query(): [pr_node(1, "aaa"), pr_node(2, "bbb")],
+    }
+    client = MultiSearchStub(
+        pages, {"aaa": commit_node("aaa", "failure"), "bbb": commit_node("bbb", "failure")}
+    )
+    results = client.fetch_many([TARGET, team])
+
+    assert [pr.number for pr in results["demo"]] == [1]
+    assert [pr.number for pr in results["team"]] == [1, 2]
+    assert len(client.search_requests) == 2
+    assert set(client.search_requests[1]) == {"t1_query", "t1_cursor"}
+    assert client.pipeline_requests == [["C_aaa", "C_bbb"]]
+
+
+def run(name: str, conclusion: str = "SUCCESS") -> Dict:
+    return {"name": name, "status": "COMPLETED", "conclusion": conclusion, "detailsUrl": None}
+
+
+def page(nodes: List[Dict], cursor: str = None) -> Dict:
+    return {"pageInfo": {"hasNextPage": cursor is not None, "endCursor": cursor}, "nodes": nodes}
+
+
+class PagedChecksStub(StubClient):
+    """One commit whose second suite and first suite's runs both overflow page one."""
+
+    def __init__(self) -> None:
+        super().__init__([pr_node(1, "aaa")], {})
+        self.follow_ups: List[Dict] = []
+
+    def _graphql(self, query: str, variables: Dict) -> Dict:
+        if query == PIPELINE_QUERY:
+            suite = {"id": "S1", "checkRuns": page([run("Build Broker")], cursor="r1")}
+            commit = {"id": "C_aaa", "oid": "aaa", "status": None, "checkSuites": page([suite], cursor="s1")}
+            return {"data": {"nodes": [commit]}}
+        if "$s0_id" in query or "$r0_id" in query:
+            self.follow_ups.append(variables)
+            data: Dict = {}
+            if variables.get("s0_id") == "C_aaa":
+                late_suite = {"id": "S2", "checkRuns": page([run("Cloud UT (Doris Cloud UT)", "FAILURE")])}
+                data["s0"] = {"checkSuites": page([late_suite])}
+            if variables.get("r0_id") == "S1":
+                data["r0"] = {"checkRuns": page([run("P0 Regression", "FAILURE")])}
+            return {"data": data}
+        return super()._graphql(query, variables)
+
+
+def test_truncated_suites_and_runs_are_paged_in_one_follow_up() -> None:
+    client = PagedChecksStub()
+    (pr,) = client.fetch_pull_requests(TARGET)
+    assert len(client.follow_ups) == 1
+    assert set(client.follow_ups[0]) == {"s0_id", "s0_after", "r0_id", "r0_after"}
+    assert sorted(p.name for p in pr.problematic_pipelines) == [
+        "Cloud UT (Doris Cloud UT)",
+        "P0 Regression",
+    ]
+
+
+class BarrierStub(StubClient):
+    """Pipeline batches only complete once two of them are in flight together."""
+
+    def __init__(self, prs: List[Dict], commits: Dict[str, Dict]) -> None:
+        super().__init__(prs, commits)
+        self.barrier = threading.Barrier(2, timeout=5)
+
+    def _graphql(self, query: str, variables: Dict) -> Dict:
+        if query == PIPELINE_QUERY:
+            self.barrier.wait()
+        return super()._graphql(query, variables)
+
+
+def test_independent_pipeline_batches_run_concurrently() -> None:
+    shas = [f"{index:03d}" for index in range(PIPELINE_BATCH_SIZE + 1)]
+    client = BarrierStub(
+        [pr_node(index, sha) for index, sha in enumerate(shas)],
+        {sha: commit_node(sha, "failure") for sha in shas},
+    )
+    prs = client.fetch_pull_requests(TARGET, limit=len(shas))
+
+    assert sorted(len(batch) for batch in client.pipeline_requests) == [1, PIPELINE_BATCH_SIZE]
+    assert [pr.head_sha for pr in prs] == shas
+    assert all(pr.pipelines for pr in prs)
+
+
+def test_parsed_pipelines_share_interned_names_and_enum_states() -> None:
+    commits = {"a": commit_node("a", "failure"), "b": commit_node("b", "success")}
+    first, second = StubClient([pr_node(1, "a"), pr_node(2, "b")], commits).fetch_pull_requests(TARGET)
+    failing, passing = first.pipelines[0], second.pipelines[0]
+
+    assert failing.name is passing.name
+    assert first.repo_full_name is second.repo_full_name
+    assert (failing.state, passing.state) == (PipelineState.FAILURE, PipelineState.SUCCESS)
+    assert failing.is_problematic and not passing.is_problematic
+    assert parse_state("SOMETHING_NEW") is parse_state("something_new")
+
+
+def test_search_shards_split_by_repo_then_created_range() -> None:
+    team = TargetConfig(label="team", users=["alice", "bob"], repos=["apache/doris", "apache/doris-*"])
+    shards = target_shards(team)
+    assert [shard.query() for shard in shards] == [
+        "is:pr is:open author:alice repo:apache/doris user:apache sort:updated-desc",
+        "is:pr is:open author:bob repo:apache/doris user:apache sort:updated-desc",
+    ]
+    assert team.matches("bob", "apache/doris-website") and not team.matches("bob", "apache/arrow")
+
+    now = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    by_repo = shards[0].split(now)
+    assert [shard.scopes for shard in by_repo] == [("repo:apache/doris",), ("user:apache",)]
+    older, newer = by_repo[1].split(now)
+    assert "created:2008-01-01T00:00:00Z..2016-01-01T00:00:00Z" in older.query()
+    assert "created:>=2016-01-01T00:00:01Z" in newer.query()
+
+
+def test_lookup_maps_not_found_aliases_to_none() -> None:
+    client = GitHubClient(GitHubConfig(token="dummy"))
+    response = requests.Response()
+    response.status_code = 200
+    response._content = json.dumps(
+        {
+            "data": {"pr0": {"pullRequest": pr_node(1, "aaa")}, "pr1": {"pullRequest": None}},
+            "errors": [
+                {
+                    "type": "NOT_FOUND",
+                    "path": ["pr1", "pullRequest"],
+                    "message": "Could not resolve to a PullRequest with the number of 2.",
+                }
+            ],
+        }
+    ).encode()
+    client.session.post = lambda *args, **kwargs: response
+    client.fetch_pipelines = lambda commits: {commit_id: [] for commit_id in commits}
+
+    fetched = client.fetch_pull_requests_by_number([("apache/doris", 1), ("apache/doris", 2)])
+    assert fetched[("apache/doris", 1)].head_sha == "aaa"
+    assert fetched[("apache/doris", 2)] is None
+
+    response._content = json.dumps({"data": None, "errors": [{"type": "FORBIDDEN"}]}).encode()
+    with pytest.raises(RuntimeError, match="FORBIDDEN"):
+        client.fetch_pull_requests_by_number([("apache/doris", 1)])
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from app.config import ActionsConfig
+from app.jobs import JobQueue, TokenBucket
+from app.store import MemorySnapshotStore
+
+from helpers import wait_for
+
+
+def test_identical_jobs_merge_while_queued_or_running() -> None:
+    queue = JobQueue(ActionsConfig(max_workers=1), MemorySnapshotStore())
+    release = threading.Event()
+    calls = []
+
+    def action(job):
+        calls.append(job.id)
+        release.wait(5)
+        return {"status": "ok"}
+
+    first = queue.submit("rerun", "rerun:org/repo#1:run p0", "org/repo", 1, action)
+    second = queue.submit("rerun", "rerun:org/repo#1:run p0", "org/repo", 1, action)
+    assert second.id == first.id
+    assert wait_for(lambda: queue.get(first.id).status == "running")
+
+    release.set()
+    assert wait_for(lambda: queue.get(first.id).done)
+    finished = queue.get(first.id)
+    assert finished.status == "succeeded"
+    assert finished.result == {"status": "ok"}
+    assert finished.merged == 1
+    assert calls == [first.id]
+
+    third = queue.submit("rerun", "rerun:org/repo#1:run p0", "org/repo", 1, action)
+    assert third.id != first.id
+    queue.shutdown()
+
+
+def test_failed_job_records_error() -> None:
+    queue = JobQueue(ActionsConfig(), MemorySnapshotStore())
+
+    def action(job):
+        raise RuntimeError("GitHub API error while comment on PR #1: 502")
+
+    job = queue.submit("rerun", "rerun:org/repo#1:run p0", "org/repo", 1, action)
+    assert wait_for(lambda: queue.get(job.id).done)
+    assert queue.get(job.id).error.endswith("502")
+    queue.shutdown()
+
+
+def test_token_bucket_spreads_bursts() -> None:
+    bucket = TokenBucket(rate_per_second=10, capacity=2)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    delay = bucket.reserve()
+    assert 0.05 < delay <= 0.1
+    time.sleep(0.2)
+    assert bucket.reserve() == 0
+
+
+def test_throttled_repo_does_not_hold_workers_for_other_repos() -> None:
+    queue = JobQueue(
+        ActionsConfig(max_workers=1, per_repo_per_minute=1, per_repo_burst=1), MemorySnapshotStore()
+    )
+    finished = []
+
+    def action(job):
+        finished.append(job.repo_full_name)
+        return {"status": "ok"}
+
+    queue.submit("rerun", "rerun:org/busy#1:run p0", "org/busy", 1, action)
+    throttled = queue.submit("rerun", "rerun:org/busy#2:run p0", "org/busy", 2, action)
+    other = queue.submit("rerun", "rerun:org/quiet#1:run p0", "org/quiet", 1, action)
+
+    queue.wait([other], timeout=2)
+    assert other.status == "succeeded"
+    assert finished == ["org/busy", "org/quiet"]
+    assert throttled.status == "queued" and throttled.progress.startswith("throttled")
+    queue.shutdown(wait=False, cancel_pending=True)
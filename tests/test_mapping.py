@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import pytest
+
+from app.config import CommandsConfig
+from app.mapping import DEFAULT_RULES, CommandMatcher, CommandRule, build_matcher
+
+
+@pytest.mark.parametrize(
+    "name, command",
+    [
+        ("cloud_p0 (Doris Cloud Regression)", "run cloud_p0"),
+        ("vault_p0 (Doris Cloud Regression)", "run cloud_p0"),
+        ("P0 Regression (Doris Regression)", "run p0"),
+        ("FE UT (Doris FE UT)", "run feut"),
+        ("performance (Doris Performance)", "run performance"),
+        ("License Check", None),
+        (None, None),
+    ],
+)
+def test_default_rules_prefer_longest_match(name, command) -> None:
+    assert CommandMatcher(DEFAULT_RULES).match(name) == command
+
+
+def test_configured_rules_use_priority_and_anchored_regex() -> None:
+    matcher = build_matcher(
+        CommandsConfig.model_validate(
+            {
+                "rules": [
+                    {"pattern": "^cloud_p1\\b", "regex": True, "command": "run cloud_p1", "priority": 10},
+                    {"pattern": "compile", "command": "run compile_fast"},
+                ]
+            }
+        )
+    )
+    assert matcher.match("cloud_p1 (Doris Cloud P1)") == "run cloud_p1"
+    assert matcher.match("nightly cloud_p1") == "run p1"
+    # A longer built-in match still wins; on a tie the configured rule does.
+    assert matcher.match("COMPILE (DORIS_COMPILE)") == "run compile"
+    assert matcher.match("compile check") == "run compile_fast"
+
+
+def test_results_are_memoized_per_name() -> None:
+    matcher = CommandMatcher([CommandRule("p0", "run p0")], max_cache_entries=2)
+    assert matcher.match("p0 a") == "run p0"
+    assert matcher._memo == {"p0 a": "run p0"}  # pylint: disable=protected-access
+    matcher.match("b")
+    matcher.match("c")
+    assert len(matcher._memo) == 1  # pylint: disable=protected-access
+
+
+def test_invalid_rule_is_rejected() -> None:
+    with pytest.raises(ValueError):
+        CommandsConfig.model_validate({"rules": [{"pattern": "(", "regex": True, "command": "run p0"}]})
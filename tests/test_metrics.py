@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import json
+from typing import Dict
+
+import pytest
+import requests
+from flask.testing import FlaskClient
+
+from app.metrics import Histogram
+
+from helpers import commit_node, pr_node
+
+API_KEY = "secret-key"
+
+
+def graphql_response(data: Dict) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response._content = json.dumps({"data": data}).encode()  # pylint: disable=protected-access
+    response.headers.update(
+        {"X-RateLimit-Remaining": "4321", "X-RateLimit-Limit": "5000", "X-RateLimit-Reset": "4102444800"}
+    )
+    return response
+
+
+def fake_post(url: str, json: Dict, timeout: float) -> requests.Response:  # pylint: disable=redefined-outer-name
+    if json["query"].startswith("\nquery CommitPipelines"):
+        return graphql_response({"nodes": [commit_node("aaa", "failure")]})
+    page = {"pageInfo": {"hasNextPage": False, "endCursor": None}, "edges": [{"node": pr_node(1, "aaa")}]}
+    return graphql_response({"search": {"issueCount": 1, **page}})
+
+
+@pytest.fixture()
+def client(make_app) -> FlaskClient:
+    app = make_app(
+        targets=[{"label": "demo", "user": "alice", "repos": ["apache/doris"]}],
+        auth={"api_key": API_KEY},
+    )
+    app.config["PR_SERVICE"].client.session.post = fake_post
+    return app.test_client()
+
+
+def test_histogram_renders_cumulative_buckets() -> None:
+    histogram = Histogram("demo_seconds", "Demo.", buckets=(0.1, 1.0), labelnames=("kind",))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value, kind='a"b')
+
+    lines = histogram.render()
+    assert 'demo_seconds_bucket{kind="a\\"b",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{kind="a\\"b",le="1"} 3' in lines
+    assert 'demo_seconds_bucket{kind="a\\"b",le="+Inf"} 4' in lines
+    assert 'demo_seconds_sum{kind="a\\"b"} 4.05' in lines
+    assert 'demo_seconds_count{kind="a\\"b"} 4' in lines
+
+
+def test_metrics_cover_fetch_parse_render_and_rate_limit(client: FlaskClient) -> None:
+    assert client.get("/?target=demo").status_code == 200
+
+    body = client.get("/metrics").get_data(as_text=True)
+    assert 'pr_monitor_github_graphql_seconds_count{operation="SearchPullRequests"}' in body
+    assert 'pr_monitor_github_graphql_response_bytes_count{operation="CommitPipelines"}' in body
+    assert 'pr_monitor_github_pages_per_fetch_bucket{operation="SearchPullRequests",le="1"}' in body
+    assert "pr_monitor_build_pull_request_seconds_count" in body
+    assert "pr_monitor_extract_pipelines_seconds_count" in body
+    assert 'pr_monitor_template_render_seconds_count{template="index.html"}' in body
+    assert 'pr_monitor_cache_entries{cache="pipelines"} 1' in body
+    assert 'pr_monitor_github_rate_limit_remaining{resource="core"} 4321' in body
+
+
+def test_profile_requires_the_api_key(client: FlaskClient) -> None:
+    assert client.get("/?profile=1").status_code == 401
+
+    profiled = client.get("/?profile=1", headers={"X-API-Key": API_KEY})
+    assert profiled.status_code == 200
+    assert profiled.mimetype == "text/plain"
+    assert profiled.headers["X-Profiled-Status"] == "200"
+    assert "cumulative" in profiled.get_data(as_text=True)
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+
+from app.models import PipelineStatus, TargetSnapshot
+from app.query import PullRequestIndex, PullRequestQuery
+
+from helpers import make_pr
+
+
+def failing(name: str) -> PipelineStatus:
+    return PipelineStatus(name=name, state="completed", conclusion="failure", target_url=None, description=None)
+
+
+def make_snapshot() -> TargetSnapshot:
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    prs = [
+        replace(make_pr(number, repo), updated_at=base + timedelta(minutes=number))
+        for number, repo in [(1, "org/a"), (2, "org/b"), (3, "org/a"), (4, "org/b"), (5, "org/a")]
+    ]
+    prs[0] = replace(prs[0], pipelines=[failing("P0 Regression")], has_conflicts=True)
+    prs[2] = replace(prs[2], pipelines=[failing("P0 Regression"), failing("FE UT")])
+    prs[3] = replace(prs[3], pipelines=[failing("FE UT")], update_branch_available=True)
+    return TargetSnapshot(pull_requests=prs, fetched_at=0.0, version=7)
+
+
+def numbers(index: PullRequestIndex, **query) -> list:
+    return [pr.number for pr in index.query(PullRequestQuery(**query)).pull_requests]
+
+
+def test_filters_intersect_and_keep_the_sort_order() -> None:
+    index = PullRequestIndex(make_snapshot())
+    assert index.repos == ["org/a", "org/b"]
+    assert index.failing_pipelines == ["FE UT", "P0 Regression"]
+
+    assert numbers(index) == [5, 4, 3, 2, 1]
+    assert numbers(index, repo="org/a") == [5, 3, 1]
+    assert numbers(index, failing="P0 Regression", repo="org/a") == [3, 1]
+    assert numbers(index, failing="FE UT", update_branch=True) == [4]
+    assert numbers(index, conflicts=True, repo="org/b") == []
+    assert numbers(index, problematic=True, order="asc") == [1, 3, 4]
+    assert numbers(index, sort="failing") == [3, 1, 4, 2, 5]
+    assert numbers(index, sort="repo") == [5, 3, 1, 4, 2]
+
+
+def test_pages_slice_the_matches() -> None:
+    index = PullRequestIndex(make_snapshot())
+    page = index.query(PullRequestQuery(per_page=2, page=2))
+    assert [pr.number for pr in page.pull_requests] == [3, 2]
+    assert (page.total, page.pages, page.first_index) == (5, 3, 3)
+    assert [pr.number for pr in page.matched()] == [5, 4, 3, 2, 1]
+
+    last = index.query(PullRequestQuery(per_page=2, page=3, order="asc"))
+    assert [pr.number for pr in last.pull_requests] == [5]
+    assert index.query(PullRequestQuery(per_page=2, page=9)).pull_requests == []
+
+
+def test_query_arguments_are_clamped() -> None:
+    query = PullRequestQuery.from_args({"sort": "bogus", "page": "-3", "per_page": "5000", "conflicts": "on"})
+    assert (query.sort, query.page, query.per_page, query.conflicts) == ("updated", 1, 200, True)
+    assert query.to_args(page=2) == {"conflicts": "1", "page": "2", "per_page": "200"}
+    assert PullRequestQuery.from_args({"page": "3"}, per_page=None).page == 1
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from app.ratelimit import RateBudget, RateLimitExceeded
+
+
+def graphql_window(remaining: int, seconds_to_reset: float, cost: int = 1) -> dict:
+    reset = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(time.time() + seconds_to_reset))
+    return {"limit": 5000, "cost": cost, "remaining": remaining, "resetAt": reset}
+
+
+def test_interval_stretches_as_budget_runs_low() -> None:
+    budget = RateBudget(reserve=100)
+    budget.record_refresh_cost("demo", 10)
+    budget.record_refresh_cost("team", 10)
+
+    budget.record_graphql(graphql_window(remaining=4000, seconds_to_reset=3600))
+    assert budget.interval_for(300, ["demo", "team"]) == 300
+
+    budget.record_graphql(graphql_window(remaining=340, seconds_to_reset=3600))
+    assert budget.interval_for(300, ["demo", "team"]) == pytest.approx(300, rel=0.05)
+
+    budget.record_graphql(graphql_window(remaining=200, seconds_to_reset=3600))
+    assert budget.interval_for(300, ["demo", "team"]) == pytest.approx(720, rel=0.05)
+
+
+def test_reads_stop_at_reserve_but_writes_continue() -> None:
+    budget = RateBudget(reserve=50)
+    budget.record_graphql(graphql_window(remaining=40, seconds_to_reset=600))
+    budget.record_headers(
+        {
+            "X-RateLimit-Resource": "core",
+            "X-RateLimit-Remaining": "40",
+            "X-RateLimit-Reset": str(int(time.time()) + 600),
+        }
+    )
+    with pytest.raises(RateLimitExceeded):
+        budget.check_read("graphql")
+    budget.check_write("core")
+
+    budget.record_exhausted("core", time.time() + 600)
+    with pytest.raises(RateLimitExceeded):
+        budget.check_write("core")
+
+
+def test_remaining_never_moves_back_up_within_a_window() -> None:
+    budget = RateBudget(reserve=0)
+    window = graphql_window(remaining=100, seconds_to_reset=600)
+    budget.record_graphql(window)
+    budget.record_graphql({**window, "remaining": 150})
+    assert budget.snapshot("graphql").remaining == 100
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import os
+from typing import Dict
+
+import yaml
+
+from app import mapping
+from app.config import AppConfig, GitHubConfig
+from app.github_client import PIPELINE_QUERY, GitHubClient
+from app.service import PullRequestService
+
+from helpers import FakeClient, pr_node
+
+
+def make_config(targets, token: str = "dummy") -> dict:
+    return {
+        "github": {"token": token},
+        "targets": targets,
+        "polling": {"background": False, "incremental": True},
+        "reload": {"watch": False},
+    }
+
+
+DEMO = {"label": "demo", "user": "alice", "repos": ["org/repo"]}
+TEAM = {"label": "team", "users": ["bob"], "repos": ["org/repo"]}
+
+
+def test_reload_only_refetches_targets_whose_search_changed() -> None:
+    client = FakeClient()
+    service = PullRequestService(AppConfig.model_validate(make_config([DEMO, TEAM])), client)
+    demo, team = service.get_snapshot("demo"), service.get_snapshot("team")
+    assert service.store.claim_action("rerun:org/repo#1:run p0", 120)
+
+    changes = service.apply_config(
+        AppConfig.model_validate(make_config([DEMO, {**TEAM, "users": ["bob", "carol"]}]))
+    )
+    assert changes == {"added": [], "removed": [], "changed": ["team"], "github": [], "commands": []}
+    assert service.get_snapshot("demo") is demo
+    assert service.cached_snapshot("team").expired
+    assert not service.store.claim_action("rerun:org/repo#1:run p0", 120)
+    assert service.client is client
+
+    service.refresh("team")
+    assert service.get_snapshot("team") is not team
+    assert client.fetches == 3
+
+    changes = service.apply_config(AppConfig.model_validate(make_config([DEMO])))
+    assert changes["removed"] == ["team"]
+    assert service.cached_snapshot("team") is None
+
+
+def test_github_changes_replace_the_client_but_keep_pipelines() -> None:
+    first = GitHubClient(AppConfig.model_validate(make_config([DEMO])).github)
+    service = PullRequestService(AppConfig.model_validate(make_config([DEMO])), first)
+    first.pipeline_cache.set("pipelines:abc", [], ttl_seconds=60)
+    closed = []
+    first.close = lambda: closed.append(first)
+
+    with service._github() as in_flight:
+        service.apply_config(AppConfig.model_validate(make_config([DEMO], token="rotated")))
+        assert in_flight is first
+        assert closed == []
+    assert closed == [first]
+    assert service.client is not first
+    assert service.client.session.headers["Authorization"] == "Bearer rotated"
+    assert service.syncer.client is service.client
+    assert service.client.pipeline_cache.get("pipelines:abc") == []
+    assert service.client.budget is first.budget
+
+
+def test_edited_file_is_reloaded_and_invalid_edits_are_ignored(make_app) -> None:
+    app = make_app(**make_config([DEMO]))
+    reloader = app.config["CONFIG_RELOADER"]
+    config_file = reloader.path
+    assert reloader.check() is None
+
+    config_file.write_text(yaml.safe_dump(make_config([DEMO, TEAM])), encoding="utf-8")
+    os.utime(config_file, ns=(0, 10**18))
+    assert reloader.check()["added"] == ["team"]
+    assert [target.label for target in app.config["PR_SERVICE"].targets()] == ["demo", "team"]
+
+    config_file.write_text(yaml.safe_dump(make_config([])), encoding="utf-8")
+    assert reloader.reload() is None
+    assert app.config["APP_CONFIG"].targets[1].label == "team"
+    assert reloader.failures == 1
+
+
+class LicenseCheckClient(GitHubClient):
+    """Serves one PR whose head has a finished 'License Check #4' status."""
+
+    def __init__(self) -> None:
+        super().__init__(GitHubConfig(token="dummy"))
+        self.pipeline_requests = 0
+
+    def _graphql(self, query: str, variables: Dict, user_triggered: bool = False, tolerate=None) -> Dict:
+        if query == PIPELINE_QUERY:
+            self.pipeline_requests += 1
+            context = {"context": "License Check #4", "state": "SUCCESS", "targetUrl": None, "description": None}
+            commit = {"id": "C_aaa", "oid": "aaa", "status": {"state": "SUCCESS", "contexts": [context]}}
+            return {"data": {"nodes": [commit]}}
+        page = {"pageInfo": {"hasNextPage": False, "endCursor": None}, "edges": [{"node": pr_node(1, "aaa")}]}
+        return {"data": {"search": {"issueCount": 1, **page}}}
+
+
+def test_command_rule_changes_apply_to_held_pull_requests(monkeypatch) -> None:
+    monkeypatch.setattr(mapping, "_matcher", mapping._matcher)
+    doris = {"label": "doris", "user": "alice", "repos": ["apache/doris"]}
+    client = LicenseCheckClient()
+    config = AppConfig.model_validate(make_config([doris]))
+    service = PullRequestService(config, client)
+    (pr,) = service.refresh("doris").pull_requests
+    assert pr.pipelines[0].suggested_command is None
+
+    rule = {"pattern": "License Check", "command": "run license"}
+    reloaded = AppConfig.model_validate({**make_config([doris]), "commands": {"rules": [rule]}})
+    mapping.install_matcher(mapping.build_matcher(reloaded.commands))
+    assert service.apply_config(reloaded)["commands"] == ["rules changed"]
+    assert service.cached_snapshot("doris").expired
+
+    (pr,) = service.refresh("doris").pull_requests
+    assert pr.pipelines[0].suggested_command == "run license"
+    assert client.pipeline_requests == 2
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import threading
+from typing import Optional
+
+from app.config import TargetConfig
+from app.models import PipelineStatus
+from app.service import PullRequestService
+
+from helpers import FakeClient, make_config, make_pr, wait_for
+
+
+def test_first_request_fetches_inline() -> None:
+    client = FakeClient()
+    service = PullRequestService(make_config(), client)
+    snapshot = service.get_snapshot("demo")
+    assert client.fetches == 1
+    assert [pr.number for pr in snapshot.pull_requests] == [1]
+    assert not service.is_stale(snapshot)
+
+
+def test_stale_snapshot_is_served_while_revalidating() -> None:
+    client = FakeClient()
+    service = PullRequestService(make_config(), client)
+    service.get_snapshot("demo")
+    client.gate.clear()
+    service.rerun_pipeline("demo", "org/repo", 1, "run p0")
+
+    stale = service.get_snapshot("demo")
+    assert service.is_stale(stale)
+    assert [pr.number for pr in stale.pull_requests] == [1]
+
+    client.gate.set()
+    assert wait_for(lambda: not service.is_stale(service.get_snapshot("demo")))
+    assert [pr.number for pr in service.list_pull_requests("demo")] == [2]
+
+
+def test_rerun_failed_posts_one_comment_per_pull_request() -> None:
+    def failing(name: str, command: Optional[str], state: str = "failure") -> PipelineStatus:
+        return PipelineStatus(name, state, state, None, None, suggested_command=command)
+
+    class FailingClient(FakeClient):
+        def fetch_pull_requests(self, target, limit=50, updated_since=None):
+            first, second, third = make_pr(1), make_pr(2), make_pr(3)
+            first.pipelines = [failing("P0", "run p0"), failing("Cloud", None)]
+            second.pipelines = [failing("P0", "run p0"), failing("All", "run buildall")]
+            third.pipelines = [failing("P1", "run p1", state="pending")]
+            return [first, second, third]
+
+    client = FailingClient()
+    service = PullRequestService(make_config(), client)
+
+    plan = service.rerun_failed("demo", dry_run=True)
+    assert [(p["pr"], p["commands"], p["unmapped"]) for p in plan["results"]] == [
+        (1, ["run p0"], ["Cloud"]),
+        (2, ["run buildall"], []),
+    ]
+    assert client.comments == []
+
+    result = service.rerun_failed("demo")
+    assert [p["status"] for p in result["results"]] == ["ok", "ok"]
+    assert sorted(client.comments) == [("org/repo", 1, "run p0"), ("org/repo", 2, "run buildall")]
+
+    again = service.rerun_failed("demo")
+    assert [p["recent"] for p in again["results"]] == [["run p0"], ["run buildall"]]
+    assert len(client.comments) == 2
+
+
+class RebasingClient(FakeClient):
+    """Reports the old head until ``polls_before_update`` head checks have been made."""
+
+    def __init__(self, polls_before_update: int) -> None:
+        super().__init__()
+        self.polls_before_update = polls_before_update
+        self.head_checks = 0
+
+    def fetch_head_sha(self, repo_full_name: str, pr_number: int) -> str:
+        self.head_checks += 1
+        return "old" if self.head_checks <= self.polls_before_update else "new"
+
+    def update_branch(self, repo_full_name: str, pr_number: int) -> dict:
+        return {"message": "Updating pull request branch."}
+
+
+def test_rebase_and_rerun_waits_for_new_head(monkeypatch) -> None:
+    monkeypatch.setattr("app.service.HEAD_POLL_INITIAL_SECONDS", 0.01)
+    client = RebasingClient(polls_before_update=3)
+    service = PullRequestService(make_config(), client)
+
+    result = service.rebase_and_rerun("demo", "org/repo", 1)
+    assert result["head_sha"] == "new"
+    assert client.head_checks == 4
+    assert client.comments == [("org/repo", 1, "run buildall")]
+
+
+def test_head_change_notification_wakes_rebase_job(monkeypatch) -> None:
+    monkeypatch.setattr("app.service.HEAD_POLL_INITIAL_SECONDS", 30)
+    client = RebasingClient(polls_before_update=1)
+    service = PullRequestService(make_config(), client)
+
+    job = service.enqueue_rebase_and_rerun("demo", "org/repo", 1)
+    assert wait_for(lambda: (job.progress or "").startswith("waiting"))
+    assert client.comments == []
+    service.notify_head_changed("org/repo", 1)
+    service.jobs.wait([job], timeout=5)
+    assert job.status == "succeeded"
+    assert client.comments == [("org/repo", 1, "run buildall")]
+
+
+def test_waiting_rebase_releases_its_worker(monkeypatch) -> None:
+    monkeypatch.setattr("app.service.HEAD_POLL_INITIAL_SECONDS", 30)
+    client = RebasingClient(polls_before_update=1)
+    config = make_config()
+    config.actions.max_workers = 1
+    service = PullRequestService(config, client)
+
+    rebase = service.enqueue_rebase_and_rerun("demo", "org/repo", 1)
+    assert wait_for(lambda: rebase.status == "waiting")
+    rerun = service.enqueue_rerun("demo", "org/repo", 2, "run p0")
+    service.jobs.wait([rerun], timeout=5)
+    assert rerun.status == "succeeded"
+    assert rebase.status == "waiting"
+
+    service.notify_head_changed("org/repo", 1)
+    service.jobs.wait([rebase], timeout=5)
+    assert rebase.status == "succeeded"
+
+
+def test_versions_are_stamped_per_target_on_shared_pull_requests() -> None:
+    shared = make_pr(1)
+
+    class SharingClient(FakeClient):
+        def fetch_pull_requests(self, target, limit=50, updated_since=None):
+            return [shared]
+
+    config = make_config()
+    config.targets.append(TargetConfig(label="team", users=["alice", "bob"], repos=["org/repo"]))
+    service = PullRequestService(config, SharingClient())
+
+    demo = service.refresh("demo")
+    team = service.refresh("team")
+    assert shared.version == 0
+    assert demo.pull_requests[0].version == demo.version
+    assert team.pull_requests[0].version == team.version > demo.version
+    assert service.refresh("demo").pull_requests[0] is demo.pull_requests[0]
+
+
+def test_batch_refresh_joins_a_target_already_being_refreshed() -> None:
+    client = FakeClient()
+    config = make_config()
+    config.targets.append(TargetConfig(label="team", users=["bob"], repos=["org/repo"]))
+    service = PullRequestService(config, client)
+    client.gate.clear()
+    results = {}
+
+    single = threading.Thread(target=lambda: results.update(single=service.refresh("demo")))
+    single.start()
+    assert wait_for(lambda: service.flights.in_flight("prs:demo"))
+    batch = threading.Thread(target=lambda: results.update(service.refresh_many(["demo", "team"])))
+    batch.start()
+    assert wait_for(lambda: service.fetch_stats()["coalesced"] == 1)
+    client.gate.set()
+    single.join(5)
+    batch.join(5)
+
+    assert client.fetches == 2
+    assert results["demo"] is results["single"]
+    assert service.fetch_stats() == {"issued": 2, "coalesced": 1, "in_flight": 0}
+
+
+def test_cached_pipelines_are_trusted_for_one_reconcile_interval() -> None:
+    client = FakeClient()
+    PullRequestService(make_config(reconcile_interval_seconds=600), client)
+    assert client.finished_pipeline_ttl_seconds == 600
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution() -> None:
+    flights = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fetch() -> str:
+        calls.append(1)
+        release.wait(5)
+        return "result"
+
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        futures = [pool.submit(flights.do, "prs:demo", fetch) for _ in range(5)]
+        deadline = time.monotonic() + 5
+        while flights.stats()["coalesced"] < 4 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert flights.stats()["coalesced"] == 4
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert results == ["result"] * 5
+    assert len(calls) == 1
+    assert flights.stats() == {"issued": 1, "coalesced": 4, "in_flight": 0}
+
+
+def test_exception_is_shared_and_not_cached() -> None:
+    flights = SingleFlight()
+
+    def boom() -> None:
+        raise RuntimeError("rate limited")
+
+    with pytest.raises(RuntimeError, match="rate limited"):
+        flights.do("prs:demo", boom)
+    assert flights.do("prs:demo", lambda: 42) == 42
+    assert flights.stats()["issued"] == 2
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import time
+from pathlib import Path
+
+from app.models import PipelineStatus, TargetSnapshot
+from app.service import PullRequestService
+from app.store import SqliteSnapshotStore
+
+from helpers import FakeClient, make_config, make_pr
+
+
+def test_sqlite_round_trips_snapshots(tmp_path: Path) -> None:
+    store = SqliteSnapshotStore(str(tmp_path / "store.sqlite3"))
+    pr = make_pr(7)
+    pr.pipelines = [PipelineStatus("P0 Regression", "failure", "FAILURE", "http://ci", None, "run p0")]
+    store.save_snapshot("demo", TargetSnapshot(pull_requests=[pr], fetched_at=100.0, version=2))
+
+    loaded = store.load_snapshot("demo")
+    assert loaded.pull_requests == [pr]
+    assert store.snapshot_state("demo") == (2, False)
+
+    store.expire_snapshot("demo")
+    assert store.snapshot_state("demo") == (2, True)
+    store.save_snapshot("demo", TargetSnapshot(pull_requests=[], fetched_at=150.0, version=1))
+    assert store.load_snapshot("demo").pull_requests == [pr]
+
+
+def test_actions_and_lease_are_shared_between_connections(tmp_path: Path) -> None:
+    path = str(tmp_path / "store.sqlite3")
+    first, second = SqliteSnapshotStore(path), SqliteSnapshotStore(path)
+    assert first.claim_action("rerun:org/repo#1:run p0", ttl_seconds=120)
+    assert not second.claim_action("rerun:org/repo#1:run p0", ttl_seconds=120)
+    second.release_action("rerun:org/repo#1:run p0")
+    assert first.claim_action("rerun:org/repo#1:run p0", ttl_seconds=120)
+
+    assert first.acquire_lease("poller", "a", ttl_seconds=60)
+    assert not second.acquire_lease("poller", "b", ttl_seconds=60)
+    assert first.acquire_lease("poller", "a", ttl_seconds=60)
+
+
+def test_restarted_service_serves_stored_snapshot(tmp_path: Path) -> None:
+    path = str(tmp_path / "store.sqlite3")
+    warm = PullRequestService(make_config(), FakeClient(), store=SqliteSnapshotStore(path))
+    warm.get_snapshot("demo")
+
+    client = FakeClient()
+    restarted = PullRequestService(make_config(), client, store=SqliteSnapshotStore(path))
+    snapshot = restarted.get_snapshot("demo")
+    assert client.fetches == 0
+    assert [pr.number for pr in snapshot.pull_requests] == [1]
+    assert snapshot.fetched_at <= time.time()
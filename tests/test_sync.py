@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+
+from app.config import TargetConfig
+from app.github_client import PullRequestKey, target_shards
+from app.models import PipelineStatus, PullRequest
+from app.sync import IncrementalSyncer
+
+from helpers import make_pr
+
+TARGET = TargetConfig(label="demo", user="alice", repos=["org/repo"])
+BASE = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def pr_at(number: int, minutes: int, pending: bool = False) -> PullRequest:
+    pr = make_pr(number)
+    pr.updated_at = BASE + timedelta(minutes=minutes)
+    if pending:
+        pr.pipelines = [PipelineStatus("P0 Regression", "pending", "PENDING", None, None)]
+    return pr
+
+
+class RecordingClient:
+    def __init__(self, open_prs: List[PullRequest]) -> None:
+        self.open_prs = {(pr.repo_full_name, pr.number): pr for pr in open_prs}
+        self.searches: List[Optional[datetime]] = []
+        self.lookups: List[List[PullRequestKey]] = []
+        self.listings = 0
+
+    def fetch_pull_requests(
+        self, target: TargetConfig, limit: int = 50, updated_since: Optional[datetime] = None
+    ) -> List[PullRequest]:
+        self.searches.append(updated_since)
+        return [
+            pr for pr in self.open_prs.values() if updated_since is None or pr.updated_at >= updated_since
+        ]
+
+    def list_open_pull_requests(self, target: TargetConfig, limit: int = 50) -> Dict[PullRequestKey, datetime]:
+        self.listings += 1
+        return {key: pr.updated_at for key, pr in self.open_prs.items()}
+
+    def fetch_pull_requests_by_number(
+        self, keys: Iterable[PullRequestKey]
+    ) -> Dict[PullRequestKey, Optional[PullRequest]]:
+        keys = list(keys)
+        self.lookups.append(keys)
+        return {key: self.open_prs.get(key) for key in keys}
+
+
+def test_delta_sync_merges_only_updated_prs() -> None:
+    client = RecordingClient([pr_at(1, 0), pr_at(2, 10)])
+    syncer = IncrementalSyncer(client, reconcile_interval_seconds=3600, overlap_seconds=60)
+    state = syncer.sync(TARGET, None)
+    assert client.searches == [None]
+    assert state.high_water == BASE + timedelta(minutes=10)
+
+    client.open_prs[("org/repo", 3)] = pr_at(3, 20)
+    state = syncer.sync(TARGET, state)
+    assert client.searches[-1] == BASE + timedelta(minutes=9)
+    assert [pr.number for pr in state.ordered()] == [3, 2, 1]
+    assert client.lookups == []
+
+
+def test_pending_prs_are_refetched_and_reconcile_drops_closed() -> None:
+    client = RecordingClient([pr_at(1, 0, pending=True), pr_at(2, 10)])
+    syncer = IncrementalSyncer(client, reconcile_interval_seconds=3600)
+    state = syncer.sync(TARGET, None)
+
+    state = syncer.sync(TARGET, state)
+    assert client.lookups == [[("org/repo", 1)]]
+
+    del client.open_prs[("org/repo", 2)]
+    state.reconciled_at = 0
+    state = syncer.sync(TARGET, state)
+    assert client.listings == 1
+    assert set(state.pull_requests) == {("org/repo", 1)}
+
+
+def test_search_query_carries_updated_since() -> None:
+    query = target_shards(TARGET)[0].query(BASE)
+    assert "updated:>=2024-01-01T00:00:00Z" in query
+    assert query.endswith("sort:updated-desc")
+
+
+def test_reconcile_rereads_finished_pipelines_of_unchanged_prs() -> None:
+    passed = pr_at(1, 0)
+    passed.pipelines = [PipelineStatus("P0 Regression", "success", "SUCCESS", None, None)]
+    client = RecordingClient([passed, pr_at(2, 10)])
+    syncer = IncrementalSyncer(client, reconcile_interval_seconds=3600)
+    state = syncer.sync(TARGET, None)
+
+    failed = replace(passed, pipelines=[PipelineStatus("P0 Regression", "failure", "FAILURE", None, None)])
+    client.open_prs[("org/repo", 1)] = failed
+    state = syncer.sync(TARGET, state)
+    assert state.pull_requests[("org/repo", 1)].pipelines[0].state == "success"
+
+    state.reconciled_at = 0
+    state = syncer.sync(TARGET, state)
+    assert client.lookups == [[("org/repo", 1)]]
+    assert state.pull_requests[("org/repo", 1)].pipelines[0].state == "failure"
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import hashlib
+import hmac
+import json
+from pathlib import Path
+
+import pytest
+from flask.testing import FlaskClient
+
+from app.config import GitHubConfig
+from app.github_client import GitHubClient
+from app.models import PipelineState, PipelineStatus
+
+from helpers import FakeClient, make_pr
+
+FIXTURES = Path(__file__).parent / "fixtures" / "webhooks"
+SECRET = "webhook-secret"
+HEAD_SHA = "976a2b3c9f4e1d0a8b7c6d5e4f3a2b1c0d9e8f7a"
+
+
+class DorisClient(FakeClient):
+    def fetch_pull_requests(self, target, limit=50, updated_since=None):
+        pr = make_pr(58845, repo="apache/doris")
+        pr.head_sha = HEAD_SHA
+        pr.pipelines = [
+            PipelineStatus("performance (Doris Performance)", "pending", "PENDING", None, None, "run performance"),
+            PipelineStatus("Build Broker", "in_progress", None, None, None, None, "check"),
+        ]
+        self.fetches += 1
+        return [pr]
+
+
+@pytest.fixture()
+def client(make_app) -> FlaskClient:
+    app = make_app(
+        DorisClient(),
+        targets=[{"label": "demo", "user": "freemandealer", "repos": ["apache/doris"]}],
+        auth={"api_key": "ui-key"},
+        webhook={"secret": SECRET},
+    )
+    app.config["PR_SERVICE"].get_snapshot("demo")
+    return app.test_client()
+
+
+def post_fixture(client: FlaskClient, event: str, name: str, secret: str = SECRET, **changes):
+    body = (FIXTURES / name).read_bytes()
+    if changes:
+        payload = json.loads(body)
+        for key, value in changes.items():
+            target = payload
+            *parents, field = key.split("__")
+            for parent in parents:
+                target = target[parent]
+            target[field] = value
+        body = json.dumps(payload).encode()
+    signature = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return client.post(
+        "/webhook",
+        data=body,
+        content_type="application/json",
+        headers={"X-GitHub-Event": event, "X-Hub-Signature-256": f"sha256={signature}"},
+    )
+
+
+def cached(client: FlaskClient):
+    return client.application.config["PR_SERVICE"].list_cached_pull_requests("demo")
+
+
+def test_rejects_bad_signature(client: FlaskClient) -> None:
+    response = post_fixture(client, "status", "status.json", secret="wrong")
+    assert response.status_code == 401
+
+
+def test_status_and_check_run_update_only_their_pipeline(client: FlaskClient) -> None:
+    assert post_fixture(client, "status", "status.json").get_json()["updated"] == ["demo"]
+    assert post_fixture(client, "check_run", "check_run.json").status_code == 200
+
+    (pr,) = cached(client)
+    pipelines = {p.name: p for p in pr.pipelines}
+    assert pipelines["performance (Doris Performance)"].state == "failure"
+    assert pipelines["performance (Doris Performance)"].description == "TeamCity build failed"
+    assert not pipelines["Build Broker"].is_problematic
+    assert [p.name for p in pr.problematic_pipelines] == ["performance (Doris Performance)"]
+    assert client.application.config["PR_SERVICE"].client.fetches == 1
+
+
+def test_pull_request_events(client: FlaskClient) -> None:
+    post_fixture(client, "pull_request", "pull_request_synchronize.json")
+    (pr,) = cached(client)
+    assert pr.head_sha.startswith("4c1e0b9a")
+    assert [(p.name, p.state) for p in pr.pipelines] == [
+        ("performance (Doris Performance)", "pending"),
+        ("Build Broker", "pending"),
+    ]
+    assert all(p.is_problematic for p in pr.pipelines)
+
+    post_fixture(client, "pull_request", "pull_request_closed.json")
+    assert cached(client) == []
+
+
+def test_webhook_states_are_parsed_in_any_case(client: FlaskClient) -> None:
+    post_fixture(client, "status", "status.json", state="PENDING")
+    post_fixture(
+        client, "check_run", "check_run.json", check_run__status="IN_PROGRESS", check_run__conclusion=None
+    )
+
+    (pr,) = cached(client)
+    pipelines = {p.name: p for p in pr.pipelines}
+    assert pipelines["performance (Doris Performance)"].state is PipelineState.PENDING
+    assert pipelines["performance (Doris Performance)"].is_problematic
+    assert pipelines["Build Broker"].state is PipelineState.IN_PROGRESS
+
+
+def test_webhook_check_run_matches_the_polled_pipeline(client: FlaskClient) -> None:
+    post_fixture(client, "check_run", "check_run.json")
+    (pr,) = cached(client)
+    applied = next(p for p in pr.pipelines if p.name == "Build Broker")
+
+    run = {
+        "name": "Build Broker",
+        "status": "COMPLETED",
+        "conclusion": "SUCCESS",
+        "detailsUrl": applied.target_url,
+    }
+    commit = {"checkSuites": {"nodes": [{"checkRuns": {"nodes": [run]}}]}}
+    (polled,) = GitHubClient(GitHubConfig(token="dummy"))._parse_commit_pipelines(commit)
+    assert polled == applied
+    assert polled.conclusion is applied.conclusion is PipelineState.SUCCESS